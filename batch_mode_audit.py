@@ -0,0 +1,132 @@
+# 批模式与行模式分析
+# 读取每个操作符的 EstimatedExecutionMode/ActualExecutionMode，统计各语句的执行模式，
+# 找出处理大量行却以行模式执行的聚合、连接、排序和窗口函数，判断它们能否通过行存储上的批模式
+# （兼容级别 150 及以上）或列存储索引改为批模式，并按操作符的行数和自身 CPU 估算可能的收益。
+from plan_model import _to_float, unquote_identifier
+
+# 操作符的输入行数达到该值时，批模式通常有明显收益（与行存储批模式启发式使用的表大小阈值一致）
+BATCH_MODE_MIN_ROWS = 131072
+# 批模式每批处理的行数
+BATCH_SIZE = 900
+# 各类操作符改为批模式后 CPU 时间的典型缩减倍数，用于粗略估算收益
+BATCH_MODE_SPEEDUP = {
+    'Hash Match': 5.0,
+    'Stream Aggregate': 10.0,
+    'Sort': 2.0,
+    'Sequence Project': 5.0,
+}
+# 行存储上的批模式需要的最低基数估计模型版本（兼容级别 150，SQL Server 2019）
+BATCH_ON_ROWSTORE_MIN_CE_VERSION = 150
+
+_ACCESS_TAGS = ('IndexScan', 'TableScan')
+
+
+def _self_cpu(node, model):
+    """操作符自身的 CPU：有实际值时为毫秒（行模式的 ActualCPUms 包含子操作符），否则为预估 CPU 成本。"""
+    if node.has_actuals:
+        children = sum(child.actual_cpu_ms for child in model.children(node) if child.has_actuals)
+        return max(node.actual_cpu_ms - children, 0.0), True
+    return node.estimate_cpu * (node.estimate_rebinds + node.estimate_rewinds + 1), False
+
+
+def _input_rows(node, model):
+    """操作符的输入行数：各子操作符的实际总行数，或预估行数乘以执行次数。"""
+    rows = 0.0
+    for child in model.children(node):
+        if child.has_actuals:
+            rows += child.actual_rows
+        else:
+            rows += child.estimate_rows * (child.estimate_rebinds + child.estimate_rewinds + 1)
+    return rows
+
+
+def _tables_below(node):
+    tables = []
+    for tag in _ACCESS_TAGS:
+        for scan_object in node.element.iter(tag):
+            table_object = scan_object.find('Object')
+            if table_object is not None:
+                table = unquote_identifier(table_object.get('Table'))
+                if table and table not in tables:
+                    tables.append(table)
+    return tables
+
+
+def _statement_nodes(facts, statement):
+    return [node for node in (facts.node(relop) for relop in statement.iter('RelOp')) if node is not None]
+
+
+def execution_mode_summary(facts):
+    """返回每条语句的执行模式统计：{语句 ID: {'Row': 操作符数, 'Batch': 操作符数}}。"""
+    summary = {}
+    for statement in facts.nodes('StmtSimple'):
+        counts = summary.setdefault(statement.get('StatementId', '?'), {'Row': 0, 'Batch': 0})
+        for node in _statement_nodes(facts, statement):
+            counts[node.execution_mode] = counts.get(node.execution_mode, 0) + 1
+    return summary
+
+
+def batch_mode_candidates(facts):
+    """
+    找出输入行数达到 BATCH_MODE_MIN_ROWS 却以行模式执行、且批模式支持的操作符。
+
+    返回字典列表，按估算的收益从大到小排序：node、statement_id、input_rows、batches、self_cpu、actual（self_cpu 是否为毫秒）、
+    gain（估算可节省的 CPU）、tables（操作符下访问的表）、rowstore（是否可以使用行存储上的批模式）。
+    """
+    model = facts.model
+    candidates = []
+    for statement in facts.nodes('StmtSimple'):
+        ce_version = _to_float(statement.get('CardinalityEstimationModelVersion'))
+        for node in _statement_nodes(facts, statement):
+            speedup = BATCH_MODE_SPEEDUP.get(node.physical_op)
+            if speedup is None or node.execution_mode != 'Row':
+                continue
+            rows = _input_rows(node, model)
+            if rows < BATCH_MODE_MIN_ROWS:
+                continue
+            self_cpu, actual = _self_cpu(node, model)
+            candidates.append({
+                'node': node,
+                'statement_id': statement.get('StatementId', '?'),
+                'input_rows': rows,
+                'batches': -(-rows // BATCH_SIZE),
+                'self_cpu': self_cpu,
+                'actual': actual,
+                'gain': self_cpu * (1 - 1 / speedup),
+                'tables': _tables_below(node),
+                'rowstore': ce_version >= BATCH_ON_ROWSTORE_MIN_CE_VERSION,
+            })
+    candidates.sort(key=lambda candidate: candidate['gain'], reverse=True)
+    return candidates
+
+
+def batch_mode_issues(facts):
+    """根据执行计划报告执行模式、可以改为批模式的操作符和以行模式读取的列存储索引（规则 62、185、328），返回问题列表。"""
+    issues = []
+    for statement_id, counts in execution_mode_summary(facts).items():
+        if counts.get('Batch'):
+            issues.append(f"提示: 语句 {statement_id} 有 {counts['Batch']} 个操作符以批模式执行，"
+                          f"{counts.get('Row', 0)} 个以行模式执行。")
+
+    for candidate in batch_mode_candidates(facts):
+        node = candidate['node']
+        unit = '毫秒 CPU' if candidate['actual'] else '预估 CPU 成本'
+        tables = '、'.join(candidate['tables']) or '相关表'
+        if candidate['rowstore']:
+            remedy = ("兼容级别已支持行存储上的批模式，检查是否使用了 DISALLOW_BATCH_MODE 提示、"
+                      "关闭了 BATCH_MODE_ON_ROWSTORE，或查询包含批模式不支持的函数和数据类型")
+        else:
+            remedy = f"考虑把数据库兼容级别提高到 150 以使用行存储上的批模式，或在 {tables} 上建立列存储索引"
+        issues.append(f"警告: 语句 {candidate['statement_id']} 节点 {node.node_id} {node.physical_op}"
+                      f"（{node.logical_op}）以行模式处理 {candidate['input_rows']:.0f} 行，"
+                      f"批模式约 {candidate['batches']:.0f} 批即可完成，估计可节省 {candidate['gain']:.1f} {unit}"
+                      f"（自身 {candidate['self_cpu']:.1f}）。{remedy}。")
+
+    for node in facts.model.nodes:
+        if node.estimated_execution_mode == 'Batch' and node.actual_execution_mode == 'Row':
+            issues.append(f"警告: 节点 {node.node_id} {node.physical_op} 预计以批模式执行，实际回退为行模式。")
+        scan = node.element.find('IndexScan')
+        if scan is not None and scan.get('Storage') == 'ColumnStore' and node.execution_mode == 'Row':
+            issues.append(f"警告: 节点 {node.node_id} {node.physical_op} 以行模式读取列存储索引，"
+                          f"无法利用批模式的向量化处理和聚合下推。")
+    return issues
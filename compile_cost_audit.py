@@ -0,0 +1,153 @@
+# 编译开销与优化器提前终止分析
+# 读取语句的 StatementOptmLevel、StatementOptmEarlyAbortReason 和 QueryPlan 的 CompileTime/CompileCPU/CompileMemory，
+# 指出优化器超时或内存不足而提前结束的语句；对计划缓存，用 sys.dm_exec_query_stats 的 plan_generation_num
+# 和同一 query_hash 缓存的计划数估算每个查询的编译次数，按 编译 CPU × 编译次数 排出编译开销最大的语句。
+import xml.etree.ElementTree as ET
+
+from plan_model import _to_float
+from plan_visitor import walk_plan
+
+# 单次编译的 CPU（毫秒）或内存（KB）超过该值时报告
+COMPILE_CPU_WARN_MS = 100
+COMPILE_MEMORY_WARN_KB = 10 * 1024
+
+_EARLY_ABORT_REASONS = {
+    'TimeOut': '优化器超时，使用的是超时前找到的最好计划，不一定是最优计划',
+    'MemoryLimitExceeded': '优化器内存不足，使用的是提前结束时找到的计划',
+}
+
+# 每个 query_hash 取重编译次数最多的一个计划；compiles 为该 query_hash 所有缓存计划的 plan_generation_num 之和，
+# 即重编译次数加上即席查询各自编译的次数
+COMPILE_STATS_QUERY = """
+WITH stats AS (
+    SELECT
+        qs.plan_handle,
+        qs.query_hash,
+        MAX(qs.plan_generation_num) AS plan_generation_num,
+        SUM(qs.execution_count) AS execution_count
+    FROM sys.dm_exec_query_stats qs
+    GROUP BY qs.plan_handle, qs.query_hash
+),
+ranked AS (
+    SELECT
+        stats.*,
+        COUNT(*) OVER (PARTITION BY query_hash) AS cached_plans,
+        SUM(plan_generation_num) OVER (PARTITION BY query_hash) AS compiles,
+        SUM(execution_count) OVER (PARTITION BY query_hash) AS total_executions,
+        ROW_NUMBER() OVER (PARTITION BY query_hash ORDER BY plan_generation_num DESC) AS plan_rank
+    FROM stats
+)
+SELECT TOP (?)
+    ranked.plan_handle,
+    ranked.query_hash,
+    ranked.cached_plans,
+    ranked.compiles,
+    ranked.total_executions,
+    CAST(qp.query_plan AS NVARCHAR(MAX)) AS query_plan
+FROM ranked
+CROSS APPLY sys.dm_exec_query_plan(ranked.plan_handle) qp
+WHERE ranked.plan_rank = 1 AND qp.query_plan IS NOT NULL
+ORDER BY ranked.compiles DESC;
+"""
+
+
+def compile_costs(facts):
+    """
+    返回每条语句的优化和编译信息。
+
+    facts 为 plan_visitor.walk_plan 的返回值。返回字典列表：statement_id、query_hash、text、optimization_level、
+    early_abort_reason、compile_time_ms、compile_cpu_ms、compile_memory_kb。
+    """
+    costs = []
+    for statement in facts.nodes('StmtSimple'):
+        query_plan = statement.find('QueryPlan')
+        get = query_plan.get if query_plan is not None else {}.get
+        costs.append({
+            'statement_id': statement.get('StatementId', '?'),
+            'query_hash': statement.get('QueryHash', ''),
+            'text': ' '.join(statement.get('StatementText', '').split()),
+            'optimization_level': statement.get('StatementOptmLevel'),
+            'early_abort_reason': statement.get('StatementOptmEarlyAbortReason'),
+            'compile_time_ms': _to_float(get('CompileTime')),
+            'compile_cpu_ms': _to_float(get('CompileCPU')),
+            'compile_memory_kb': _to_float(get('CompileMemory')),
+        })
+    return costs
+
+
+def compile_cost_issues(facts):
+    """根据执行计划报告优化器提前终止和编译开销较大的语句（规则 349），返回问题列表。"""
+    issues = []
+    for cost in compile_costs(facts):
+        label = f"语句 {cost['statement_id']}（{cost['optimization_level'] or '未知'} 优化）"
+        reason = _EARLY_ABORT_REASONS.get(cost['early_abort_reason'])
+        if reason:
+            issues.append(f"警告: {label} {reason}（编译 CPU {cost['compile_cpu_ms']:g} 毫秒）。"
+                          f"考虑简化查询、拆分为多个步骤或减少连接的表。语句: {cost['text'][:100]}")
+        if cost['compile_cpu_ms'] > COMPILE_CPU_WARN_MS or cost['compile_memory_kb'] > COMPILE_MEMORY_WARN_KB:
+            issues.append(f"警告: {label} 编译耗时 {cost['compile_time_ms']:g} 毫秒，CPU {cost['compile_cpu_ms']:g} 毫秒，"
+                          f"内存 {cost['compile_memory_kb']:g} KB；频繁重编译或即席执行时开销会累积。")
+    return issues
+
+
+def fetch_compile_stats(conn, top_n=100):
+    """从计划缓存中取出编译次数最多的 top_n 个查询，返回字典列表。"""
+    import pyodbc
+
+    cursor = conn.cursor()
+    try:
+        cursor.execute(COMPILE_STATS_QUERY, top_n)
+        rows = cursor.fetchall()
+    except pyodbc.Error as e:
+        print(f"错误: {e}")
+        print("提示：读取计划缓存需要 VIEW SERVER STATE 权限。")
+        return []
+    finally:
+        cursor.close()
+
+    return [{
+        'plan_handle': '0x' + bytes(row[0]).hex().upper(),
+        'query_hash': '0x' + bytes(row[1]).hex().upper(),
+        'cached_plans': row[2],
+        'compiles': row[3],
+        'execution_count': row[4],
+        'query_plan': row[5],
+    } for row in rows]
+
+
+def rank_compile_overhead(entries):
+    """
+    为 fetch_compile_stats 返回的每个查询找到计划中对应的语句，按 编译 CPU × 编译次数 从大到小排序。
+
+    返回的字典在 compile_costs 的字段之外增加 cached_plans、compiles、execution_count 和 overhead_ms。
+    """
+    ranked = []
+    for entry in entries:
+        try:
+            facts = walk_plan(ET.fromstring(entry['query_plan']))
+        except ET.ParseError:
+            continue
+        for cost in compile_costs(facts):
+            if cost['query_hash'].lower() != entry['query_hash'].lower():
+                continue
+            cost.update(cached_plans=entry['cached_plans'], compiles=entry['compiles'],
+                        execution_count=entry['execution_count'],
+                        overhead_ms=cost['compile_cpu_ms'] * entry['compiles'])
+            ranked.append(cost)
+            break
+    ranked.sort(key=lambda cost: cost['overhead_ms'], reverse=True)
+    return ranked
+
+
+def audit_compile_costs(conn, top_n=100, limit=20):
+    """审计计划缓存中的编译开销，打印累计编译 CPU 最高的 limit 条语句并返回排序后的结果。"""
+    ranked = rank_compile_overhead(fetch_compile_stats(conn, top_n))
+    print("累计编译开销最高的语句：")
+    for cost in ranked[:limit]:
+        abort = f"，优化器提前终止: {cost['early_abort_reason']}" if cost['early_abort_reason'] in _EARLY_ABORT_REASONS else ''
+        print(f"{cost['query_hash']}: 编译 {cost['compiles']} 次（{cost['cached_plans']} 个缓存计划，"
+              f"执行 {cost['execution_count']} 次），单次编译 CPU {cost['compile_cpu_ms']:g} 毫秒，"
+              f"累计约 {cost['overhead_ms']:.0f} 毫秒{abort} - {cost['text'][:100]}")
+        if cost['cached_plans'] > 1 and cost['execution_count'] <= cost['cached_plans']:
+            print("提示: 该查询以即席方式执行，每次都重新编译；考虑参数化查询或对数据库使用 PARAMETERIZATION FORCED。")
+    return ranked
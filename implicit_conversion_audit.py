@@ -0,0 +1,167 @@
+# 隐式转换分析
+# 找出查找谓词和剩余谓词中对列做的 CONVERT_IMPLICIT，确定被转换的列、转换后的类型，
+# 以及与之比较的参数或常量的类型；有数据库连接时再用 indexes_audit 读取的列定义和索引定义，
+# 给出列的声明类型和因为转换而无法用于查找的索引。
+import xml.etree.ElementTree as ET
+
+from indexes_audit import format_column_type, get_index_columns, get_table_columns
+from plan_model import unquote_identifier
+from plan_visitor import walk_plan
+
+# 这些谓词位置中的列转换会影响索引查找
+_PREDICATE_PATHS = ('./*/SeekPredicates', './*/Predicate', './*/ProbeResidual')
+_UNICODE_TYPES = ('nvarchar', 'nchar')
+
+
+def _convert_type(convert):
+    """Convert 元素的目标类型，Length 以字节计，nvarchar/nchar 折算为字符数。"""
+    data_type = convert.get('DataType', '')
+    length = convert.get('Length')
+    if length is not None and data_type in ('varchar', 'char', 'varbinary', 'binary') + _UNICODE_TYPES:
+        length = int(length)
+        if length < 0:
+            return f"{data_type}(max)"
+        return f"{data_type}({length // 2 if data_type in _UNICODE_TYPES else length})"
+    if convert.get('Precision') is not None:
+        return f"{data_type}({convert.get('Precision')},{convert.get('Scale', '0')})"
+    return data_type
+
+
+def _literal_type(value):
+    if value.startswith("N'"):
+        return 'nvarchar'
+    if value.startswith("'"):
+        return 'varchar'
+    if value.strip('()').lstrip('-').isdigit():
+        return 'int'
+    return 'numeric'
+
+
+def _column_label(reference):
+    table = reference.get('Table', '')
+    schema = reference.get('Schema')
+    return f"{schema}.{table}.{reference.get('Column', '')}" if schema else f"{table}.{reference.get('Column', '')}"
+
+
+def _comparison_source(facts, convert, parameter_types):
+    """返回与被转换列比较的另一侧：(描述, 类型)，找不到比较时返回 (None, None)。"""
+    child = convert
+    for ancestor in facts.ancestors(convert):
+        if ancestor.tag == 'RelOp':
+            break
+        if ancestor.tag == 'Compare':
+            for side in ancestor.findall('ScalarOperator'):
+                if side is child:
+                    continue
+                for const in side.iter('Const'):
+                    value = const.get('ConstValue', '')
+                    return f"常量 {value}", _literal_type(value)
+                for reference in side.iter('ColumnReference'):
+                    name = reference.get('Column', '')
+                    if name.startswith('@'):
+                        return f"参数 {name}", parameter_types.get(name)
+                    return f"列 {_column_label(reference)}", None
+            break
+        child = ancestor
+    return None, None
+
+
+def find_implicit_conversions(facts):
+    """
+    找出谓词中对表列的隐式转换。
+
+    facts 为 plan_visitor.walk_plan 的返回值。返回字典列表：node（所在操作符的 PlanNode）、
+    statement_id、table（不带方括号的表名）、table_label、column、target_type、source、source_type、in_seek。
+    """
+    conversions = []
+    for statement in facts.nodes('StmtSimple'):
+        parameter_types = {reference.get('Column'): reference.get('ParameterDataType')
+                           for parameter_list in statement.iter('ParameterList')
+                           for reference in parameter_list.findall('ColumnReference')}
+        for relop in statement.iter('RelOp'):
+            for path in _PREDICATE_PATHS:
+                for predicate in relop.findall(path):
+                    for convert in predicate.iter('Convert'):
+                        if convert.get('Implicit') not in ('1', 'true'):
+                            continue
+                        source, source_type = _comparison_source(facts, convert, parameter_types)
+                        for reference in convert.iter('ColumnReference'):
+                            if not reference.get('Table'):
+                                continue
+                            conversions.append({
+                                'node': facts.node(relop),
+                                'statement_id': statement.get('StatementId', '?'),
+                                'table': unquote_identifier(reference.get('Table')),
+                                'table_label': _column_label(reference).rpartition('.')[0],
+                                'column': reference.get('Column', ''),
+                                'target_type': _convert_type(convert),
+                                'source': source,
+                                'source_type': source_type,
+                                'in_seek': predicate.tag == 'SeekPredicates',
+                            })
+    return conversions
+
+
+def implicit_conversion_issues(facts):
+    """只根据执行计划报告谓词中的隐式转换和 PlanAffectingConvert 警告，返回问题列表。"""
+    issues = []
+    for conversion in find_implicit_conversions(facts):
+        node = conversion['node']
+        compared = ''
+        if conversion['source']:
+            compared = f"（与{conversion['source']}" + (
+                f" {conversion['source_type']}" if conversion['source_type'] else '') + " 比较）"
+        issues.append(f"警告: 语句 {conversion['statement_id']} 节点 {node.node_id} {node.physical_op} 的谓词中，"
+                      f"列 {conversion['table_label']}.{conversion['column']} 被隐式转换为 "
+                      f"{conversion['target_type']}{compared}，可能导致无法使用索引查找。")
+
+    for warning in facts.nodes('PlanAffectingConvert'):
+        affected = '基数估算' if warning.get('ConvertIssue') == 'Cardinality Estimate' else '索引查找'
+        issues.append(f"警告: 执行计划中的类型转换影响了{affected}：{warning.get('Expression', '')}")
+    return issues
+
+
+def index_usability_issues(conversions, table_columns, index_columns):
+    """
+    结合列定义和索引定义说明每个隐式转换的影响，返回问题列表。
+
+    table_columns、index_columns 分别为 indexes_audit.get_table_columns 和 get_index_columns 的返回值。
+    """
+    issues = []
+    for conversion in conversions:
+        table = conversion['table']
+        column = conversion['column']
+        declared = table_columns.get(table, {}).get(column)
+        declared_type = format_column_type(declared) if declared is not None else '未知类型'
+        unusable = [name for name, index in index_columns.get(table, {}).items()
+                    if index['key_columns'] and index['key_columns'][0] == column]
+        node = conversion['node']
+        message = (f"提示: 列 {table}.{column} 声明为 {declared_type}，"
+                   f"被隐式转换为 {conversion['target_type']}")
+        if conversion['source']:
+            message += f"以便与{conversion['source']}" + (
+                f"（{conversion['source_type']}）" if conversion['source_type'] else '') + "比较"
+        if unusable:
+            message += f"；以该列开头的索引 {', '.join(unusable)} 因此无法用于查找，当前为 {node.physical_op}"
+        if declared is not None and conversion['source'] and not conversion['source'].startswith('列'):
+            message += f"。把{conversion['source'].split()[0]}的类型改为 {declared_type} 可以避免转换"
+        issues.append(message + "。")
+    return issues
+
+
+def audit_implicit_conversions(plan_xml, conn, verbose=True):
+    """审计执行计划中的隐式转换，并用数据库中的列定义和索引定义说明受影响的索引。返回问题列表。"""
+    try:
+        root = ET.fromstring(plan_xml)
+    except Exception as e:
+        print(f"解析执行计划时出错: {e}")
+        return
+    conversions = find_implicit_conversions(walk_plan(root))
+    if not conversions:
+        return []
+    tables = sorted({conversion['table'] for conversion in conversions})
+    issues = index_usability_issues(conversions, get_table_columns(conn, tables), get_index_columns(conn, tables))
+    if verbose:
+        for issue in issues:
+            print(issue)
+    return issues
@@ -1,8 +1,113 @@
-import pyodbc
 from sql_metadata import Parser
 import math
 
+def _formatted_tables(tables):
+    return ", ".join([f"'{table}'" for table in tables])
+
+
+def get_index_columns(conn, tables):
+    """
+    读取表上全部索引的列定义（sys.index_columns）。
+
+    返回 {表名: {索引名: 索引信息}}，索引信息包含 type（type_desc）、is_unique、is_primary_key、
+    key_columns（按 key_ordinal 排列的键列）、included_columns（包含列）和
+    columns（按 index_column_id 排列的 (列名, index_column_id)）。堆表没有名称的索引不包括在内。
+    """
+    cursor = conn.cursor()
+    cursor.execute(f'''
+        SELECT
+            OBJECT_NAME(ic.object_id) AS TableName,
+            i.name AS IndexName,
+            i.type_desc AS IndexType,
+            i.is_unique,
+            i.is_primary_key,
+            COL_NAME(ic.object_id, ic.column_id) AS ColumnName,
+            ic.index_column_id,
+            ic.key_ordinal,
+            ic.is_included_column
+        FROM sys.index_columns ic
+        JOIN sys.indexes i ON ic.object_id = i.object_id AND ic.index_id = i.index_id
+        WHERE OBJECT_NAME(ic.object_id) IN ({_formatted_tables(tables)})
+        AND i.name IS NOT NULL
+        ORDER BY ic.object_id, ic.index_id, ic.index_column_id
+    ''')
+    rows = cursor.fetchall()
+    cursor.close()
+
+    index_columns = {}
+    for row in rows:
+        index = index_columns.setdefault(row.TableName, {}).setdefault(row.IndexName, {
+            'type': row.IndexType,
+            'is_unique': bool(row.is_unique),
+            'is_primary_key': bool(row.is_primary_key),
+            'key_columns': [],
+            'included_columns': [],
+            'columns': [],
+        })
+        index['columns'].append((row.ColumnName, row.index_column_id))
+        if row.is_included_column:
+            index['included_columns'].append(row.ColumnName)
+        elif row.key_ordinal > 0:
+            index['key_columns'].append((row.key_ordinal, row.ColumnName))
+    for indexes in index_columns.values():
+        for index in indexes.values():
+            index['key_columns'] = [column for _, column in sorted(index['key_columns'])]
+    return index_columns
+
+
+def get_table_columns(conn, tables):
+    """
+    读取表的列定义（sys.columns）。
+
+    返回 {表名: {列名: 列信息}}，列信息包含 type（类型名）、max_length（字节，-1 表示 max）、
+    precision、scale 和 is_nullable。
+    """
+    cursor = conn.cursor()
+    cursor.execute(f'''
+        SELECT
+            OBJECT_NAME(c.object_id) AS TableName,
+            c.name AS ColumnName,
+            t.name AS TypeName,
+            c.max_length,
+            c.precision,
+            c.scale,
+            c.is_nullable
+        FROM sys.columns c
+        JOIN sys.types t ON c.user_type_id = t.user_type_id
+        WHERE OBJECT_NAME(c.object_id) IN ({_formatted_tables(tables)})
+        ORDER BY c.object_id, c.column_id
+    ''')
+    rows = cursor.fetchall()
+    cursor.close()
+
+    table_columns = {}
+    for row in rows:
+        table_columns.setdefault(row.TableName, {})[row.ColumnName] = {
+            'type': row.TypeName,
+            'max_length': row.max_length,
+            'precision': row.precision,
+            'scale': row.scale,
+            'is_nullable': bool(row.is_nullable),
+        }
+    return table_columns
+
+
+def format_column_type(column):
+    """把 get_table_columns 返回的列信息格式化为 T-SQL 类型，例如 nvarchar(20)、decimal(18,2)。"""
+    type_name = column['type']
+    if type_name in ('varchar', 'char', 'varbinary', 'binary', 'nvarchar', 'nchar'):
+        if column['max_length'] == -1:
+            return f"{type_name}(max)"
+        length = column['max_length'] // 2 if type_name in ('nvarchar', 'nchar') else column['max_length']
+        return f"{type_name}({length})"
+    if type_name in ('decimal', 'numeric'):
+        return f"{type_name}({column['precision']},{column['scale']})"
+    return type_name
+
+
 def audit_indexes(conn, tables):
+    import pyodbc
+
     issues = []  # 初始化issues为一个空列表
     print("开始进行索引审计...")
     cursor = conn.cursor()
@@ -291,23 +396,12 @@ def audit_indexes(conn, tables):
         print(f"警告: 表 {index[0]} 上的索引 {index[1]} 禁止页锁定。")
 
     # 规则 19: 检查前缀索引的效果
-    cursor.execute(f'''
-         SELECT 
-             OBJECT_NAME(ic.object_id) AS TableName,
-             i.name AS IndexName,
-             COL_NAME(ic.object_id, ic.column_id) AS ColumnName,
-             ic.index_column_id AS PositionInIndex
-         FROM sys.index_columns ic
-         JOIN sys.indexes i ON ic.object_id = i.object_id AND ic.index_id = i.index_id
-         WHERE OBJECT_NAME(ic.object_id) IN ({formatted_tables})
-         AND ic.index_column_id > 1
-         ORDER BY ic.object_id, ic.index_id, ic.index_column_id
-     ''')
-    non_prefix_columns = cursor.fetchall()
-
-    for column in non_prefix_columns:
-        print(
-            f'警告: 表 {column.TableName} 上的索引 {column.IndexName} 的非首字段 {column.ColumnName} 可能没有得到充分利用。')
+    for table_name, indexes in get_index_columns(conn, tables).items():
+        for index_name, index in indexes.items():
+            for column_name, position in index['columns']:
+                if position > 1:
+                    print(
+                        f'警告: 表 {table_name} 上的索引 {index_name} 的非首字段 {column_name} 可能没有得到充分利用。')
 
     # 规则 20: 检查有大量INSERT操作的表的索引使用情况
     query20 = f"""
@@ -0,0 +1,208 @@
+# Key Lookup / RID Lookup 消除建议
+# 读取每个查找操作符 OutputList 中的列（以及查找时还要判断的剩余谓词列），找到为它提供行定位的
+# 索引查找/扫描，按预估执行次数排序，生成能消除查找的 CREATE INDEX ... INCLUDE (...) 语句；
+# 有数据库连接时按现有索引定义生成加宽索引的语句，并用 sys.columns 的列宽估算索引增加的大小。
+import xml.etree.ElementTree as ET
+
+from indexes_audit import get_index_columns, get_table_columns
+from plan_model import _to_float, lookup_kind, unquote_identifier
+from plan_visitor import walk_plan
+
+# 键查找的 PhysicalOp 是 Clustered Index Seek，需要再用 lookup_kind 检查 IndexScan 的 Lookup 属性
+_LOOKUP_OPS = ('Clustered Index Seek', 'RID Lookup')
+_ACCESS_OPS = ('Index Seek', 'Index Scan', 'Clustered Index Seek', 'Clustered Index Scan')
+# 行头、NULL 位图等每行固定开销（字节），估算索引大小时使用
+_ROW_OVERHEAD_BYTES = 9
+_PAGE_BYTES = 8096
+
+
+def _object_of(relop):
+    access = relop.find('IndexScan')
+    if access is None:
+        access = relop.find('TableScan')
+    return access.find('Object') if access is not None else None
+
+
+def _columns(references, table):
+    columns = []
+    for reference in references:
+        if reference.get('Table') == table and reference.get('Column') not in columns:
+            columns.append(reference.get('Column'))
+    return columns
+
+
+def _feeding_access(facts, lookup, table):
+    """沿嵌套循环的外侧输入向下，找到同一张表上为查找提供行定位的索引查找/扫描。"""
+    model = facts.model
+    join = model.parent(lookup)
+    if join is None:
+        return None
+    for child in model.children(join):
+        if child is lookup:
+            continue
+        node = child
+        while node is not None:
+            if node.physical_op in _ACCESS_OPS and lookup_kind(node.element) is None:
+                scan_object = _object_of(node.element)
+                if scan_object is not None and scan_object.get('Table') == table:
+                    return node
+            node = model.children(node)[0] if node.children else None
+    return None
+
+
+def find_lookups(facts):
+    """
+    找出执行计划中的 Key Lookup 和 RID Lookup，按预估执行次数从多到少排序。
+
+    返回字典列表：node、kind（'Key Lookup' 或 'RID Lookup'）、schema、table（不带方括号）、columns（需要覆盖的列）、
+    access（提供行定位的 PlanNode）、access_index、seek_columns、executions、actual_executions、table_rows。
+    """
+    lookups = []
+    for physical_op in _LOOKUP_OPS:
+        for relop in facts.ops(physical_op):
+            kind = lookup_kind(relop)
+            if kind is None:
+                continue
+            lookup = facts.node(relop)
+            scan_object = _object_of(relop)
+            if scan_object is None:
+                continue
+            table = scan_object.get('Table')
+            columns = _columns(relop.findall('OutputList/ColumnReference'), table)
+            # 查找时才判断的谓词列也必须进入索引
+            for predicate in relop.findall('./*/Predicate'):
+                for column in _columns(predicate.iter('ColumnReference'), table):
+                    if column not in columns:
+                        columns.append(column)
+
+            access = _feeding_access(facts, lookup, table)
+            access_object = _object_of(access.element) if access is not None else None
+            seek_columns = []
+            if access is not None:
+                seek_columns = _columns(access.element.findall('./*/SeekPredicates//RangeColumns/ColumnReference'), table)
+
+            executions = _to_float(relop.get('EstimateExecutions'), lookup.estimate_rebinds + lookup.estimate_rewinds + 1)
+            lookups.append({
+                'node': lookup,
+                'kind': kind,
+                'schema': unquote_identifier(scan_object.get('Schema')) or 'dbo',
+                'table': unquote_identifier(table),
+                'columns': columns,
+                'access': access,
+                'access_index': unquote_identifier(access_object.get('Index')) if access_object is not None else None,
+                'seek_columns': seek_columns,
+                'executions': executions,
+                'actual_executions': lookup.actual_executions,
+                'table_rows': _to_float(relop.get('TableCardinality'), None),
+            })
+    lookups.sort(key=lambda lookup: lookup['actual_executions'] or lookup['executions'], reverse=True)
+    return lookups
+
+
+def _quoted(columns):
+    return ', '.join(f"[{column}]" for column in columns)
+
+
+def create_index_statement(lookup):
+    """只根据执行计划生成消除查找的新索引：键列为提供行定位的查找列，其余列放入 INCLUDE。"""
+    keys = lookup['seek_columns']
+    includes = [column for column in lookup['columns'] if column not in keys]
+    if not keys:
+        return None
+    name = f"IX_{lookup['table']}_{'_'.join(keys)}"
+    return (f"CREATE NONCLUSTERED INDEX [{name}] ON [{lookup['schema']}].[{lookup['table']}] ({_quoted(keys)})"
+            + (f" INCLUDE ({_quoted(includes)})" if includes else '') + ";")
+
+
+def key_lookup_issues(facts):
+    """只根据执行计划报告查找操作符、需要覆盖的列和建议的索引（规则 113、164），返回问题列表。"""
+    issues = []
+    for lookup in find_lookups(facts):
+        node = lookup['node']
+        executions = lookup['actual_executions'] or lookup['executions']
+        kind = '实际' if lookup['actual_executions'] else '预估'
+        source = f"，行定位来自索引 {lookup['access_index']}" if lookup['access_index'] else ''
+        message = (f"警告: 节点 {node.node_id} {lookup['kind']} 在表 {lookup['table']} 上{kind}执行 {executions:g} 次{source}，"
+                   f"需要取回列 {', '.join(lookup['columns']) or '无'}。")
+        if lookup['kind'] == 'RID Lookup':
+            message += "表是堆，考虑建立聚集索引。"
+        statement = create_index_statement(lookup)
+        if statement:
+            message += f"考虑创建覆盖索引: {statement}"
+        issues.append(message)
+    return issues
+
+
+def _column_bytes(column):
+    """列在索引叶级行中占用的最大字节数；(max) 类型返回 None。"""
+    if column['max_length'] == -1:
+        return None
+    return column['max_length']
+
+
+def widening_advice(lookup, index_columns, table_columns):
+    """
+    结合现有索引定义，返回 (加宽索引的语句, 增加的字节数/行, 估算增加的大小 KB)。
+
+    提供行定位的索引存在时，用 DROP_EXISTING 把缺少的列加入其 INCLUDE；否则生成新索引。
+    聚集索引的键列已经包含在每个非聚集索引中，不再重复加入。
+    """
+    indexes = index_columns.get(lookup['table'], {})
+    columns = table_columns.get(lookup['table'], {})
+    clustered_keys = [column for index in indexes.values() if index['type'] == 'CLUSTERED'
+                      for column in index['key_columns']]
+    existing = indexes.get(lookup['access_index'])
+    if existing is not None and existing['type'] == 'NONCLUSTERED':
+        keys = existing['key_columns']
+        present = keys + existing['included_columns'] + clustered_keys
+        missing = [column for column in lookup['columns'] if column not in present]
+        includes = existing['included_columns'] + missing
+        unique = 'UNIQUE ' if existing['is_unique'] else ''
+        statement = (f"CREATE {unique}NONCLUSTERED INDEX [{lookup['access_index']}] "
+                     f"ON [{lookup['schema']}].[{lookup['table']}] ({_quoted(keys)})"
+                     + (f" INCLUDE ({_quoted(includes)})" if includes else '') + " WITH (DROP_EXISTING = ON);")
+        added = missing
+    else:
+        statement = create_index_statement(lookup)
+        added = lookup['seek_columns'] + [column for column in lookup['columns']
+                                          if column not in lookup['seek_columns']] + clustered_keys
+        added = list(dict.fromkeys(added))
+
+    widths = [_column_bytes(columns[column]) if column in columns else None for column in added]
+    if existing is None or existing['type'] != 'NONCLUSTERED':
+        widths.append(_ROW_OVERHEAD_BYTES)
+    if not added or None in widths or lookup['table_rows'] is None:
+        return statement, None, None
+    row_bytes = sum(widths)
+    pages = lookup['table_rows'] * row_bytes / _PAGE_BYTES
+    return statement, row_bytes, pages * 8
+
+
+def audit_key_lookups(plan_xml, conn, verbose=True):
+    """用数据库中的索引和列定义生成消除 Key/RID Lookup 的索引语句并估算大小，返回问题列表。"""
+    try:
+        root = ET.fromstring(plan_xml)
+    except Exception as e:
+        print(f"解析执行计划时出错: {e}")
+        return
+    lookups = find_lookups(walk_plan(root))
+    if not lookups:
+        return []
+    tables = sorted({lookup['table'] for lookup in lookups})
+    index_columns = get_index_columns(conn, tables)
+    table_columns = get_table_columns(conn, tables)
+
+    issues = []
+    for lookup in lookups:
+        statement, row_bytes, size_kb = widening_advice(lookup, index_columns, table_columns)
+        if statement is None:
+            continue
+        executions = lookup['actual_executions'] or lookup['executions']
+        size = (f"每行增加约 {row_bytes} 字节，索引约增加 {size_kb / 1024:.1f} MB"
+                if size_kb is not None else "包含 (max) 列或缺少行数，无法估算大小")
+        issues.append(f"提示: 消除节点 {lookup['node'].node_id} {lookup['kind']}"
+                      f"（执行 {executions:g} 次，{size}）: {statement}")
+    if verbose:
+        for issue in issues:
+            print(issue)
+    return issues
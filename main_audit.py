@@ -1,8 +1,20 @@
-from sql_query_audit import audit_query, extract_tables_from_sql
-from execution_plan_audit import audit_execution_plan
+from sql_query_audit import audit_query, audit_sql_file, extract_tables_from_sql
+from execution_plan_audit import (audit_execution_plan_by_statement, audit_execution_plan_file, get_actual_execution_plan,
+                                  get_execution_plan)
+from parameter_sniffing_audit import audit_parameter_sniffing
+from compile_cost_audit import audit_compile_costs
+from plan_archive import PlanArchive
+from plan_cache import PlanAuditCache
+from plan_cost_attribution import report_cost_attribution
+from plan_operator_store import PlanOperatorStore
+from predicate_audit import audit_predicates
+from workload_audit import audit_cached_plans
+from implicit_conversion_audit import audit_implicit_conversions
 from indexes_audit import audit_indexes
+from key_lookup_advisor import audit_key_lookups
+from parallelism_audit import audit_parallelism
 from table_structure_audit import audit_table_structure
-import pyodbc
+from workload_fingerprint import audit_workload_file
 import platform
 
 def print_python_version():
@@ -11,6 +23,9 @@ def print_python_version():
 
 # 定义连接到SQL Server的函数
 def connect_to_sql_server(server, database, user, password):
+    # 只在需要连接时导入 pyodbc，只审核文件时不需要安装 ODBC 驱动
+    import pyodbc
+
     # 构建连接字符串
     connection_string = f"DRIVER={{ODBC Driver 17 for SQL Server}};SERVER={server};DATABASE={database};UID={user};PWD={password}"
     # 使用连接字符串建立连接
@@ -18,21 +33,12 @@ def connect_to_sql_server(server, database, user, password):
     # 返回连接对象
     return conn
 
-def get_execution_plan_for_query(query, conn):
-    with conn.cursor() as cursor:
-        # 设置并执行查询以获取执行计划
-        cursor.execute('SET SHOWPLAN_XML ON')
-        cursor.execute(query)
-
-        # 遍历查询结果
-        for row in cursor:
-            xml_execution_plan = row[0]
-            # 保存执行计划为XML文件
-            with open("execution_plan.xml", "w") as f:
-                f.write(xml_execution_plan)
-
-        # 关闭SHOWPLAN_XML模式
-        cursor.execute('SET SHOWPLAN_XML OFF')
+def get_execution_plan_for_query(query, conn, actual=False):
+    """获取查询的执行计划，直接返回 XML 字符串，不写入文件。"""
+    if actual:
+        # 实际执行计划：在回滚的事务中真正执行查询，计划中带有每个操作符的运行时计数器
+        return get_actual_execution_plan(conn, query)
+    return get_execution_plan(conn, query)
 
 def print_database_version_and_os(conn):
     with conn.cursor() as cursor:
@@ -49,13 +55,55 @@ if __name__ == "__main__":
     database = "AuditDemoDB"
     user = "AuditDemoUser"
     password = "c2xYO16edKwep"
+    # 为 True 时真正执行查询（事务结束后回滚）并审计实际执行计划，否则只审计预估执行计划
+    capture_actual_plan = False
+    # 不为 None 时把执行计划压缩保存到该目录（按内容寻址，相同计划只保存一份）
+    plan_archive_dir = None
+    # 大于 0 时改为批量审计计划缓存中资源消耗最高的 N 个执行计划，而不是从输入读取单条查询
+    bulk_audit_top_n = 0
+    # 批量审计时不为 None 则把全部操作符保存为列式存储文件，供之后离线分析
+    operator_store_path = None
+    # 不为 None 时把操作符成本的折叠栈写入该文件，可用 flamegraph.pl 等工具生成火焰图
+    collapsed_stack_path = None
+    # 不为 None 时审核该 SQL 脚本文件中的每条语句（按 ';' 和 GO 切分），而不是从输入读取单条查询
+    sql_script_path = None
+    # 不为 None 时审核该执行计划文件（.sqlplan），文件通过 mmap 读取
+    plan_file_path = None
+    # 不为 None 时把该 SQL 脚本文件作为捕获的负载，按语句指纹去重后审核，每个指纹只审核一次并报告出现次数
+    workload_script_path = None
+    # 不为 None 时把执行计划的审计结果缓存到该 SQLite 文件，之后再次审计相同的计划（相同语句）时直接复用
+    plan_audit_cache_path = None
+
+    #打印解释器信息
+    print_python_version()
+    plan_audit_cache = PlanAuditCache(db_path=plan_audit_cache_path) if plan_audit_cache_path is not None else None
+
+    # 只审核文件时不连接数据库（批量审计计划缓存优先）
+    if bulk_audit_top_n <= 0 and (sql_script_path is not None or plan_file_path is not None
+                                  or workload_script_path is not None):
+        if sql_script_path is not None:
+            audit_sql_file(sql_script_path)
+        if workload_script_path is not None:
+            audit_workload_file(workload_script_path)
+        if plan_file_path is not None:
+            audit_execution_plan_file(plan_file_path)
+        raise SystemExit
 
     # 使用连接信息连接到数据库
     conn = connect_to_sql_server(server, database, user, password)
     # 打印数据库版本和操作系统信息
     print_database_version_and_os(conn)
-    #打印解释器信息
-    print_python_version()
+
+    if bulk_audit_top_n > 0:
+        operator_store = PlanOperatorStore() if operator_store_path is not None else None
+        audit_cached_plans(conn, top_n=bulk_audit_top_n, operator_store=operator_store, cache=plan_audit_cache)
+        # 按 编译 CPU × 编译次数 排出编译开销最大的语句
+        audit_compile_costs(conn, top_n=bulk_audit_top_n)
+        if operator_store is not None:
+            operator_store.save(operator_store_path)
+            print(f"操作符列式存储已保存为 '{operator_store_path}'（{len(operator_store)} 个操作符）")
+        conn.close()
+        raise SystemExit
 
     # 获取用户输入的SQL查询
     user_query = ""
@@ -78,14 +126,26 @@ if __name__ == "__main__":
     # 审核SQL查询
     audit_query(user_query)
 
-    # 获取并保存查询的执行计划
-    get_execution_plan_for_query(user_query, conn)
-    print("XML执行计划已保存为 'execution_plan.xml'")
-
-    # 从文件中读取并审核执行计划
-    with open("execution_plan.xml", "r") as f:
-        plan = f.read()
-    audit_execution_plan(plan)
+    # 获取查询的执行计划，计划在内存中直接交给审计，不经过临时文件
+    plan_xml = get_execution_plan_for_query(user_query, conn, actual=capture_actual_plan)
+    if plan_xml is not None:
+        if plan_archive_dir is not None:
+            plan_key = PlanArchive(plan_archive_dir).store(plan_xml)
+            print(f"执行计划已归档：{plan_key}")
+        # 逐条语句审核执行计划，问题按语句分组并按预估成本排序
+        audit_execution_plan_by_statement(plan_xml, cache=plan_audit_cache)
+        # 成本归因：自身成本最高的操作符和关键成本路径
+        report_cost_attribution(plan_xml, collapsed_path=collapsed_stack_path)
+        # 参数嗅探：编译值、运行值与直方图倾斜
+        audit_parameter_sniffing(plan_xml, conn)
+        # 隐式转换：结合列定义和索引定义说明无法使用的索引
+        audit_implicit_conversions(plan_xml, conn)
+        # 剩余谓词：结合索引键列顺序给出可以变为查找谓词的列
+        audit_predicates(plan_xml, conn)
+        # Key Lookup：生成加宽索引的语句并估算索引增加的大小
+        audit_key_lookups(plan_xml, conn)
+        # 并行度：与服务器的 max degree of parallelism、cost threshold for parallelism 比较
+        audit_parallelism(plan_xml, conn)
 
     # 审核数据库索引
     audit_indexes(conn, tables_in_query)
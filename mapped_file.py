@@ -0,0 +1,145 @@
+# 内存映射读取大文件
+# 执行计划文件和 SQL 脚本可能有几 GB，整体 read() 会在解析前就占用一份完整的副本。
+# 这里用只读 mmap 映射文件，分块直接交给 XML 解析器，或者包装为文本流逐行交给 T-SQL 语句切分器，
+# 文件内容由操作系统按页换入，不会复制出整个文件。
+import io
+import mmap
+import os
+import re
+import xml.etree.ElementTree as ET
+from contextlib import contextmanager
+
+# 每次交给 XML 解析器的字节数
+FEED_CHUNK_BYTES = 1 << 20
+
+# 单独一行的批处理分隔符 GO（可以带重复次数和行尾注释）
+_GO_PATTERN = re.compile(r'^\s*GO(?:\s+\d+)?\s*(?:--.*)?$', re.IGNORECASE)
+# 切分语句时需要关注的记号：注释、字符串和方括号标识符的边界以及语句结束符
+_SPLIT_TOKENS = re.compile(r"--|/\*|\*/|'|\"|\[|\]|;")
+_UTF16_BOMS = (b'\xff\xfe', b'\xfe\xff')
+
+
+@contextmanager
+def map_file(path):
+    """
+    只读映射文件，返回支持缓冲区协议的对象（mmap）。
+
+    空文件无法映射，返回空字节串。退出时关闭映射，调用方不要在 with 之外保留对它的引用。
+    """
+    with open(path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            yield b''
+            return
+        mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            yield mapped
+        finally:
+            mapped.close()
+
+
+class MappedReader(io.RawIOBase):
+    """把映射的缓冲区包装为只读的二进制文件对象，read 时只复制请求的部分。"""
+
+    def __init__(self, buffer):
+        super().__init__()
+        self._view = memoryview(buffer)
+        self._position = 0
+
+    def readable(self):
+        return True
+
+    def readinto(self, target):
+        size = min(len(target), len(self._view) - self._position)
+        target[:size] = self._view[self._position:self._position + size]
+        self._position += size
+        return size
+
+    def close(self):
+        # 释放 memoryview，之后才能关闭底层的 mmap
+        if not self.closed:
+            self._view.release()
+        super().close()
+
+
+def showplan_parser(head):
+    """
+    根据执行计划开头的字节创建 XML 解析器。
+
+    有 UTF-16 BOM 时按 UTF-16 解析，否则按 UTF-8 解析：从 DMV 取出后另存为 UTF-8 的计划仍保留
+    encoding="utf-16" 的声明，不能按声明解码。
+    """
+    return ET.XMLParser(encoding=None if bytes(head[:2]) in _UTF16_BOMS else 'utf-8')
+
+
+def parse_xml_buffer(buffer):
+    """分块解析缓冲区中的执行计划 XML，返回根元素。编码的处理见 showplan_parser。"""
+    with memoryview(buffer) as view:
+        parser = showplan_parser(view[:2])
+        for start in range(0, len(view), FEED_CHUNK_BYTES):
+            with view[start:start + FEED_CHUNK_BYTES] as chunk:
+                parser.feed(chunk)
+    return parser.close()
+
+
+def parse_xml_file(path):
+    """映射并解析执行计划文件，返回根元素。"""
+    with map_file(path) as mapped:
+        return parse_xml_buffer(mapped)
+
+
+def split_sql_statements(lines):
+    """
+    把 T-SQL 文本行切分为语句，按 ';' 和单独一行的 GO 切分。
+
+    字符串、带引号或方括号的标识符以及注释中的 ';' 不会切分语句。lines 为可迭代的文本行，逐条返回语句文本。
+    """
+    statement = []
+    quote = None
+    comment_depth = 0
+    for line in lines:
+        if quote is None and comment_depth == 0 and _GO_PATTERN.match(line):
+            text = ''.join(statement).strip()
+            if text:
+                yield text
+            statement = []
+            continue
+
+        start = 0
+        for match in _SPLIT_TOKENS.finditer(line):
+            token = match.group()
+            if comment_depth:
+                if token == '/*':
+                    comment_depth += 1
+                elif token == '*/':
+                    comment_depth -= 1
+            elif quote is not None:
+                # 'it''s' 中的 '' 会先结束再开始字符串，不需要单独处理
+                if token == quote:
+                    quote = None
+            elif token == '--':
+                break
+            elif token == '/*':
+                comment_depth = 1
+            elif token in ("'", '"'):
+                quote = token
+            elif token == '[':
+                quote = ']'
+            elif token == ';':
+                statement.append(line[start:match.start()])
+                text = ''.join(statement).strip()
+                if text:
+                    yield text
+                statement = []
+                start = match.end()
+        statement.append(line[start:])
+
+    text = ''.join(statement).strip()
+    if text:
+        yield text
+
+
+def iter_sql_file(path, encoding='utf-8-sig'):
+    """映射 SQL 脚本文件，逐条返回其中的语句。SSMS 导出的 UTF-16 脚本使用 encoding='utf-16'。"""
+    with map_file(path) as mapped:
+        with io.TextIOWrapper(io.BufferedReader(MappedReader(mapped)), encoding=encoding, newline='') as text:
+            yield from split_sql_statements(text)
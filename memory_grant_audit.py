@@ -0,0 +1,113 @@
+# 内存授予分析
+# 读取 QueryPlan 下的 MemoryGrantInfo（单位 KB）和 RelOp 的 MemoryFractions、溢出警告
+# （SpillToTempDb、SortSpillDetails、HashSpillDetails），判断内存授予过大或不足，
+# 并指出消耗内存授予或溢出到 tempdb 的排序、哈希等操作符。
+from plan_model import _to_float
+
+# 授予至少这么多内存（KB）且实际只用了不到 EXCESSIVE_GRANT_USED_RATIO 时视为授予过大
+EXCESSIVE_GRANT_MIN_KB = 5 * 1024
+EXCESSIVE_GRANT_USED_RATIO = 0.1
+# 实际使用达到授予量的该比例时视为授予不足
+INSUFFICIENT_GRANT_USED_RATIO = 0.95
+# 请求的内存超过该值（KB）时提示可能造成内存压力
+LARGE_GRANT_KB = 1024 * 1024
+
+_GRANT_ATTRIBUTES = ('SerialRequiredMemory', 'SerialDesiredMemory', 'RequiredMemory', 'DesiredMemory',
+                     'RequestedMemory', 'GrantWaitTime', 'GrantedMemory', 'MaxUsedMemory', 'MaxQueryMemory')
+_SPILL_TAGS = ('SpillToTempDb', 'SortSpillDetails', 'HashSpillDetails', 'ExchangeSpillDetails')
+
+
+def memory_grant_info(query_plan):
+    """返回 QueryPlan 的 MemoryGrantInfo 属性字典（KB/秒），没有内存授予时返回 None。"""
+    grant = query_plan.find('MemoryGrantInfo')
+    if grant is None:
+        return None
+    # 估算执行计划中没有 GrantedMemory/MaxUsedMemory，保持为 None 以区分 0
+    return {name: _to_float(grant.get(name), None) for name in _GRANT_ATTRIBUTES}
+
+
+def _node_label(node):
+    return f"节点 {node.node_id} {node.physical_op}"
+
+
+def memory_consumers(facts, query_plan):
+    """返回 QueryPlan 中使用内存授予的操作符：[(PlanNode, 输入阶段的内存比例), ...]。"""
+    consumers = []
+    for relop in query_plan.iter('RelOp'):
+        fractions = relop.find('MemoryFractions')
+        if fractions is not None:
+            consumers.append((facts.node(relop), _to_float(fractions.get('Input'))))
+    return consumers
+
+
+def spilling_operators(facts, query_plan):
+    """返回 QueryPlan 中溢出到 tempdb 的操作符：[(PlanNode, 溢出描述), ...]。"""
+    spills = []
+    for relop in query_plan.iter('RelOp'):
+        warnings = relop.find('Warnings')
+        if warnings is None:
+            continue
+        details = []
+        for warning in warnings:
+            if warning.tag == 'SpillToTempDb':
+                details.append(f"SpillLevel {warning.get('SpillLevel', '?')}，"
+                               f"{warning.get('SpilledThreadCount', '?')} 个线程")
+            elif warning.tag in _SPILL_TAGS:
+                details.append(f"{warning.tag} 写入 tempdb {warning.get('WritesToTempDb', '?')} 页，"
+                               f"读取 {warning.get('ReadsFromTempDb', '?')} 页")
+        if details:
+            spills.append((facts.node(relop), '；'.join(details)))
+    return spills
+
+
+def memory_grant_issues(facts):
+    """
+    分析执行计划中每个 QueryPlan 的内存授予，返回问题列表。
+
+    facts 为 plan_visitor.walk_plan 的返回值（元素标签已去掉命名空间）。
+    """
+    issues = []
+    for query_plan in facts.nodes('QueryPlan'):
+        info = memory_grant_info(query_plan)
+        consumers = memory_consumers(facts, query_plan)
+        spills = spilling_operators(facts, query_plan)
+        consumer_text = '、'.join(f"{_node_label(node)}（输入阶段内存比例 {fraction:g}）"
+                                  for node, fraction in consumers)
+
+        for node, detail in spills:
+            issues.append(f"警告: {_node_label(node)} 溢出到 tempdb（{detail}），可能影响性能。")
+
+        if info is None:
+            continue
+        granted = info['GrantedMemory']
+        used = info['MaxUsedMemory']
+        requested = info['RequestedMemory'] or 0.0
+
+        if granted is not None and used is not None:
+            if granted >= EXCESSIVE_GRANT_MIN_KB and used < granted * EXCESSIVE_GRANT_USED_RATIO:
+                issues.append(f"警告: 内存授予过大：授予 {granted:g} KB，实际最多使用 {used:g} KB，"
+                              f"会降低并发查询可用的内存。消耗内存授予的操作符：{consumer_text or '无'}。"
+                              f"考虑更新统计信息或修正基数估算。")
+            elif spills or (granted > 0 and used >= granted * INSUFFICIENT_GRANT_USED_RATIO):
+                spill_text = '、'.join(_node_label(node) for node, _ in spills)
+                issues.append(f"警告: 内存授予不足：授予 {granted:g} KB，实际使用 {used:g} KB"
+                              + (f"，{spill_text} 溢出到 tempdb" if spill_text else '')
+                              + "。考虑更新统计信息或修正低估的行数。")
+
+        if (info['GrantWaitTime'] or 0) > 0:
+            issues.append(f"警告: 查询等待内存授予 {info['GrantWaitTime']:g} 秒，服务器可能存在内存压力。")
+
+        if requested > LARGE_GRANT_KB:
+            issues.append(f"警告: 查询请求了 {requested:g} KB 内存，可能导致内存压力。"
+                          f"消耗内存授予的操作符：{consumer_text or '无'}。")
+
+        desired = info['DesiredMemory'] or 0.0
+        if requested and desired > requested:
+            issues.append(f"提示: 查询期望 {desired:g} KB 内存，但只能请求 {requested:g} KB，"
+                          f"排序或哈希操作可能溢出到 tempdb。")
+
+    for warning in facts.nodes('MemoryGrantWarning'):
+        issues.append(f"警告: 执行计划中的内存授予警告：{warning.get('GrantWarningKind', '')}，"
+                      f"请求 {warning.get('RequestedMemory', '?')} KB，授予 {warning.get('GrantedMemory', '?')} KB，"
+                      f"最多使用 {warning.get('MaxUsedMemory', '?')} KB。")
+    return issues
@@ -0,0 +1,167 @@
+# 离线批量审计 .sqlplan 文件
+# 不连接数据库，遍历目录树或 tar 包中的执行计划文件（SSMS 保存的 .sqlplan、Query Store 导出的 .xml、
+# PlanArchive 归档的 .sqlplan.gz），在进程池中逐个审计，每个计划输出一行 JSON 记录，最后报告吞吐量。
+# 磁盘上的未压缩文件只把路径交给工作进程，由工作进程通过 mmap 直接解析。
+#
+# 用法: python offline_plan_audit.py <目录或 tar 包> [-o results.jsonl] [-j 进程数]
+import argparse
+import gzip
+import hashlib
+import json
+import os
+import sys
+import tarfile
+import time
+import xml.etree.ElementTree as ET
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from execution_plan_audit import _audit_plan_root
+from mapped_file import map_file, parse_xml_buffer, parse_xml_file
+from plan_cache import plan_tree_key
+from plan_model import _to_float
+from plan_visitor import walk_plan
+
+PLAN_SUFFIXES = ('.sqlplan', '.xml', '.sqlplan.gz', '.xml.gz')
+# 每个工作进程最多同时排队的计划数，限制同时驻留在内存中的计划文本
+IN_FLIGHT_PER_WORKER = 4
+
+
+def _is_plan_file(name):
+    return name.lower().endswith(PLAN_SUFFIXES)
+
+
+def iter_plan_files(source):
+    """
+    逐个返回 source 中的执行计划：(名称, 文件内容的字节串)，磁盘上的文件内容为 None，由审计时按路径映射读取。
+
+    source 为目录时递归遍历其中的计划文件；为 tar 包（可以是 .tar.gz 等压缩格式）时按顺序流式读取，
+    不会把整个 tar 包解压到磁盘；为单个文件时只返回该文件。
+    """
+    if os.path.isdir(source):
+        for directory, subdirectories, files in os.walk(source):
+            subdirectories.sort()
+            for name in sorted(files):
+                if _is_plan_file(name):
+                    yield os.path.join(directory, name), None
+    elif tarfile.is_tarfile(source):
+        with tarfile.open(source, 'r|*') as archive:
+            for member in archive:
+                if member.isfile() and _is_plan_file(member.name):
+                    yield f"{source}:{member.name}", archive.extractfile(member).read()
+    else:
+        yield source, None
+
+
+def _parse_plan(name, data):
+    """返回 (根元素, 文件字节数, 文件内容的 SHA-256)。"""
+    if data is None:
+        if name.lower().endswith('.gz'):
+            with open(name, 'rb') as f:
+                data = f.read()
+        else:
+            with map_file(name) as mapped:
+                size, digest = len(mapped), hashlib.sha256(mapped).hexdigest()
+            return parse_xml_file(name), size, digest
+    size, digest = len(data), hashlib.sha256(data).hexdigest()
+    if name.lower().endswith('.gz'):
+        data = gzip.decompress(data)
+    return parse_xml_buffer(data), size, digest
+
+
+def audit_plan_file(name, data=None):
+    """
+    审计一个执行计划文件，返回可以写为 JSON 的记录。data 为 None 时按路径 name 读取文件。
+
+    在工作进程中执行：只收集问题不打印，解析失败时记录错误而不是抛出异常。
+    """
+    started = time.perf_counter()
+    record = {'source': name}
+    try:
+        root, record['bytes'], digest = _parse_plan(name, data)
+    except (ET.ParseError, OSError, EOFError) as e:
+        record['bytes'] = len(data) if data is not None else os.path.getsize(name) if os.path.isfile(name) else 0
+        record['error'] = f"解析执行计划时出错: {e}"
+        record['elapsed_ms'] = round((time.perf_counter() - started) * 1000, 3)
+        return record
+
+    facts = walk_plan(root)
+    statements = facts.nodes('StmtSimple')
+    # 没有 QueryPlanHash 的计划以文件内容的摘要区分
+    record['plan_key'] = plan_tree_key(root) or 'file:' + digest
+    record['statements'] = len(statements)
+    record['subtree_cost'] = sum(_to_float(statement.get('StatementSubTreeCost')) for statement in statements)
+    record['issues'] = _audit_plan_root(root, verbose=False, facts=facts)
+    record['elapsed_ms'] = round((time.perf_counter() - started) * 1000, 3)
+    return record
+
+
+def _audit_item(item):
+    return audit_plan_file(*item)
+
+
+def audit_plan_files(source, output, workers=None):
+    """
+    审计 source 中的全部执行计划，每个计划向 output（以文本方式打开的文件对象）写入一行 JSON。
+
+    计划在 workers 个进程中审计（默认为 CPU 核数），结果按读取顺序写出。
+    返回统计信息字典：plans、errors、issues、bytes、seconds。
+    """
+    workers = workers or os.cpu_count() or 1
+    stats = {'plans': 0, 'errors': 0, 'issues': 0, 'bytes': 0}
+    started = time.perf_counter()
+
+    def write(record):
+        output.write(json.dumps(record, ensure_ascii=False) + '\n')
+        stats['plans'] += 1
+        stats['bytes'] += record['bytes']
+        stats['errors'] += 'error' in record
+        stats['issues'] += len(record.get('issues', ()))
+
+    if workers == 1:
+        for item in iter_plan_files(source):
+            write(audit_plan_file(*item))
+    else:
+        # 只提交有限数量的计划，读取速度不会让还没审计的计划文本堆积在内存中
+        pending = deque()
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            for item in iter_plan_files(source):
+                pending.append(executor.submit(_audit_item, item))
+                if len(pending) >= workers * IN_FLIGHT_PER_WORKER:
+                    write(pending.popleft().result())
+            while pending:
+                write(pending.popleft().result())
+
+    stats['seconds'] = time.perf_counter() - started
+    return stats
+
+
+def print_throughput(stats, file=None):
+    file = file or sys.stdout
+    seconds = max(stats['seconds'], 1e-9)
+    print(f"审计了 {stats['plans']} 个执行计划（{stats['errors']} 个解析失败），发现 {stats['issues']} 个问题，"
+          f"用时 {stats['seconds']:.2f} 秒：{stats['plans'] / seconds:.1f} 个计划/秒，"
+          f"{stats['bytes'] / 1048576 / seconds:.2f} MB/秒。", file=file)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="离线批量审计 .sqlplan 执行计划文件（不连接数据库）")
+    parser.add_argument('source', help="执行计划所在的目录、tar 包或单个文件")
+    parser.add_argument('-o', '--output', default='-', help="JSON Lines 结果文件，默认为标准输出")
+    parser.add_argument('-j', '--workers', type=int, default=None, help="审计进程数，默认为 CPU 核数")
+    args = parser.parse_args(argv)
+
+    if args.output == '-':
+        stats = audit_plan_files(args.source, sys.stdout, args.workers)
+        # 标准输出只写 JSON 记录，统计信息写到标准错误
+        print_throughput(stats, file=sys.stderr)
+    else:
+        with open(args.output, 'w', encoding='utf-8') as output:
+            stats = audit_plan_files(args.source, output, args.workers)
+        print(f"审计结果已保存为 '{args.output}'")
+        print_throughput(stats)
+    return stats
+
+
+if __name__ == "__main__":
+    main()
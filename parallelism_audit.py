@@ -0,0 +1,184 @@
+# 并行度分析
+# 用实际执行计划中每个线程的运行时计数器衡量各线程之间的行数倾斜，统计交换操作符
+# （Gather/Repartition/Distribute Streams）本身消耗的时间和成本，并把计划的并行度与服务器的
+# max degree of parallelism、cost threshold for parallelism 配置比较，找出并行反而降低吞吐量的查询。
+import xml.etree.ElementTree as ET
+
+from plan_model import _to_float
+from plan_visitor import walk_plan
+
+# 行数最多的线程至少处理这么多行、且是其余工作线程平均值的 SKEW_RATIO 倍以上时，视为线程倾斜
+SKEW_MIN_ROWS = 10000
+SKEW_RATIO = 4.0
+# 交换操作符本身的耗时或成本超过语句总量的该比例时报告
+EXCHANGE_SHARE = 0.2
+# 语句成本低于并行开销阈值的该倍数时，并行带来的调度和交换开销往往得不偿失
+LOW_COST_FACTOR = 2.0
+# OLTP 系统上建议的最低并行开销阈值
+RECOMMENDED_COST_THRESHOLD = 50
+
+PARALLELISM_SETTINGS_QUERY = """
+SELECT name, CAST(value_in_use AS INT) AS value_in_use
+FROM sys.configurations
+WHERE name IN ('max degree of parallelism', 'cost threshold for parallelism');
+"""
+
+
+def _statement_nodes(facts, statement):
+    return [node for node in (facts.node(relop) for relop in statement.iter('RelOp')) if node is not None]
+
+
+def thread_skew(node):
+    """返回 (最多行数的线程, 该线程的行数, 其余工作线程的平均行数)，不是多线程时返回 None。"""
+    # 线程 0 是协调线程，只统计工作线程
+    workers = {thread: rows for thread, rows in node.thread_rows.items() if thread > 0}
+    if len(workers) < 2:
+        return None
+    busiest = max(workers, key=workers.get)
+    others = sum(workers.values()) - workers[busiest]
+    return busiest, workers[busiest], others / (len(workers) - 1)
+
+
+def _statement_elapsed_ms(statement, nodes):
+    stats = statement.find('QueryPlan/QueryTimeStats')
+    if stats is not None and stats.get('ElapsedTime') is not None:
+        return _to_float(stats.get('ElapsedTime'))
+    roots = [node.actual_elapsed_ms for node in nodes if node.has_actuals and node.parent < 0]
+    return max(roots) if roots else 0.0
+
+
+def parallelism_issues(facts):
+    """
+    只根据执行计划分析并行执行（规则 4）：并行语句的并行度、线程行数倾斜和交换操作符的开销。
+
+    facts 为 plan_visitor.walk_plan 的返回值，返回问题列表。
+    """
+    issues = []
+    model = facts.model
+    for statement in facts.nodes('StmtSimple'):
+        nodes = _statement_nodes(facts, statement)
+        if not any(node.parallel for node in nodes):
+            continue
+        query_plan = statement.find('QueryPlan')
+        dop = query_plan.get('DegreeOfParallelism', '?') if query_plan is not None else '?'
+        statement_cost = _to_float(statement.get('StatementSubTreeCost'))
+        statement_id = statement.get('StatementId', '?')
+        issues.append(f"提示: 语句 {statement_id} 并行执行（并行度 {dop}，预估成本 {statement_cost:g}）。")
+
+        for node in nodes:
+            skew = thread_skew(node)
+            if skew is None:
+                continue
+            thread, rows, average = skew
+            if rows >= SKEW_MIN_ROWS and rows > average * SKEW_RATIO:
+                issues.append(f"警告: 语句 {statement_id} 节点 {node.node_id} {node.physical_op} 各线程行数倾斜："
+                              f"线程 {thread} 处理了 {rows:.0f} 行，其余工作线程平均 {average:.0f} 行，"
+                              f"其他线程空闲等待，并行没有带来收益。")
+
+        elapsed = _statement_elapsed_ms(statement, nodes)
+        for node in nodes:
+            if node.physical_op != 'Parallelism':
+                continue
+            children = model.children(node)
+            self_cost = max(node.subtree_cost - sum(child.subtree_cost for child in children), 0.0)
+            cost_share = self_cost / statement_cost if statement_cost > 0 else 0.0
+            time_text = ''
+            time_share = 0.0
+            if node.has_actuals and elapsed > 0:
+                child_elapsed = max((child.actual_elapsed_ms for child in children if child.has_actuals), default=0.0)
+                exchange_ms = max(node.actual_elapsed_ms - child_elapsed, 0.0)
+                time_share = exchange_ms / elapsed
+                time_text = f"，实际耗时约 {exchange_ms:.0f} 毫秒（占语句 {time_share:.0%}）"
+            if cost_share > EXCHANGE_SHARE or time_share > EXCHANGE_SHARE:
+                issues.append(f"警告: 语句 {statement_id} 交换操作符 节点 {node.node_id} {node.logical_op} "
+                              f"本身的预估成本占语句 {cost_share:.0%}{time_text}，线程之间交换数据的开销过大。")
+    return issues
+
+
+def thread_usage_issues(facts):
+    """比较并行计划使用的线程数与优化器可用的并行度（复合规则 15）。"""
+    issues = []
+    for query_plan in facts.nodes('QueryPlan'):
+        hardware = query_plan.find('OptimizerHardwareDependentProperties')
+        available = _to_float(hardware.get('EstimatedAvailableDegreeOfParallelism'), 0.0) \
+            if hardware is not None else 0.0
+        thread_stat = query_plan.find('ThreadStat')
+        if thread_stat is None or available <= 0:
+            continue
+        used = _to_float(thread_stat.get('UsedThreads'))
+        branches = _to_float(thread_stat.get('Branches'))
+        if used > available * 2:
+            issues.append(f"警告: 并行计划有 {branches:g} 个并行分支，使用了 {used:g} 个工作线程，"
+                          f"是可用并行度 {available:g} 的 {used / available:.1f} 倍，会占用其他查询的工作线程。")
+    return issues
+
+
+def get_parallelism_settings(conn):
+    """读取服务器的 max degree of parallelism、cost threshold for parallelism 和逻辑 CPU 数。"""
+    import pyodbc
+
+    cursor = conn.cursor()
+    try:
+        cursor.execute(PARALLELISM_SETTINGS_QUERY)
+        settings = {name: value for name, value in cursor.fetchall()}
+        cursor.execute("SELECT cpu_count FROM sys.dm_os_sys_info;")
+        settings['cpu_count'] = cursor.fetchone()[0]
+    except pyodbc.Error as e:
+        print(f"错误: {e}")
+        print("提示：读取服务器并行配置需要 VIEW SERVER STATE 权限。")
+        return None
+    finally:
+        cursor.close()
+    return settings
+
+
+def server_parallelism_issues(facts, settings):
+    """把并行语句的并行度和成本与服务器配置比较，返回问题列表。settings 为 get_parallelism_settings 的返回值。"""
+    issues = []
+    max_dop = settings.get('max degree of parallelism', 0)
+    threshold = settings.get('cost threshold for parallelism', 5)
+    cpu_count = settings.get('cpu_count', 0)
+    for statement in facts.nodes('StmtSimple'):
+        query_plan = statement.find('QueryPlan')
+        dop = int(_to_float(query_plan.get('DegreeOfParallelism'), 0)) if query_plan is not None else 0
+        if dop <= 1:
+            continue
+        statement_id = statement.get('StatementId', '?')
+        cost = _to_float(statement.get('StatementSubTreeCost'))
+        # 串行计划的成本超过阈值才会考虑并行，并行计划本身的成本可能低于阈值
+        if cost < threshold:
+            issues.append(f"警告: 语句 {statement_id} 并行计划的预估成本 {cost:g} 低于并行开销阈值 {threshold}，"
+                          f"只是串行计划刚刚超过阈值，却以并行度 {dop} 执行；这类查询串行执行通常更划算。")
+        elif cost < threshold * LOW_COST_FACTOR:
+            issues.append(f"警告: 语句 {statement_id} 预估成本 {cost:g} 只略高于并行开销阈值 {threshold}，"
+                          f"却以并行度 {dop} 执行；在繁忙的 OLTP 服务器上并行的线程开销可能超过收益。")
+        if max_dop > 0 and dop > max_dop:
+            issues.append(f"警告: 语句 {statement_id} 以并行度 {dop} 执行，超过服务器的 max degree of parallelism {max_dop}，"
+                          f"查询提示 OPTION (MAXDOP) 或数据库范围配置覆盖了服务器设置。")
+        elif max_dop == 0 and cpu_count and dop > max(cpu_count // 2, 8):
+            issues.append(f"警告: 语句 {statement_id} 以并行度 {dop} 执行，服务器没有限制 max degree of parallelism"
+                          f"（{cpu_count} 个逻辑 CPU），单个查询可以占用大部分 CPU。")
+    if issues and threshold < RECOMMENDED_COST_THRESHOLD:
+        issues.append(f"提示: cost threshold for parallelism 为 {threshold}，OLTP 服务器通常建议提高到 "
+                      f"{RECOMMENDED_COST_THRESHOLD} 左右，让低成本查询串行执行。")
+    return issues
+
+
+def audit_parallelism(plan_xml, conn, verbose=True):
+    """把执行计划的并行度与服务器的并行配置比较，返回问题列表。"""
+    try:
+        root = ET.fromstring(plan_xml)
+    except Exception as e:
+        print(f"解析执行计划时出错: {e}")
+        return
+    facts = walk_plan(root)
+    if not any(node.parallel for node in facts.model.nodes):
+        return []
+    settings = get_parallelism_settings(conn)
+    if settings is None:
+        return []
+    issues = server_parallelism_issues(facts, settings)
+    if verbose:
+        for issue in issues:
+            print(issue)
+    return issues
@@ -0,0 +1,207 @@
+# 参数嗅探检测
+# 执行计划的 ParameterList 中记录了编译时嗅探到的参数值（ParameterCompiledValue），
+# 实际执行计划还记录了运行时的值（ParameterRuntimeValue）。这里把两者与使用该参数的谓词、
+# 操作符的实际行数以及对应列的统计信息直方图倾斜程度结合起来，找出性能依赖于嗅探值的语句。
+import xml.etree.ElementTree as ET
+
+from plan_visitor import walk_plan
+
+# 实际行数与预估行数相差的倍数超过该值时，认为计划不适合当前的参数值
+ROWS_SKEW_RATIO = 10.0
+# 直方图中最常见值的行数超过每个值平均行数的该倍数时，认为列的数据分布倾斜
+HISTOGRAM_SKEW_RATIO = 10.0
+
+# 统计信息首列为指定列的直方图：最常见值的行数和每个值的平均行数
+HISTOGRAM_SKEW_QUERY = """
+SELECT TOP (1)
+    MAX(h.equal_rows) AS max_equal_rows,
+    SUM(h.equal_rows + h.range_rows) / NULLIF(SUM(h.distinct_range_rows) + COUNT(*), 0) AS avg_rows_per_value
+FROM sys.stats s
+JOIN sys.stats_columns sc ON sc.object_id = s.object_id AND sc.stats_id = s.stats_id AND sc.stats_column_id = 1
+CROSS APPLY sys.dm_db_stats_histogram(s.object_id, s.stats_id) h
+WHERE s.object_id = OBJECT_ID(?) AND COL_NAME(sc.object_id, sc.column_id) = ?
+GROUP BY s.stats_id
+ORDER BY max_equal_rows DESC;
+"""
+
+
+def statement_parameters(statement):
+    """返回语句的参数列表：[{'name', 'data_type', 'compiled', 'runtime'}, ...]。"""
+    parameters = []
+    for parameter_list in statement.iter('ParameterList'):
+        for reference in parameter_list.findall('ColumnReference'):
+            parameters.append({
+                'name': reference.get('Column', ''),
+                'data_type': reference.get('ParameterDataType', ''),
+                'compiled': reference.get('ParameterCompiledValue'),
+                'runtime': reference.get('ParameterRuntimeValue'),
+            })
+    return parameters
+
+
+def _column_name(reference):
+    table = reference.get('Table')
+    if not table:
+        return None
+    schema = reference.get('Schema')
+    return (f"{schema}.{table}" if schema else table), reference.get('Column', '')
+
+
+def _parameter_names(scalar):
+    return [reference.get('Column') for reference in scalar.iter('ColumnReference')
+            if reference.get('Column', '').startswith('@')]
+
+
+def parameter_predicates(statement):
+    """
+    找出语句中把参数与列比较的谓词。
+
+    返回 [(RelOp 元素, 参数名, (表, 列)), ...]，包括 Predicate/ProbeResidual 中的比较和 SeekKeys 中的查找键。
+    """
+    found = []
+    for relop in statement.iter('RelOp'):
+        predicates = (relop.findall('./*/Predicate') + relop.findall('./*/SeekPredicates')
+                      + relop.findall('./*/ProbeResidual'))
+        for predicate in predicates:
+            for compare in predicate.iter('Compare'):
+                sides = compare.findall('ScalarOperator')
+                if len(sides) != 2:
+                    continue
+                for column_side, parameter_side in ((sides[0], sides[1]), (sides[1], sides[0])):
+                    columns = [_column_name(r) for r in column_side.iter('ColumnReference')]
+                    columns = [column for column in columns if column is not None]
+                    for name in _parameter_names(parameter_side):
+                        for column in columns:
+                            found.append((relop, name, column))
+            for seek_range in predicate.iter():
+                if seek_range.tag not in ('Prefix', 'StartRange', 'EndRange'):
+                    continue
+                columns = seek_range.findall('RangeColumns/ColumnReference')
+                expressions = seek_range.findall('RangeExpressions/ScalarOperator')
+                for reference, expression in zip(columns, expressions):
+                    column = _column_name(reference)
+                    for name in _parameter_names(expression):
+                        if column is not None:
+                            found.append((relop, name, column))
+    return found
+
+
+def histogram_skew(conn, table, column):
+    """
+    返回列的直方图倾斜程度：最常见值的行数 / 每个值的平均行数。
+
+    需要 SQL Server 2016 SP1 CU2 及以上（sys.dm_db_stats_histogram）；没有统计信息或查询失败时返回 None。
+    """
+    import pyodbc
+
+    cursor = conn.cursor()
+    try:
+        cursor.execute(HISTOGRAM_SKEW_QUERY, table, column)
+        row = cursor.fetchone()
+    except pyodbc.Error as e:
+        print(f"错误: 读取 {table}.{column} 的统计信息直方图失败: {e}")
+        return None
+    finally:
+        cursor.close()
+    if row is None or not row[1]:
+        return None
+    return float(row[0]) / float(row[1])
+
+
+def parameter_sniffing_issues(facts, conn=None):
+    """
+    检测执行计划中每条语句的参数嗅探风险，返回问题列表。
+
+    facts 为 plan_visitor.walk_plan 的返回值；conn 不为空时还会检查参数比较列的直方图倾斜。
+    """
+    issues = []
+    skew_cache = {}
+    for statement in facts.nodes('StmtSimple'):
+        parameters = statement_parameters(statement)
+        if not parameters:
+            continue
+        statement_text = ' '.join(statement.get('StatementText', '').split())[:100]
+        predicates = parameter_predicates(statement)
+
+        for parameter in parameters:
+            name = parameter['name']
+            uses = [(relop, column) for relop, parameter_name, column in predicates if parameter_name == name]
+            columns = sorted({column for _, column in uses})
+            column_text = '、'.join(f"{table}.{column}" for table, column in columns) or '未知列'
+            reasons = []
+
+            if parameter['runtime'] is not None and parameter['compiled'] is not None \
+                    and parameter['runtime'] != parameter['compiled']:
+                reasons.append(f"编译值 {parameter['compiled']} 与运行值 {parameter['runtime']} 不同")
+
+            for relop, _ in uses:
+                node = facts.node(relop)
+                if node is None or not node.has_actuals:
+                    continue
+                actual = node.actual_rows_per_execution
+                estimate = max(node.estimate_rows, 1.0)
+                if actual > estimate * ROWS_SKEW_RATIO or estimate > max(actual, 1.0) * ROWS_SKEW_RATIO:
+                    reasons.append(f"节点 {node.node_id} {node.physical_op} 预估 {node.estimate_rows:g} 行，"
+                                   f"实际 {actual:g} 行")
+
+            if conn is not None:
+                for table, column in columns:
+                    if (table, column) not in skew_cache:
+                        skew_cache[(table, column)] = histogram_skew(conn, table, column)
+                    skew = skew_cache[(table, column)]
+                    if skew is not None and skew > HISTOGRAM_SKEW_RATIO:
+                        reasons.append(f"{table}.{column} 的数据分布倾斜（最常见值的行数是平均值的 {skew:.0f} 倍）")
+
+            if reasons:
+                issues.append(f"警告: 语句 {statement.get('StatementId', '?')} 的执行计划依赖参数 {name} 的嗅探值"
+                              f"（比较列 {column_text}）：{'；'.join(reasons)}。"
+                              f"考虑 OPTION (RECOMPILE)、OPTIMIZE FOR 或拆分查询。语句: {statement_text}")
+    return issues
+
+
+def cross_plan_sniffing_issues(plan_xmls):
+    """
+    在多个缓存计划之间检测参数嗅探：同一 QueryHash 的语句因编译值不同而产生了不同的执行计划。
+
+    plan_xmls 为执行计划 XML 字符串的列表，返回问题列表。
+    """
+    variants = {}
+    for plan_xml in plan_xmls:
+        try:
+            facts = walk_plan(ET.fromstring(plan_xml))
+        except ET.ParseError:
+            continue
+        for statement in facts.nodes('StmtSimple'):
+            query_hash = statement.get('QueryHash')
+            if not query_hash:
+                continue
+            compiled = tuple((parameter['name'], parameter['compiled'])
+                             for parameter in statement_parameters(statement))
+            entry = variants.setdefault(query_hash, {'text': statement.get('StatementText', ''), 'plans': {}})
+            entry['plans'].setdefault(statement.get('QueryPlanHash', ''), set()).add(compiled)
+
+    issues = []
+    for query_hash, entry in variants.items():
+        if len(entry['plans']) < 2:
+            continue
+        compiled_values = '；'.join(
+            f"{plan_hash}: " + ', '.join(f"{name}={value}" for name, value in next(iter(values)))
+            for plan_hash, values in entry['plans'].items())
+        statement_text = ' '.join(entry['text'].split())[:100]
+        issues.append(f"警告: 查询 {query_hash} 有 {len(entry['plans'])} 个不同的缓存计划，"
+                      f"编译时的参数值不同（{compiled_values}），性能可能随嗅探值变化。语句: {statement_text}")
+    return issues
+
+
+def audit_parameter_sniffing(plan_xml, conn=None, verbose=True):
+    """审计单个执行计划的参数嗅探风险，返回问题列表。"""
+    try:
+        root = ET.fromstring(plan_xml)
+    except Exception as e:
+        print(f"解析执行计划时出错: {e}")
+        return
+    issues = parameter_sniffing_issues(walk_plan(root), conn)
+    if verbose:
+        for issue in issues:
+            print(issue)
+    return issues
@@ -0,0 +1,66 @@
+# 执行计划归档
+# 按内容寻址保存执行计划：以计划文本的 SHA-256 作为键，gzip 压缩后写入 <目录>/<前两位>/<键>.sqlplan.gz，
+# 相同的计划只保存一份。归档是可选的，审计流程本身只在内存中传递执行计划。
+import gzip
+import hashlib
+import os
+import tempfile
+
+
+class PlanArchive:
+    """压缩的、按内容寻址的执行计划归档目录。"""
+
+    SUFFIX = '.sqlplan.gz'
+
+    def __init__(self, root):
+        self.root = root
+        os.makedirs(root, exist_ok=True)
+
+    @staticmethod
+    def key_for(plan_xml):
+        return hashlib.sha256(plan_xml.encode('utf-8')).hexdigest()
+
+    def path_for(self, key):
+        return os.path.join(self.root, key[:2], key + self.SUFFIX)
+
+    def store(self, plan_xml):
+        """保存执行计划并返回其键；已存在相同内容时不再重复写入。"""
+        key = self.key_for(plan_xml)
+        path = self.path_for(key)
+        if os.path.exists(path):
+            return key
+
+        directory = os.path.dirname(path)
+        os.makedirs(directory, exist_ok=True)
+        # 先写临时文件再原子替换，并发保存同一计划时不会留下不完整的文件
+        fd, temp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as raw, gzip.GzipFile(fileobj=raw, mode='wb', mtime=0) as f:
+                f.write(plan_xml.encode('utf-8'))
+            os.replace(temp_path, path)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+        return key
+
+    def load(self, key):
+        """按键读取执行计划，不存在时返回 None。"""
+        path = self.path_for(key)
+        if not os.path.exists(path):
+            return None
+        with gzip.open(path, 'rb') as f:
+            return f.read().decode('utf-8')
+
+    def __contains__(self, key):
+        return os.path.exists(self.path_for(key))
+
+    def keys(self):
+        """返回归档中全部执行计划的键。"""
+        for prefix in sorted(os.listdir(self.root)):
+            directory = os.path.join(self.root, prefix)
+            if not os.path.isdir(directory):
+                continue
+            for name in sorted(os.listdir(directory)):
+                if name.endswith(self.SUFFIX):
+                    yield name[:-len(self.SUFFIX)]
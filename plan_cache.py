@@ -0,0 +1,130 @@
+# 执行计划审计结果缓存
+# 以 showplan 中的 QueryPlanHash/QueryHash 为键（缺失时使用规范化后的计划摘要），问题文本中引用的语句文本和
+# 编译统计也计入键，QueryPlanHash 相同的不同语句不会取到彼此的结果；
+# 内存中保留有限数量的最近结果（LRU），并可选写入本地 SQLite 文件，进程重启后仍可复用。
+import hashlib
+import html
+import json
+import re
+import sqlite3
+import time
+from collections import OrderedDict
+
+from plan_model import local_name
+
+# 属性名之前可以是空格、换行或制表符
+_PLAN_HASH_PATTERN = re.compile(r'\sQueryPlanHash="([^"]*)"')
+_QUERY_HASH_PATTERN = re.compile(r'\sQueryHash="([^"]*)"')
+_STATEMENT_TEXT_PATTERN = re.compile(r'\sStatementText="([^"]*)"')
+# 审计问题中会引用的 QueryPlan 编译统计，计划形状相同时也可能不同
+_COMPILE_ATTRIBUTES = ('CompileTime', 'CompileCPU', 'CompileMemory')
+_COMPILE_ATTRIBUTE_PATTERN = re.compile(r'\s(CompileTime|CompileCPU|CompileMemory)="([^"]*)"')
+# 每次获取计划都可能变化、但既不影响计划形状也不出现在问题中的属性，计算摘要前去掉
+_VOLATILE_ATTRIBUTES = re.compile(r'\s(?:CachedPlanSize|RetrievedFromCache)="[^"]*"')
+_WHITESPACE_BETWEEN_TAGS = re.compile(r'>\s+<')
+
+
+def plan_cache_key(plan_xml):
+    """
+    计算执行计划的缓存键。
+
+    优先使用各语句的 QueryPlanHash、QueryHash、语句文本和编译统计；计划中没有 QueryPlanHash 或为实际执行计划时，
+    使用去掉易变属性和多余空白后的计划文本的 SHA-256 摘要。
+    """
+    plan_hashes = _PLAN_HASH_PATTERN.findall(plan_xml)
+    # 实际执行计划的问题取决于运行时计数器，同一计划形状的不同执行不能共用缓存
+    if plan_hashes and 'RunTimeCountersPerThread' not in plan_xml:
+        return _hash_key(plan_hashes, _QUERY_HASH_PATTERN.findall(plan_xml),
+                         [html.unescape(text) for text in _STATEMENT_TEXT_PATTERN.findall(plan_xml)],
+                         [f'{name}={value}' for name, value in _COMPILE_ATTRIBUTE_PATTERN.findall(plan_xml)])
+
+    normalized = _VOLATILE_ATTRIBUTES.sub('', plan_xml)
+    normalized = _WHITESPACE_BETWEEN_TAGS.sub('><', normalized.strip())
+    return 'digest:' + hashlib.sha256(normalized.encode('utf-8')).hexdigest()
+
+
+def plan_tree_key(root):
+    """
+    根据已解析的执行计划计算与 plan_cache_key 相同的基于哈希的缓存键，用于不保留计划文本的场合。
+
+    root 为整个文档或单个 StmtSimple 的根元素，标签可以带命名空间；计划中没有 QueryPlanHash 或为实际执行计划时返回 None。
+    """
+    by_tag = {}
+    for element in root.iter():
+        by_tag.setdefault(local_name(element.tag), []).append(element)
+    statements = by_tag.get('StmtSimple', [])
+    plan_hashes = [statement.get('QueryPlanHash') for statement in statements if statement.get('QueryPlanHash') is not None]
+    if not plan_hashes or 'RunTimeCountersPerThread' in by_tag:
+        return None
+    return _hash_key(plan_hashes,
+                     [statement.get('QueryHash') for statement in statements if statement.get('QueryHash') is not None],
+                     [element.get('StatementText') for element in root.iter() if element.get('StatementText') is not None],
+                     [f'{name}={query_plan.get(name)}' for query_plan in by_tag.get('QueryPlan', [])
+                      for name in _COMPILE_ATTRIBUTES if query_plan.get(name) is not None])
+
+
+def _hash_key(plan_hashes, query_hashes, statement_texts, compile_stats):
+    # 解析后的属性值中换行已变为空格，统一空白后计划文本和元素树得到相同的键
+    # 编译统计与属性在 XML 中的书写顺序无关，排序后再计入
+    texts = [' '.join(text.split()) for text in statement_texts]
+    identity = '#'.join(['|'.join(plan_hashes), '|'.join(query_hashes), '|'.join(texts), '|'.join(sorted(compile_stats))])
+    return 'hash:' + hashlib.sha256(identity.encode('utf-8')).hexdigest()
+
+
+class PlanAuditCache:
+    """
+    执行计划审计结果的两级缓存。
+
+    max_entries 为内存 LRU 的容量；db_path 不为空时，结果同时写入该 SQLite 文件，
+    内存未命中时再从文件中查找并提升到内存。
+    """
+
+    def __init__(self, max_entries=1024, db_path=None):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._db = None
+        if db_path is not None:
+            self._db = sqlite3.connect(db_path)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS plan_audit_results ("
+                "plan_key TEXT PRIMARY KEY, issues TEXT NOT NULL, created_at REAL NOT NULL)")
+            self._db.commit()
+
+    def get(self, key):
+        """返回缓存的问题列表，未命中时返回 None。"""
+        issues = self._entries.get(key)
+        if issues is not None:
+            self._entries.move_to_end(key)
+            return issues
+
+        if self._db is None:
+            return None
+        row = self._db.execute("SELECT issues FROM plan_audit_results WHERE plan_key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        issues = json.loads(row[0])
+        self._remember(key, issues)
+        return issues
+
+    def put(self, key, issues):
+        issues = list(issues)
+        self._remember(key, issues)
+        if self._db is not None:
+            self._db.execute(
+                "INSERT OR REPLACE INTO plan_audit_results (plan_key, issues, created_at) VALUES (?, ?, ?)",
+                (key, json.dumps(issues, ensure_ascii=False), time.time()))
+            self._db.commit()
+
+    def _remember(self, key, issues):
+        self._entries[key] = issues
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def close(self):
+        if self._db is not None:
+            self._db.close()
+            self._db = None
@@ -0,0 +1,128 @@
+# 执行计划的成本归因
+# 每个 RelOp 的自身成本 = 其 EstimatedTotalSubtreeCost 减去直接子操作符的子树成本，
+# 再计算占所在语句总成本的比例，找出从根到叶的关键成本路径，
+# 并输出按自身成本排序的操作符列表和火焰图工具可读取的折叠栈（collapsed stack）文件。
+import xml.etree.ElementTree as ET
+
+from plan_visitor import walk_plan
+
+# 折叠栈中的数值必须为整数，成本乘以该系数后取整
+COLLAPSED_STACK_SCALE = 1000000
+
+
+def operator_label(node):
+    """操作符的显示名称，例如 '3 Index Seek [Orders].[IX_Orders_Date]'。"""
+    label = f"{node.node_id} {node.physical_op}"
+    scan_object = node.element.find('./*/Object')
+    if scan_object is not None and scan_object.get('Table'):
+        label += f" {scan_object.get('Table')}"
+        if scan_object.get('Index'):
+            label += f".{scan_object.get('Index')}"
+    return label
+
+
+def attribute_costs(facts):
+    """
+    计算每个操作符的自身成本和占语句总成本的比例。
+
+    facts 为 plan_visitor.walk_plan 的返回值。返回与 facts.model.nodes 顺序一致的字典列表：
+    node、root（所在语句的根操作符）、self_cost、share（0~1）。
+    嵌套循环内侧等子树成本可能大于父操作符，自身成本为负时按 0 计算。
+    """
+    nodes = facts.model.nodes
+    costs = []
+    for node in nodes:
+        children_cost = sum(nodes[child].subtree_cost for child in node.children)
+        # 父操作符总是先于子操作符加入模型，根操作符可以直接从父操作符的结果中取得
+        root = node if node.parent < 0 else costs[node.parent]['root']
+        total = root.subtree_cost
+        self_cost = max(node.subtree_cost - children_cost, 0.0)
+        costs.append({
+            'node': node,
+            'root': root,
+            'self_cost': self_cost,
+            'share': self_cost / total if total > 0 else 0.0,
+        })
+    return costs
+
+
+def hot_path(model, root):
+    """从 root 开始每次沿子树成本最高的子操作符向下，返回到叶子为止的关键成本路径。"""
+    path = [root]
+    node = root
+    while node.children:
+        node = max(model.children(node), key=lambda child: child.subtree_cost)
+        path.append(node)
+    return path
+
+
+def top_operators(costs, n=10):
+    """按自身成本从高到低返回前 n 个操作符。"""
+    return sorted(costs, key=lambda cost: cost['self_cost'], reverse=True)[:n]
+
+
+def statement_label(facts, root):
+    for ancestor in facts.ancestors(root.element):
+        if ancestor.tag == 'StmtSimple':
+            return f"语句 {ancestor.get('StatementId', '?')}"
+    return "语句"
+
+
+def collapsed_stacks(facts, costs, scale=COLLAPSED_STACK_SCALE):
+    """
+    生成折叠栈文本行：'语句;根操作符;...;操作符 自身成本'。
+
+    每个操作符一行，数值为自身成本乘以 scale 后取整，可直接交给 flamegraph.pl、speedscope 等工具。
+    """
+    model = facts.model
+    labels = [operator_label(node).replace(';', ',') for node in model.nodes]
+    lines = []
+    for cost in costs:
+        weight = round(cost['self_cost'] * scale)
+        if weight <= 0:
+            continue
+        node = cost['node']
+        frames = []
+        while node is not None:
+            frames.append(labels[node.index])
+            node = model.parent(node)
+        frames.append(statement_label(facts, cost['root']))
+        lines.append(';'.join(reversed(frames)) + f" {weight}")
+    return lines
+
+
+def write_collapsed_stacks(path, lines):
+    with open(path, 'w', encoding='utf-8') as f:
+        for line in lines:
+            f.write(line + '\n')
+
+
+def report_cost_attribution(plan_xml, top_n=10, collapsed_path=None):
+    """
+    打印执行计划的成本归因报告：自身成本最高的 top_n 个操作符和每条语句的关键成本路径。
+
+    collapsed_path 不为空时，把折叠栈写入该文件。返回 attribute_costs 的结果。
+    """
+    try:
+        root = ET.fromstring(plan_xml)
+    except Exception as e:
+        print(f"解析执行计划时出错: {e}")
+        return
+    facts = walk_plan(root)
+    costs = attribute_costs(facts)
+
+    print(f"自身成本最高的 {top_n} 个操作符：")
+    for cost in top_operators(costs, top_n):
+        print(f"  {operator_label(cost['node'])}: 自身成本 {cost['self_cost']:.4f}，"
+              f"占语句总成本 {cost['share']:.1%}")
+
+    for statement_root in facts.model.roots():
+        if statement_root.subtree_cost <= 0:
+            continue
+        path = ' -> '.join(operator_label(node) for node in hot_path(facts.model, statement_root))
+        print(f"{statement_label(facts, statement_root)} 关键成本路径（总成本 {statement_root.subtree_cost:g}）: {path}")
+
+    if collapsed_path is not None:
+        write_collapsed_stacks(collapsed_path, collapsed_stacks(facts, costs))
+        print(f"折叠栈已保存为 '{collapsed_path}'")
+    return costs
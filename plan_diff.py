@@ -0,0 +1,309 @@
+# 执行计划对比
+# 比较调优前后的两个执行计划：按语句配对，再从根操作符开始按节点结构和访问的对象（表、索引）逐层匹配操作符，
+# 报告操作符类型、预估成本、行数、内存授予和警告的变化、总成本的差值，
+# 以及审计发现的问题中哪些已经解决、哪些是新出现的。
+# 输入可以是两个 XML 字符串、两个 .sqlplan 文件，或者在 DDL（例如建立索引）前后各获取一次的同一查询的执行计划。
+import re
+import xml.etree.ElementTree as ET
+
+from execution_plan_audit import audit_execution_plan, get_actual_execution_plan, get_execution_plan
+from mapped_file import map_file
+from memory_grant_audit import memory_grant_info
+from plan_cost_attribution import operator_label
+from plan_model import _to_float, decode_showplan, unquote_identifier
+from plan_visitor import walk_plan
+
+# 成本或行数的变化同时超过该比例和最小绝对值时才报告
+CHANGE_RATIO = 0.1
+MIN_COST_CHANGE = 0.001
+MIN_ROWS_CHANGE = 1.0
+
+_NUMBER_PATTERN = re.compile(r'\d+(?:\.\d+)?(?:e[+-]?\d+)?')
+
+
+def load_plan_file(path):
+    """通过 mmap 读取 .sqlplan 文件并解码为字符串。"""
+    with map_file(path) as mapped:
+        return decode_showplan(mapped)
+
+
+def _object_of(node):
+    scan_object = node.element.find('./*/Object')
+    if scan_object is None:
+        return None, None
+    return scan_object.get('Table'), scan_object.get('Index')
+
+
+def _match_score(before, after):
+    """两个操作符的相似程度：同类型且访问同一索引为 3，访问同一张表为 2，同类型为 1，否则为 0。"""
+    before_table, before_index = _object_of(before)
+    after_table, after_index = _object_of(after)
+    if before.physical_op == after.physical_op and (before_table, before_index) == (after_table, after_index):
+        return 3
+    if before_table is not None and before_table == after_table:
+        return 2
+    if before.physical_op == after.physical_op or before.logical_op == after.logical_op:
+        return 1
+    return 0
+
+
+def _match_subtrees(before_model, after_model, before, after, pairs):
+    pairs.append((before, after))
+    before_children = before_model.children(before)
+    after_children = after_model.children(after)
+    # 按相似程度贪心配对，相似程度相同时优先保持子操作符的顺序
+    candidates = sorted(((_match_score(b, a), -abs(i - j), i, j)
+                         for i, b in enumerate(before_children)
+                         for j, a in enumerate(after_children)), reverse=True)
+    used_before, used_after = set(), set()
+    for score, _, i, j in candidates:
+        if i in used_before or j in used_after:
+            continue
+        # 子操作符个数相同时，位置相同的子操作符即使类型不同也视为同一个（例如扫描变成了查找）
+        if score == 0 and len(before_children) != len(after_children):
+            continue
+        used_before.add(i)
+        used_after.add(j)
+        _match_subtrees(before_model, after_model, before_children[i], after_children[j], pairs)
+
+
+def match_operators(before_facts, after_facts, before_root, after_root):
+    """
+    匹配两条语句的操作符。
+
+    先从根操作符开始逐层按结构匹配，剩下未匹配的操作符再按访问的表匹配。
+    返回 (匹配的 (before, after) 列表, 只在调优前存在的操作符, 只在调优后存在的操作符)。
+    """
+    before_model = before_facts.model
+    after_model = after_facts.model
+    pairs = []
+    _match_subtrees(before_model, after_model, before_root, after_root, pairs)
+
+    matched_before = {before.index for before, _ in pairs}
+    matched_after = {after.index for _, after in pairs}
+    removed = [node for node in _subtree(before_model, before_root) if node.index not in matched_before]
+    added = [node for node in _subtree(after_model, after_root) if node.index not in matched_after]
+    for node in list(removed):
+        table, _ = _object_of(node)
+        if table is None:
+            continue
+        for other in added:
+            if _object_of(other)[0] == table:
+                pairs.append((node, other))
+                removed.remove(node)
+                added.remove(other)
+                break
+    return pairs, removed, added
+
+
+def _subtree(model, root):
+    nodes = [root]
+    for node in nodes:
+        nodes.extend(model.children(node))
+    return nodes
+
+
+def _changed(before, after, minimum):
+    return abs(after - before) > minimum and abs(after - before) > max(abs(before), abs(after)) * CHANGE_RATIO
+
+
+def operator_changes(before, after):
+    """返回一对匹配的操作符之间的变化描述列表。"""
+    changes = []
+    if before.physical_op != after.physical_op:
+        changes.append(f"{before.physical_op} -> {after.physical_op}")
+    before_index = _object_of(before)[1]
+    after_index = _object_of(after)[1]
+    if before_index != after_index and (before_index or after_index):
+        changes.append(f"索引 {before_index or '无'} -> {after_index or '无'}")
+    if _changed(before.subtree_cost, after.subtree_cost, MIN_COST_CHANGE):
+        changes.append(f"子树成本 {before.subtree_cost:g} -> {after.subtree_cost:g}")
+    if _changed(before.estimate_rows, after.estimate_rows, MIN_ROWS_CHANGE):
+        changes.append(f"预估行数 {before.estimate_rows:g} -> {after.estimate_rows:g}")
+    if before.has_actuals and after.has_actuals and _changed(before.actual_rows, after.actual_rows, MIN_ROWS_CHANGE):
+        changes.append(f"实际行数 {before.actual_rows:.0f} -> {after.actual_rows:.0f}")
+    return changes
+
+
+def _statement_warnings(statement):
+    """语句中的警告：QueryPlan 级别的警告名，以及 '警告名（操作符类型 表）'。"""
+    warnings = [warning.tag for warning in statement.findall('QueryPlan/Warnings/*')]
+    for relop in statement.iter('RelOp'):
+        warning_list = relop.find('Warnings')
+        if warning_list is None:
+            continue
+        scan_object = relop.find('./*/Object')
+        target = f" {scan_object.get('Table')}" if scan_object is not None and scan_object.get('Table') else ''
+        for warning in warning_list:
+            warnings.append(f"{warning.tag}（{relop.get('PhysicalOp', '')}{target}）")
+    return sorted(warnings)
+
+
+def _granted_memory(statement):
+    query_plan = statement.find('QueryPlan')
+    grant = memory_grant_info(query_plan) if query_plan is not None else None
+    if grant is None:
+        return 0.0
+    if grant['GrantedMemory'] is not None:
+        return grant['GrantedMemory']
+    return grant['SerialDesiredMemory'] or 0.0
+
+
+def _statement_root(facts, statement):
+    relop = statement.find('QueryPlan/RelOp')
+    return facts.node(relop) if relop is not None else None
+
+
+def _finding_key(issue, renames=()):
+    # 匹配的操作符换了类型或索引时，问题文本按调优前的名称比较；节点号、成本和行数在两个计划中不同，比较时忽略数字
+    for new, old in renames:
+        issue = issue.replace(new, old)
+    return _NUMBER_PATTERN.sub('#', issue)
+
+
+def _renames(before, after):
+    renames = [(f"节点 {after.node_id} {after.physical_op}", f"节点 {before.node_id} {before.physical_op}")]
+    before_index = unquote_identifier(_object_of(before)[1])
+    after_index = unquote_identifier(_object_of(after)[1])
+    if before_index and after_index:
+        renames.append((after_index, before_index))
+    return renames
+
+
+def diff_plans(before_xml, after_xml):
+    """
+    比较两个执行计划 XML 字符串。
+
+    返回字典：statements（每条语句的对比结果列表）、cost_before、cost_after、cost_delta、resolved（已解决的问题）、
+    introduced（新出现的问题）；任一计划无法解析时返回 None。
+    每条语句的结果包含 statement_id、text、cost_before、cost_after、memory_before、memory_after（KB）、
+    warnings_resolved、warnings_introduced、changed（[(before, after, 变化列表)]）、removed、added。
+    """
+    try:
+        before_facts = walk_plan(ET.fromstring(before_xml))
+        after_facts = walk_plan(ET.fromstring(after_xml))
+    except ET.ParseError as e:
+        print(f"解析执行计划时出错: {e}")
+        return None
+
+    before_statements = before_facts.nodes('StmtSimple')
+    after_statements = {statement.get('StatementId', str(position)): statement
+                        for position, statement in enumerate(after_facts.nodes('StmtSimple'))}
+    statements = []
+    renames = []
+    for position, before_statement in enumerate(before_statements):
+        statement_id = before_statement.get('StatementId', str(position))
+        after_statement = after_statements.get(statement_id)
+        if after_statement is None:
+            continue
+        result = {
+            'statement_id': statement_id,
+            'text': ' '.join(before_statement.get('StatementText', '').split()),
+            'cost_before': _to_float(before_statement.get('StatementSubTreeCost')),
+            'cost_after': _to_float(after_statement.get('StatementSubTreeCost')),
+            'memory_before': _granted_memory(before_statement),
+            'memory_after': _granted_memory(after_statement),
+            'changed': [],
+            'removed': [],
+            'added': [],
+        }
+        before_warnings = _statement_warnings(before_statement)
+        after_warnings = _statement_warnings(after_statement)
+        result['warnings_resolved'] = [warning for warning in before_warnings if warning not in after_warnings]
+        result['warnings_introduced'] = [warning for warning in after_warnings if warning not in before_warnings]
+
+        before_root = _statement_root(before_facts, before_statement)
+        after_root = _statement_root(after_facts, after_statement)
+        if before_root is not None and after_root is not None:
+            pairs, result['removed'], result['added'] = match_operators(before_facts, after_facts,
+                                                                        before_root, after_root)
+            for before, after in pairs:
+                changes = operator_changes(before, after)
+                if changes:
+                    result['changed'].append((before, after, changes))
+                    renames.extend(_renames(before, after))
+        statements.append(result)
+
+    before_issues = audit_execution_plan(before_xml, verbose=False) or []
+    after_issues = audit_execution_plan(after_xml, verbose=False) or []
+    before_keys = {_finding_key(issue) for issue in before_issues}
+    after_keys = {_finding_key(issue, renames) for issue in after_issues}
+    cost_before = sum(statement['cost_before'] for statement in statements)
+    cost_after = sum(statement['cost_after'] for statement in statements)
+    return {
+        'statements': statements,
+        'cost_before': cost_before,
+        'cost_after': cost_after,
+        'cost_delta': cost_after - cost_before,
+        'resolved': list(dict.fromkeys(issue for issue in before_issues if _finding_key(issue) not in after_keys)),
+        'introduced': list(dict.fromkeys(issue for issue in after_issues if _finding_key(issue, renames) not in before_keys)),
+    }
+
+
+def print_plan_diff(diff):
+    for statement in diff['statements']:
+        delta = statement['cost_after'] - statement['cost_before']
+        print(f"语句 {statement['statement_id']}: 成本 {statement['cost_before']:g} -> {statement['cost_after']:g}"
+              f"（{delta:+g}） - {statement['text'][:100]}")
+        if statement['memory_before'] != statement['memory_after']:
+            print(f"  内存授予 {statement['memory_before']:g} KB -> {statement['memory_after']:g} KB")
+        for before, after, changes in statement['changed']:
+            print(f"  {operator_label(before)} => {operator_label(after)}: {'，'.join(changes)}")
+        for node in statement['removed']:
+            print(f"  已移除: {operator_label(node)}（子树成本 {node.subtree_cost:g}）")
+        for node in statement['added']:
+            print(f"  新增: {operator_label(node)}（子树成本 {node.subtree_cost:g}）")
+        for warning in statement['warnings_resolved']:
+            print(f"  警告已消除: {warning}")
+        for warning in statement['warnings_introduced']:
+            print(f"  新的警告: {warning}")
+
+    print(f"总成本: {diff['cost_before']:g} -> {diff['cost_after']:g}（{diff['cost_delta']:+g}）")
+    print(f"已解决的问题（{len(diff['resolved'])} 个）：")
+    for issue in diff['resolved']:
+        print(f"  {issue}")
+    print(f"新出现的问题（{len(diff['introduced'])} 个）：")
+    for issue in diff['introduced']:
+        print(f"  {issue}")
+
+
+def report_plan_diff(before_xml, after_xml):
+    """打印两个执行计划的对比报告，返回 diff_plans 的结果。"""
+    diff = diff_plans(before_xml, after_xml)
+    if diff is not None:
+        print_plan_diff(diff)
+    return diff
+
+
+def diff_plan_files(before_path, after_path):
+    """比较两个 .sqlplan 文件，打印对比报告并返回 diff_plans 的结果。"""
+    return report_plan_diff(load_plan_file(before_path), load_plan_file(after_path))
+
+
+def diff_query_around_ddl(conn, query, ddl, actual=False):
+    """
+    在执行 DDL（例如 audit_indexes 建议的 CREATE INDEX）前后各获取一次查询的执行计划并比较。
+
+    DDL 执行后会提交，不会自动撤销。actual 为 True 时比较实际执行计划（查询在回滚的事务中执行）。
+    """
+    import pyodbc
+
+    capture = get_actual_execution_plan if actual else get_execution_plan
+    before_xml = capture(conn, query)
+    if before_xml is None:
+        return None
+
+    cursor = conn.cursor()
+    try:
+        cursor.execute(ddl)
+        conn.commit()
+    except pyodbc.Error as e:
+        print(f"错误: 执行 DDL 失败: {e}")
+        return None
+    finally:
+        cursor.close()
+
+    after_xml = capture(conn, query)
+    if after_xml is None:
+        return None
+    return report_plan_diff(before_xml, after_xml)
@@ -0,0 +1,177 @@
+# 执行计划的紧凑节点模型
+# SQL Server 的 showplan 使用命名空间，遍历时统一去掉命名空间前缀；
+# 每个 RelOp 解析为一个 PlanNode，成本、行数等属性只解析一次，父子关系以下标保存。
+
+SHOWPLAN_NAMESPACE = 'http://schemas.microsoft.com/sqlserver/2004/07/showplan'
+
+
+def local_name(tag):
+    """去掉 '{namespace}' 前缀，返回元素的本地名称。"""
+    if tag[:1] == '{':
+        return tag.rpartition('}')[2]
+    return tag
+
+
+def decode_showplan(data):
+    """
+    把 .sqlplan 文件的内容解码为字符串。SSMS 保存的文件可能是带 BOM 的 UTF-16，也可能是 UTF-8。
+
+    data 可以是 bytes 或 mmap 等支持缓冲区协议的对象，解码时不会先复制为 bytes。
+    """
+    if data[:2] in (b'\xff\xfe', b'\xfe\xff'):
+        return str(data, 'utf-16')
+    return str(data, 'utf-8-sig')
+
+
+def unquote_identifier(name):
+    """去掉执行计划中对象名称的方括号，例如 '[Orders]' -> 'Orders'。"""
+    if name and name[:1] == '[' and name[-1:] == ']':
+        return name[1:-1].replace(']]', ']')
+    return name
+
+
+def _to_float(value, default=0.0):
+    if value is None:
+        return default
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return default
+
+
+def _to_bool(value):
+    # showplan 中的布尔属性可能是 '1'/'0'，也可能是 'true'/'false'
+    return value in ('1', 'true', 'True')
+
+
+def lookup_kind(relop):
+    """
+    RelOp 是书签查找时返回 'Key Lookup' 或 'RID Lookup'，否则返回 None。
+
+    showplan 中的键查找没有 PhysicalOp="Key Lookup"，而是 PhysicalOp="Clustered Index Seek"
+    加上子元素 <IndexScan Lookup="1">（SSMS 把它显示为 Key Lookup）；RID Lookup 的 PhysicalOp 就是 RID Lookup。
+    """
+    physical_op = relop.get('PhysicalOp')
+    if physical_op == 'RID Lookup':
+        return physical_op
+    access = relop.find('IndexScan')
+    if access is not None and _to_bool(access.get('Lookup')):
+        return 'Key Lookup'
+    return None
+
+
+class PlanNode:
+    """执行计划中的一个 RelOp 操作符。"""
+
+    __slots__ = ('index', 'node_id', 'physical_op', 'logical_op', 'estimate_rows', 'estimate_io',
+                 'estimate_cpu', 'subtree_cost', 'avg_row_size', 'estimate_rebinds', 'estimate_rewinds',
+                 'parallel', 'estimated_execution_mode', 'parent', 'children', 'element',
+                 'actual_rows', 'actual_executions', 'actual_elapsed_ms', 'actual_cpu_ms',
+                 'actual_logical_reads', 'actual_physical_reads', 'actual_execution_mode', 'thread_rows')
+
+    def __init__(self, index, element, parent=-1):
+        get = element.get
+        self.index = index
+        self.node_id = int(_to_float(get('NodeId'), -1))
+        self.physical_op = get('PhysicalOp', '')
+        self.logical_op = get('LogicalOp', '')
+        self.estimate_rows = _to_float(get('EstimateRows'))
+        self.estimate_io = _to_float(get('EstimateIO'))
+        self.estimate_cpu = _to_float(get('EstimateCPU'))
+        self.subtree_cost = _to_float(get('EstimatedTotalSubtreeCost'))
+        self.avg_row_size = _to_float(get('AvgRowSize'))
+        self.estimate_rebinds = _to_float(get('EstimateRebinds'))
+        self.estimate_rewinds = _to_float(get('EstimateRewinds'))
+        self.parallel = _to_bool(get('Parallel'))
+        # 'Row' 或 'Batch'，SQL Server 2012 之前的执行计划没有该属性
+        self.estimated_execution_mode = get('EstimatedExecutionMode')
+        # 父节点和子节点都保存为 PlanModel.nodes 中的下标，根操作符的 parent 为 -1
+        self.parent = parent
+        self.children = []
+        self.element = element
+        # 实际执行计划（SET STATISTICS XML ON）中的运行时计数器，估算计划中保持为 None
+        self.actual_rows = None
+        self.actual_executions = None
+        self.actual_elapsed_ms = None
+        self.actual_cpu_ms = None
+        self.actual_logical_reads = None
+        self.actual_physical_reads = None
+        self.actual_execution_mode = None
+        # 每个线程的实际行数：{线程号: 行数}
+        self.thread_rows = {}
+
+    @property
+    def has_actuals(self):
+        return self.actual_rows is not None
+
+    @property
+    def execution_mode(self):
+        """操作符的执行模式：有实际执行模式时以实际为准，都没有时按行模式处理。"""
+        return self.actual_execution_mode or self.estimated_execution_mode or 'Row'
+
+    @property
+    def actual_rows_per_execution(self):
+        """实际行数按执行次数折算，与 EstimateRows 可比；并行操作符按每个线程的执行次数折算。"""
+        threads = max(len(self.thread_rows), 1)
+        return self.actual_rows / max(self.actual_executions / threads, 1.0)
+
+    def add_runtime_counters(self, counters):
+        """累加一个 RunTimeCountersPerThread 元素：行数、CPU 和读取次数按线程求和，耗时取各线程最大值。"""
+        get = counters.get
+        rows = _to_float(get('ActualRows'))
+        thread = int(_to_float(get('Thread')))
+        self.thread_rows[thread] = self.thread_rows.get(thread, 0.0) + rows
+        if self.actual_rows is None:
+            self.actual_rows = self.actual_executions = self.actual_elapsed_ms = self.actual_cpu_ms = 0.0
+            self.actual_logical_reads = self.actual_physical_reads = 0.0
+        self.actual_rows += rows
+        self.actual_executions += _to_float(get('ActualExecutions'))
+        self.actual_elapsed_ms = max(self.actual_elapsed_ms, _to_float(get('ActualElapsedms')))
+        self.actual_cpu_ms += _to_float(get('ActualCPUms'))
+        self.actual_logical_reads += _to_float(get('ActualLogicalReads'))
+        self.actual_physical_reads += _to_float(get('ActualPhysicalReads'))
+        if get('ActualExecutionMode'):
+            self.actual_execution_mode = get('ActualExecutionMode')
+
+    def __repr__(self):
+        return f"PlanNode({self.index}, {self.physical_op!r}, cost={self.subtree_cost})"
+
+
+class PlanModel:
+    """按文档顺序保存全部 RelOp 节点，所有规则共享同一份模型。"""
+
+    def __init__(self):
+        self.nodes = []
+        self._by_element = {}
+
+    def add(self, element, parent=-1):
+        node = PlanNode(len(self.nodes), element, parent)
+        self.nodes.append(node)
+        self._by_element[element] = node
+        if parent >= 0:
+            self.nodes[parent].children.append(node.index)
+        return node
+
+    def node_for(self, element):
+        """返回 RelOp 元素对应的 PlanNode，不存在时返回 None。"""
+        return self._by_element.get(element)
+
+    def parent(self, node):
+        return self.nodes[node.parent] if node.parent >= 0 else None
+
+    def children(self, node):
+        return [self.nodes[i] for i in node.children]
+
+    def roots(self):
+        return [node for node in self.nodes if node.parent < 0]
+
+    def next_sibling(self, node):
+        """同一父操作符下紧跟在 node 后面的操作符。"""
+        if node.parent < 0:
+            return None
+        siblings = self.nodes[node.parent].children
+        position = siblings.index(node.index)
+        return self.nodes[siblings[position + 1]] if position + 1 < len(siblings) else None
+
+    def by_op(self, physical_op):
+        return [node for node in self.nodes if node.physical_op == physical_op]
@@ -0,0 +1,212 @@
+# 执行计划操作符的列式存储
+# 把大量执行计划中每个 RelOp 的属性（操作符、表、索引、预估行数/IO/CPU/成本、自身成本、并行标志）
+# 展平为按列保存的数组，字符串列以字典编码为整数。安装了 NumPy 时筛选和聚合按列向量化执行，
+# 否则退回到逐行循环；存储可以保存为单个文件并重新加载，不必重新解析 XML。
+import json
+import struct
+import sys
+from array import array
+
+from plan_cost_attribution import attribute_costs
+from plan_model import lookup_kind
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+_MAGIC = b'PLANOPS1'
+
+# 列名 -> array 类型码；字符串列（操作符、表、索引）保存为字典编码
+_COLUMNS = (
+    ('plan_id', 'q'),
+    ('node_id', 'q'),
+    ('physical_op', 'i'),
+    ('table', 'i'),
+    ('index', 'i'),
+    ('estimate_rows', 'd'),
+    ('estimate_io', 'd'),
+    ('estimate_cpu', 'd'),
+    ('subtree_cost', 'd'),
+    ('self_cost', 'd'),
+    ('parallel', 'b'),
+)
+_DICTIONARY_COLUMNS = ('physical_op', 'table', 'index')
+
+
+def operator_rows(facts):
+    """
+    把 walk_plan 得到的操作符展平为行元组，顺序与 _COLUMNS 去掉 plan_id 后一致。
+
+    该函数只返回普通元组，可以在子进程中调用后把结果传回父进程再加入存储。
+    键查找在 showplan 中是带 Lookup 属性的 Clustered Index Seek，操作符列按 SSMS 的显示名称记为 Key Lookup。
+    """
+    rows = []
+    for cost in attribute_costs(facts):
+        node = cost['node']
+        scan_object = node.element.find('./*/Object')
+        table = scan_object.get('Table', '') if scan_object is not None else ''
+        index = scan_object.get('Index', '') if scan_object is not None else ''
+        rows.append((node.node_id, lookup_kind(node.element) or node.physical_op, table, index, node.estimate_rows, node.estimate_io,
+                     node.estimate_cpu, node.subtree_cost, cost['self_cost'], node.parallel))
+    return rows
+
+
+class PlanOperatorStore:
+    """按列保存的操作符集合，每行对应某个执行计划中的一个 RelOp。"""
+
+    def __init__(self):
+        self.columns = {name: array(typecode) for name, typecode in _COLUMNS}
+        # 字典编码：值列表和 值 -> 编码 的映射
+        self.dictionaries = {name: [] for name in _DICTIONARY_COLUMNS}
+        self._codes = {name: {} for name in _DICTIONARY_COLUMNS}
+        # 计划编号 -> 计划键（plan_cache_key 或 plan_handle）
+        self.plan_keys = []
+        self._numpy_columns = {}
+
+    def __len__(self):
+        return len(self.columns['plan_id'])
+
+    def _encode(self, name, value):
+        codes = self._codes[name]
+        code = codes.get(value)
+        if code is None:
+            code = codes[value] = len(self.dictionaries[name])
+            self.dictionaries[name].append(value)
+        return code
+
+    def add_plan(self, facts, plan_key=None):
+        """加入 walk_plan 遍历过的一个执行计划，返回计划编号。"""
+        return self.add_rows(operator_rows(facts), plan_key)
+
+    def add_rows(self, rows, plan_key=None):
+        """加入 operator_rows 生成的行，返回计划编号。"""
+        plan_id = len(self.plan_keys)
+        self.plan_keys.append(plan_key)
+        columns = self.columns
+        for node_id, physical_op, table, index, estimate_rows, io, cpu, cost, self_cost, parallel in rows:
+            columns['plan_id'].append(plan_id)
+            columns['node_id'].append(node_id)
+            columns['physical_op'].append(self._encode('physical_op', physical_op))
+            columns['table'].append(self._encode('table', table))
+            columns['index'].append(self._encode('index', index))
+            columns['estimate_rows'].append(estimate_rows)
+            columns['estimate_io'].append(io)
+            columns['estimate_cpu'].append(cpu)
+            columns['subtree_cost'].append(cost)
+            columns['self_cost'].append(self_cost)
+            columns['parallel'].append(1 if parallel else 0)
+        self._numpy_columns.clear()
+        return plan_id
+
+    def column(self, name):
+        """返回整列数据；安装了 NumPy 时为 ndarray，否则为 array。"""
+        if numpy is None:
+            return self.columns[name]
+        values = self._numpy_columns.get(name)
+        if values is None:
+            # 复制一份，避免 array 导出缓冲区后无法继续追加
+            values = self._numpy_columns[name] = numpy.array(self.columns[name])
+        return values
+
+    def select(self, physical_op=None, table=None, index=None, parallel=None, min_cost=None, min_rows=None):
+        """
+        按条件筛选操作符，返回满足全部条件的行号序列。
+
+        physical_op/table/index 为字符串，min_cost 比较自身成本，min_rows 比较预估行数。
+        """
+        equals = []
+        for name, value in (('physical_op', physical_op), ('table', table), ('index', index)):
+            if value is not None:
+                code = self._codes[name].get(value)
+                if code is None:
+                    return numpy.zeros(0, dtype=numpy.int64) if numpy is not None else []
+                equals.append((name, code))
+        if parallel is not None:
+            equals.append(('parallel', 1 if parallel else 0))
+        minimums = [(name, value) for name, value in (('self_cost', min_cost), ('estimate_rows', min_rows))
+                    if value is not None]
+
+        if numpy is not None:
+            mask = numpy.ones(len(self), dtype=bool)
+            for name, value in equals:
+                mask &= self.column(name) == value
+            for name, value in minimums:
+                mask &= self.column(name) >= value
+            return numpy.flatnonzero(mask)
+
+        columns = self.columns
+        return [row for row in range(len(self))
+                if all(columns[name][row] == value for name, value in equals)
+                and all(columns[name][row] >= value for name, value in minimums)]
+
+    def sum_by(self, value, group='table', **filters):
+        """
+        按 group 列分组汇总 value 列，filters 同 select。返回按合计值降序排列的 (分组值, 合计) 列表。
+
+        例如 store.sum_by('self_cost', 'table', physical_op='Key Lookup') 给出各表的 Key Lookup 成本。
+        """
+        rows = self.select(**filters)
+        if numpy is not None and group in self._codes:
+            # 字典编码的分组列可以直接用 bincount 一次完成分组求和；按行数而不是合计值判断分组是否出现，
+            # 与逐行循环一样保留合计为 0 的分组
+            codes = self.column(group)[rows]
+            totals = numpy.bincount(codes, weights=self.column(value)[rows])
+            counts = numpy.bincount(codes, minlength=len(totals))
+            result = [(self.dictionaries[group][code], float(totals[code])) for code in numpy.flatnonzero(counts)]
+            return sorted(result, key=lambda item: item[1], reverse=True)
+
+        totals = {}
+        group_column = self.columns[group]
+        value_column = self.columns[value]
+        for row in rows:
+            key = group_column[row]
+            totals[key] = totals.get(key, 0.0) + value_column[row]
+        if group in self._codes:
+            totals = {self.dictionaries[group][code]: total for code, total in totals.items()}
+        return sorted(totals.items(), key=lambda item: item[1], reverse=True)
+
+    def row(self, row):
+        """以字典形式返回一行，字符串列已解码。"""
+        result = {name: self.columns[name][row] for name, _ in _COLUMNS}
+        for name in _DICTIONARY_COLUMNS:
+            result[name] = self.dictionaries[name][result[name]]
+        result['parallel'] = bool(result['parallel'])
+        result['plan_key'] = self.plan_keys[result['plan_id']]
+        return result
+
+    def save(self, path):
+        """保存为单个文件：文件头（JSON）之后依次是各列的原始字节。"""
+        header = json.dumps({
+            'byteorder': sys.byteorder,
+            'rows': len(self),
+            'columns': [[name, typecode] for name, typecode in _COLUMNS],
+            'dictionaries': self.dictionaries,
+            'plan_keys': self.plan_keys,
+        }, ensure_ascii=False).encode('utf-8')
+        with open(path, 'wb') as f:
+            f.write(_MAGIC)
+            f.write(struct.pack('<Q', len(header)))
+            f.write(header)
+            for name, _ in _COLUMNS:
+                self.columns[name].tofile(f)
+
+    @classmethod
+    def load(cls, path):
+        store = cls()
+        with open(path, 'rb') as f:
+            if f.read(len(_MAGIC)) != _MAGIC:
+                raise ValueError(f"{path} 不是操作符存储文件")
+            header_size, = struct.unpack('<Q', f.read(8))
+            header = json.loads(f.read(header_size).decode('utf-8'))
+            for name, typecode in header['columns']:
+                column = array(typecode)
+                column.fromfile(f, header['rows'])
+                if header['byteorder'] != sys.byteorder:
+                    column.byteswap()
+                store.columns[name] = column
+        store.dictionaries = header['dictionaries']
+        store._codes = {name: {value: code for code, value in enumerate(values)}
+                        for name, values in store.dictionaries.items()}
+        store.plan_keys = header['plan_keys']
+        return store
@@ -0,0 +1,69 @@
+# 大型执行计划的流式解析
+# 使用 iterparse 增量解析 showplan，每解析完一个 StmtSimple 子树就交给调用方审计，
+# 审计后立即清理并从父元素中移除，内存占用只与单条语句的计划大小有关。
+import os
+import xml.etree.ElementTree as ET
+
+from mapped_file import showplan_parser
+from plan_model import local_name
+
+# 这些语句元素是 Statements 的直接子元素，处理完即可丢弃
+_STATEMENT_TAGS = ('StmtSimple', 'StmtCond', 'StmtCursor', 'StmtReceive', 'StmtUseDb')
+
+
+def iter_statement_plans(source):
+    """
+    增量解析执行计划，按文档顺序逐个返回最外层的 StmtSimple 元素。
+
+    source 可以是文件路径或以二进制方式打开的文件对象，编码的处理与 mapped_file.parse_xml_buffer 相同。
+    返回的元素在调用方处理完、迭代器继续前进时会被清空，调用方不要在迭代之外保留对它的引用。
+    """
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, 'rb') as f:
+            yield from iter_statement_plans(f)
+        return
+    # 先读出开头的字节判断是否有 BOM，再把它们放回流的前面
+    head = source.read(2)
+    parser = showplan_parser(head)
+    source = _PrefixedReader(head, source)
+
+    # 当前打开的元素路径，用于在处理完后把元素从父元素中移除
+    open_elements = []
+    stmt_depth = 0
+    for event, element in ET.iterparse(source, events=('start', 'end'), parser=parser):
+        if event == 'start':
+            open_elements.append(element)
+            if local_name(element.tag) == 'StmtSimple':
+                stmt_depth += 1
+            continue
+
+        open_elements.pop()
+        tag = local_name(element.tag)
+        if tag == 'StmtSimple':
+            stmt_depth -= 1
+            if stmt_depth == 0:
+                yield element
+                _discard(element, open_elements)
+        elif tag in _STATEMENT_TAGS and stmt_depth == 0:
+            # StmtCond 等复合语句中的 StmtSimple 已经逐个处理过，剩下的部分直接丢弃
+            _discard(element, open_elements)
+
+
+class _PrefixedReader:
+    """在文件对象前面接上已经读出的字节，供 iterparse 读取。"""
+
+    def __init__(self, prefix, source):
+        self._prefix = prefix
+        self._source = source
+
+    def read(self, size=-1):
+        if self._prefix:
+            data, self._prefix = self._prefix, b''
+            return data
+        return self._source.read(size)
+
+
+def _discard(element, open_elements):
+    element.clear()
+    if open_elements:
+        open_elements[-1].remove(element)
@@ -0,0 +1,145 @@
+# 执行计划单次遍历引擎
+# 执行计划只从根节点遍历一次，每个节点按标签和 PhysicalOp 分发给注册的节点规则，
+# 遍历过程中收集的事实（按标签/操作符索引、父子关系等）供审计规则直接读取，
+# 避免每条规则都用 root.findall(".//...") 重新扫描整棵树。
+# 遍历时同时去掉 showplan 命名空间前缀，并把 RelOp 解析为 plan_model 中的紧凑节点。
+from plan_model import PlanModel, local_name
+
+# 按标签注册的节点规则：{标签: [处理函数, ...]}
+_TAG_RULES = {}
+# 按 PhysicalOp 注册的节点规则：{物理操作符: [处理函数, ...]}
+_OP_RULES = {}
+
+
+def register_node_rule(tag=None, physical_op=None):
+    """
+    注册节点级规则的装饰器。
+
+    遍历执行计划时，标签等于 tag 或 PhysicalOp 等于 physical_op 的节点会被分发给该规则，
+    physical_op 为 '*' 时所有带 PhysicalOp 属性的节点都会分发给该规则。
+    处理函数的签名为 handler(element, facts)，通常把命中的节点写入 facts.collect()。
+    """
+    def decorator(handler):
+        if tag is not None:
+            _TAG_RULES.setdefault(tag, []).append(handler)
+        if physical_op is not None:
+            _OP_RULES.setdefault(physical_op, []).append(handler)
+        return handler
+
+    return decorator
+
+
+class PlanFacts:
+    """一次遍历执行计划后收集到的事实，所有规则共享。"""
+
+    def __init__(self, root):
+        self.root = root
+        # 按文档顺序排列的全部节点，包括根节点：按语句审计时根节点就是 StmtSimple，
+        # 规则通过 nodes('StmtSimple') 查找语句时必须能找到它
+        self.elements = []
+        self.by_tag = {}
+        self.by_op = {}
+        self.parent_map = {}
+        # RelOp 操作符的紧凑模型，见 plan_model.PlanModel
+        self.model = PlanModel()
+        # 节点规则收集的结果：{事实名称: [节点, ...]}
+        self.collected = {}
+
+    def nodes(self, tag):
+        """返回指定标签的全部节点，相当于 root.iter(tag)（包括根节点本身）。"""
+        return self.by_tag.get(tag, [])
+
+    def ops(self, physical_op):
+        """返回 PhysicalOp 为指定值的全部节点。"""
+        return self.by_op.get(physical_op, [])
+
+    def collect(self, name, element):
+        self.collected.setdefault(name, []).append(element)
+
+    def get(self, name):
+        """返回节点规则以 name 收集的节点列表。"""
+        return self.collected.get(name, [])
+
+    def parent(self, element):
+        return self.parent_map.get(element)
+
+    def node(self, element):
+        """返回 RelOp 元素对应的 PlanNode。"""
+        return self.model.node_for(element)
+
+    def ancestors(self, element):
+        """由近及远依次返回 element 的祖先节点。"""
+        parent = self.parent_map.get(element)
+        while parent is not None:
+            yield parent
+            parent = self.parent_map.get(parent)
+
+    def next_sibling(self, element):
+        parent = self.parent_map.get(element)
+        if parent is None:
+            return None
+        siblings = list(parent)
+        index = siblings.index(element)
+        return siblings[index + 1] if index + 1 < len(siblings) else None
+
+    def following_siblings(self, element):
+        parent = self.parent_map.get(element)
+        if parent is None:
+            return []
+        siblings = list(parent)
+        return siblings[siblings.index(element) + 1:]
+
+    def preceding_siblings(self, element):
+        parent = self.parent_map.get(element)
+        if parent is None:
+            return []
+        siblings = list(parent)
+        return siblings[:siblings.index(element)]
+
+
+def walk_plan(root):
+    """
+    从根节点开始按文档顺序遍历执行计划一次，建立索引并分发节点规则。
+
+    元素标签会被就地改为不带命名空间的本地名称，因此规则中的 ".//RelOp" 等路径
+    对真实的 showplan 同样有效。返回 PlanFacts 对象。
+    """
+    facts = PlanFacts(root)
+    elements = facts.elements
+    by_tag = facts.by_tag
+    by_op = facts.by_op
+    parent_map = facts.parent_map
+    model = facts.model
+
+    # 使用显式栈代替递归，子节点逆序入栈以保持文档顺序；
+    # 每项附带最近的 RelOp 祖先在模型中的下标
+    stack = [(root, None, -1)]
+    while stack:
+        element, parent, relop_parent = stack.pop()
+        if parent is not None:
+            parent_map[element] = parent
+        elements.append(element)
+
+        tag = local_name(element.tag)
+        element.tag = tag
+        if tag == 'RelOp':
+            relop_parent = model.add(element, relop_parent).index
+        elif tag == 'RunTimeCountersPerThread' and relop_parent >= 0:
+            # 实际执行计划的运行时计数器归属于最近的 RelOp
+            model.nodes[relop_parent].add_runtime_counters(element)
+        by_tag.setdefault(tag, []).append(element)
+        for handler in _TAG_RULES.get(tag, ()):
+            handler(element, facts)
+
+        physical_op = element.get('PhysicalOp')
+        if physical_op is not None:
+            by_op.setdefault(physical_op, []).append(element)
+            for handler in _OP_RULES.get(physical_op, ()):
+                handler(element, facts)
+            for handler in _OP_RULES.get('*', ()):
+                handler(element, facts)
+
+        if len(element):
+            stack.extend((child, element, relop_parent) for child in reversed(element))
+
+    return facts
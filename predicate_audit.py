@@ -0,0 +1,198 @@
+# 查找谓词与剩余谓词分析
+# 对每个索引查找/扫描操作符，区分能用于定位的 SeekPredicates 和读取后再过滤的剩余 Predicate，
+# 估算读取后被丢弃的行数，找出无法使用索引的（非 SARGable）剩余谓词，
+# 并结合 indexes_audit 从 sys.index_columns 读取的索引定义，给出能把剩余谓词变为查找谓词的键列顺序。
+import xml.etree.ElementTree as ET
+
+from indexes_audit import get_index_columns
+from plan_model import _to_float, unquote_identifier
+from plan_visitor import walk_plan
+
+_ACCESS_OPS = ('Index Seek', 'Clustered Index Seek', 'Index Scan', 'Clustered Index Scan', 'Table Scan')
+_EQUALITY_OPS = ('EQ', 'IS')
+_RANGE_OPS = ('LT', 'LE', 'GT', 'GE')
+# 读取至少这么多行、且返回的行不到读取行数的该比例时，认为剩余谓词丢弃了大量的行
+MIN_ROWS_READ = 1000
+DISCARD_RATIO = 0.1
+
+
+def _add(columns, name):
+    if name and name not in columns:
+        columns.append(name)
+
+
+def _seek_columns(access):
+    """返回 (等值查找列, 范围查找列)。"""
+    equality, ranges = [], []
+    for seek_range in access.iter():
+        if seek_range.tag not in ('Prefix', 'StartRange', 'EndRange'):
+            continue
+        target = equality if seek_range.tag == 'Prefix' and seek_range.get('ScanType') == 'EQ' else ranges
+        for reference in seek_range.findall('RangeColumns/ColumnReference'):
+            _add(target, reference.get('Column'))
+    return equality, [column for column in ranges if column not in equality]
+
+
+def _residual_columns(predicate):
+    """返回剩余谓词中的 (等值比较列, 范围比较列, 非 SARGable 列)。"""
+    equality, ranges, non_sargable = [], [], []
+    for compare in predicate.iter('Compare'):
+        compare_op = compare.get('CompareOp')
+        for side in compare.findall('ScalarOperator'):
+            child = side[0] if len(side) else None
+            if child is not None and child.tag == 'Identifier':
+                reference = child.find('ColumnReference')
+                if reference is None or not reference.get('Table'):
+                    continue
+                if compare_op in _EQUALITY_OPS:
+                    _add(equality, reference.get('Column'))
+                elif compare_op in _RANGE_OPS:
+                    _add(ranges, reference.get('Column'))
+            else:
+                # 列被函数、转换或运算包住时无法用于索引查找
+                for reference in side.iter('ColumnReference'):
+                    if reference.get('Table'):
+                        _add(non_sargable, reference.get('Column'))
+    for function in predicate.iter('Intrinsic'):
+        for reference in function.iter('ColumnReference'):
+            if reference.get('Table'):
+                _add(non_sargable, reference.get('Column'))
+    return equality, ranges, non_sargable
+
+
+def _rows_read(node):
+    """返回 (读取行数, 返回行数, 是否为实际值)，无法得知读取行数时返回 None。"""
+    element = node.element
+    if node.has_actuals:
+        counters = element.findall('RunTimeInformation/RunTimeCountersPerThread')
+        if any(counter.get('ActualRowsRead') is not None for counter in counters):
+            return sum(_to_float(counter.get('ActualRowsRead')) for counter in counters), node.actual_rows, True
+    rows_read = element.get('EstimatedRowsRead')
+    if rows_read is None and 'Scan' in node.physical_op:
+        rows_read = element.get('TableCardinality')
+    if rows_read is None:
+        return None
+    return _to_float(rows_read), node.estimate_rows, False
+
+
+def analyze_predicates(facts):
+    """
+    分析执行计划中每个索引查找/扫描操作符的谓词。
+
+    facts 为 plan_visitor.walk_plan 的返回值。返回字典列表：node、table、index、seek_equality、seek_range、
+    residual_equality、residual_range、non_sargable、rows_read、rows_returned、actual。
+    """
+    analyses = []
+    for physical_op in _ACCESS_OPS:
+        for relop in facts.ops(physical_op):
+            access = relop.find('IndexScan')
+            if access is None:
+                access = relop.find('TableScan')
+            if access is None:
+                continue
+            scan_object = access.find('Object')
+            seek_equality, seek_range = _seek_columns(access)
+            residual_equality, residual_range, non_sargable = [], [], []
+            predicate = access.find('Predicate')
+            if predicate is not None:
+                residual_equality, residual_range, non_sargable = _residual_columns(predicate)
+            node = facts.node(relop)
+            rows = _rows_read(node)
+            analyses.append({
+                'node': node,
+                'table': unquote_identifier(scan_object.get('Table')) if scan_object is not None else '',
+                'index': unquote_identifier(scan_object.get('Index')) if scan_object is not None else None,
+                'seek_equality': seek_equality,
+                'seek_range': seek_range,
+                'residual_equality': residual_equality,
+                'residual_range': residual_range,
+                'non_sargable': non_sargable,
+                'rows_read': rows[0] if rows else None,
+                'rows_returned': rows[1] if rows else None,
+                'actual': rows[2] if rows else False,
+            })
+    analyses.sort(key=lambda analysis: analysis['node'].index)
+    return analyses
+
+
+def _label(analysis):
+    node = analysis['node']
+    target = analysis['table'] + (f".{analysis['index']}" if analysis['index'] else '')
+    return f"节点 {node.node_id} {node.physical_op} {target}"
+
+
+def residual_predicate_issues(facts):
+    """只根据执行计划报告剩余谓词丢弃的行数和非 SARGable 谓词，返回问题列表。"""
+    issues = []
+    for analysis in analyze_predicates(facts):
+        residual = analysis['residual_equality'] + analysis['residual_range'] + analysis['non_sargable']
+        rows_read = analysis['rows_read']
+        if residual and rows_read is not None and rows_read >= MIN_ROWS_READ \
+                and analysis['rows_returned'] < rows_read * DISCARD_RATIO:
+            kind = '实际' if analysis['actual'] else '预估'
+            seek = ', '.join(analysis['seek_equality'] + analysis['seek_range']) or '无'
+            issues.append(f"警告: {_label(analysis)} {kind}读取 {rows_read:.0f} 行，经剩余谓词（{', '.join(residual)}）"
+                          f"过滤后只返回 {analysis['rows_returned']:.0f} 行，丢弃了 "
+                          f"{rows_read - analysis['rows_returned']:.0f} 行。查找谓词列: {seek}。")
+        if analysis['non_sargable']:
+            issues.append(f"警告: {_label(analysis)} 的剩余谓词中列 {', '.join(analysis['non_sargable'])} "
+                          f"被函数、转换或运算包住（非 SARGable），无法用于索引查找。")
+    return issues
+
+
+def key_order_issues(analyses, index_columns):
+    """
+    结合索引定义，指出哪些剩余谓词列换一种键列顺序就可以用于查找。
+
+    index_columns 为 indexes_audit.get_index_columns 的返回值。
+    """
+    issues = []
+    for analysis in analyses:
+        candidates = [column for column in analysis['residual_equality'] + analysis['residual_range']
+                      if column not in analysis['non_sargable']]
+        if not candidates or not analysis['index']:
+            continue
+        index = index_columns.get(analysis['table'], {}).get(analysis['index'])
+        if index is None:
+            continue
+        keys = index['key_columns']
+        # 等值列在前、范围列在后，每个索引只能有一个范围查找列
+        equality = analysis['seek_equality'] + [column for column in analysis['residual_equality']
+                                                if column not in analysis['seek_equality']]
+        ranges = [column for column in analysis['seek_range'] + analysis['residual_range'] if column not in equality]
+        proposed = equality + ranges[:1]
+        proposed += [column for column in keys if column not in proposed]
+        if proposed[:len(keys)] == keys:
+            continue
+
+        notes = []
+        for column in candidates:
+            if column in keys:
+                notes.append(f"{column} 是第 {keys.index(column) + 1} 个键列，但前面的键列没有被等值查找")
+            elif column in index['included_columns']:
+                notes.append(f"{column} 只是包含列")
+            else:
+                notes.append(f"{column} 不在索引中")
+        issues.append(f"提示: {_label(analysis)} 的剩余谓词列 {', '.join(candidates)} 无法用于查找"
+                      f"（{'；'.join(notes)}）。当前键列顺序为 ({', '.join(keys)})，"
+                      f"按 ({', '.join(proposed)}) 的顺序建立索引可以把它们变为查找谓词。")
+    return issues
+
+
+def audit_predicates(plan_xml, conn, verbose=True):
+    """分析执行计划的剩余谓词，并用数据库中的索引定义给出键列顺序的建议。返回问题列表。"""
+    try:
+        root = ET.fromstring(plan_xml)
+    except Exception as e:
+        print(f"解析执行计划时出错: {e}")
+        return
+    analyses = analyze_predicates(walk_plan(root))
+    tables = sorted({analysis['table'] for analysis in analyses
+                     if analysis['table'] and (analysis['residual_equality'] or analysis['residual_range'])})
+    if not tables:
+        return []
+    issues = key_order_issues(analyses, get_index_columns(conn, tables))
+    if verbose:
+        for issue in issues:
+            print(issue)
+    return issues
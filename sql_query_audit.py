@@ -0,0 +1,683 @@
+from collections import deque
+from functools import lru_cache
+
+from sqlparse.sql import IdentifierList, Identifier
+from sqlparse import lexer
+from sqlparse.tokens import Comment, DML, Keyword, String, Whitespace
+from sql_metadata import Parser
+from mapped_file import iter_sql_file
+
+def extract_tables_from_sql(sql):
+    """使用 sql-metadata 库的 Parser 类从 SQL 查询中提取表名。"""
+    return Parser(sql).tables
+
+def _extract_table_identifiers(token_stream):
+    """Yield table names from a stream of tokens."""
+    if not hasattr(token_stream, 'tokens'):
+        return
+
+    for item in token_stream.tokens:
+        if isinstance(item, IdentifierList):
+            for identifier in item.get_identifiers():
+                yield identifier.get_real_name()
+        elif isinstance(item, Identifier):
+            yield item.get_real_name()
+
+def _is_subselect(parsed):
+    """Return True if statement is a subselect."""
+    if not parsed.is_group:
+        return False
+    for item in parsed.tokens:
+        if item.ttype is DML and item.value.upper() == 'SELECT':
+            return True
+    return False
+
+def _extract_from_part(parsed):
+    """Extract table names from FROM part of the statement."""
+    tables = set()
+    from_seen = False
+    for item in parsed.tokens:
+        if from_seen:
+            if _is_subselect(item):
+                tables.update(_extract_from_part(item))
+            elif item.ttype is Keyword:
+                from_seen = False
+            else:
+                tables.update(_extract_table_identifiers(item))
+        elif item.ttype is Keyword and item.value.upper() == 'FROM':
+            from_seen = True
+    return tables
+
+# 词法分析后出现在 FROM 子句所在括号层级时，表示 FROM 子句已经结束的关键字
+_FROM_CLAUSE_END = frozenset({
+    'WHERE', 'GROUP', 'ORDER', 'HAVING', 'UNION', 'EXCEPT', 'INTERSECT', 'OPTION', 'FOR', 'WINDOW', ';',
+    'SELECT', 'INSERT', 'UPDATE', 'DELETE', 'MERGE', 'SET', 'DECLARE', 'EXEC', 'EXECUTE', 'IF', 'ELSE',
+    'BEGIN', 'END', 'RETURN',
+})
+_COMPARISON_OPERATORS = frozenset({'=', '<>', '!=', '<', '>', '<=', '>='})
+
+def _normalized_tokens(sql):
+    """对 SQL 做词法分析，跳过空白和注释，关键字和名称转为大写，字符串常量保留原文。"""
+    for ttype, value in lexer.tokenize(sql):
+        if ttype in Whitespace or ttype in Comment:
+            continue
+        if ttype in String.Single:
+            yield value
+        elif ttype in Keyword:
+            # ORDER BY、LEFT OUTER JOIN 等多个单词的关键字拆开，中间的空白和换行不影响匹配
+            yield from value.upper().split()
+        else:
+            yield value.upper()
+
+@lru_cache(maxsize=None)
+def _pattern_tokens(pattern):
+    """把规则中的 SQL 片段切分为记号元组，'?' 匹配任意一个记号。"""
+    return tuple(_normalized_tokens(pattern))
+
+def _is_string_literal(token):
+    return token[:1] == "'"
+
+class QueryTokens:
+    """
+    只做一次词法分析的查询记号序列，规则在记号上匹配，而不是在原始文本中查找子串。
+
+    注释和字符串常量中的内容不会被当作关键字，匹配不区分大小写，也不受空白和换行影响。
+    分析时按记号建立位置索引，并记录 FROM 子句中是否用逗号连接了多个表（旧式连接语法）。
+    """
+
+    def __init__(self, query):
+        self.tokens = []
+        self.positions = {}
+        self.old_style_join = False
+        depth = 0
+        from_depths = set()
+        for token in _normalized_tokens(query):
+            if token == '(':
+                depth += 1
+            elif token == ')':
+                from_depths.discard(depth)
+                depth = max(depth - 1, 0)
+            elif token == 'FROM':
+                from_depths.add(depth)
+            elif token == ',':
+                self.old_style_join = self.old_style_join or depth in from_depths
+            elif token in _FROM_CLAUSE_END:
+                from_depths.discard(depth)
+            self.positions.setdefault(token, []).append(len(self.tokens))
+            self.tokens.append(token)
+
+    def _matches(self, pattern):
+        pattern = _pattern_tokens(pattern)
+        tokens = self.tokens
+        for start in self.positions.get(pattern[0], ()):
+            if len(tokens) - start >= len(pattern) and all(
+                    expected == '?' or expected == tokens[start + offset]
+                    for offset, expected in enumerate(pattern[1:], 1)):
+                yield start
+
+    def has(self, pattern):
+        """查询中是否出现 SQL 片段 pattern，例如 has("WITH (NOLOCK)")。"""
+        return next(self._matches(pattern), None) is not None
+
+    def has_prefix(self, prefix):
+        """是否有以 prefix 开头的记号，例如全局临时表 ##name 和 sp_OA* 存储过程。"""
+        prefix = prefix.upper()
+        return any(token.startswith(prefix) for token in self.positions)
+
+    def _next_to_string_literal(self, operators):
+        tokens = self.tokens
+        for operator in operators:
+            for position in self.positions.get(operator, ()):
+                following = tokens[position + 1:position + 3]
+                # N'...' 在词法上是名称 N 加字符串常量
+                if following[:1] == ['N']:
+                    following = following[1:]
+                if (position > 0 and _is_string_literal(tokens[position - 1])) or \
+                        (following and _is_string_literal(following[0])):
+                    return True
+        return False
+
+    def leading_wildcard(self):
+        """LIKE 的模式是否为以 % 开头的字符串常量。"""
+        for position in self.positions.get('LIKE', ()):
+            following = self.tokens[position + 1:position + 3]
+            if following[:1] == ['N']:
+                following = following[1:]
+            if following and following[0].startswith("'%"):
+                return True
+        return False
+
+    def string_concatenation(self):
+        """是否用 + 连接字符串常量。"""
+        return self._next_to_string_literal(('+',))
+
+    def literal_comparison(self):
+        """是否把列或变量直接与字符串常量比较（拼接进语句而不是参数化的值）。"""
+        return self._next_to_string_literal(_COMPARISON_OPERATORS)
+
+class KeywordMatcher:
+    """
+    Aho-Corasick 多模式匹配自动机，模式和输入都是记号序列。
+
+    构建时把所有 SQL 片段切分为记号插入字典树并计算失败链接；匹配时对查询的记号序列只做一次线性扫描，
+    耗时只与记号数和命中次数有关，不随规则数量增加。
+    """
+
+    def __init__(self, patterns):
+        self.patterns = tuple(dict.fromkeys(patterns))
+        self._goto = [{}]
+        self._output = [[]]
+        for pattern in self.patterns:
+            state = 0
+            for token in _pattern_tokens(pattern):
+                next_state = self._goto[state].get(token)
+                if next_state is None:
+                    next_state = self._goto[state][token] = len(self._goto)
+                    self._goto.append({})
+                    self._output.append([])
+                state = next_state
+            self._output[state].append(pattern)
+
+        # 按广度优先计算失败链接，较浅状态的输出已经合并完毕，可以直接并入
+        self._fail = [0] * len(self._goto)
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for token, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fail = self._fail[state]
+                while fail and token not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[next_state] = self._goto[fail].get(token, 0)
+                self._output[next_state] = self._output[next_state] + self._output[self._fail[next_state]]
+
+    def search(self, tokens):
+        """返回 {片段: 出现次数}，包含所有片段；查询未编译进自动机的片段会抛出 KeyError。"""
+        counts = dict.fromkeys(self.patterns, 0)
+        goto, fail, output = self._goto, self._fail, self._output
+        state = 0
+        for token in tokens:
+            while state and token not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(token, 0)
+            for pattern in output[state]:
+                counts[pattern] += 1
+        return counts
+
+# 关键字规则表：(SQL 片段, 消息)，任一片段出现时报告。片段按记号匹配，不区分大小写。
+# 每个片段只属于一条规则，与前面规则重复的片段只保留在第一条规则中。一条规则的片段包含另一条规则的较短片段时
+# （例如 SELECT DISTINCT 和 DISTINCT），这些出现由较长片段的规则报告，较短片段的规则只报告其余的出现。
+_KEYWORD_RULES = (
+    # 规则1：检查是否使用了NOLOCK
+    (("NOLOCK",), "警告: 使用NOLOCK可能会读取到未提交的数据。确保你知道你在做什么。"),
+    # 规则4：检查是否使用了SET ROWCOUNT
+    (("SET ROWCOUNT",), "警告: SET ROWCOUNT已被弃用，考虑使用TOP子句。"),
+    # 规则5：检查是否使用了星号(*)来选择所有列
+    (("SELECT *",), "警告: 使用具体的列名而不是星号(*)来选择列，以提高性能和可读性。"),
+    # 规则8：检查是否使用了CURSOR
+    (("CURSOR",), "警告: 尽量避免使用CURSOR，因为它们通常比集合操作慢。"),
+    # 规则9：检查是否使用了动态SQL
+    (("sp_executesql", "EXEC(",), "警告: 使用动态SQL时要小心，确保正确地参数化查询以避免SQL注入。"),
+    # 规则11：检查是否使用了索引提示
+    (("WITH (INDEX(",), "警告: 使用索引提示可能会影响查询优化器的决策。确保你知道你在做什么。"),
+    # 规则12：检查是否使用了表扫描
+    (("TABLE SCAN",), "警告: 表扫描可能会影响性能，考虑优化查询或添加适当的索引。"),
+    # 规则14：检查子查询的使用
+    (("(SELECT",), "警告: 子查询可能导致性能问题，考虑是否可以使用JOIN重写。"),
+    # 规则15：检查WHERE子句中的函数使用
+    (("WHERE UPPER(", "WHERE LOWER(",), "警告: 在WHERE子句中使用函数可能影响索引的使用。"),
+    # 规则16：检查HAVING子句的使用
+    (("HAVING",), "警告: 过度使用HAVING子句可能导致性能问题。"),
+    # 规则18：检查DISTINCT的过度使用
+    (("SELECT DISTINCT",), "警告: 过度使用DISTINCT可能导致额外的去重开销。"),
+    # 规则20：检查FLOAT和REAL数据类型的使用
+    (("FLOAT", "REAL",), "警告: FLOAT和REAL数据类型可能导致不精确的比较。"),
+    # 规则21：检查WHERE子句中的非确定性函数使用
+    (("WHERE GETDATE()",), "警告: 在WHERE子句中使用非确定性函数可能阻止使用索引。"),
+    # 规则22：检查@@IDENTITY的使用
+    (("@@IDENTITY",), "警告: 使用@@IDENTITY可能返回错误的值。考虑使用SCOPE_IDENTITY()或IDENT_CURRENT('table_name')。"),
+    # 规则23：检查RECOMPILE查询提示的使用
+    (("OPTION (RECOMPILE)",), "警告: 不要使用RECOMPILE查询提示，除非有充分的理由。"),
+    # 规则13：检查是否使用了视图
+    (("VIEW",), "提示: 使用视图可以提高查询的可读性，但可能会影响性能。"),
+    # 规则15：检查是否使用了FOR XML或FOR JSON
+    (("FOR XML", "FOR JSON",), "提示: 使用FOR XML或FOR JSON可以将结果转换为XML或JSON格式。"),
+    # 规则18：检查是否使用了非持久化的计算列
+    (("COMPUTE",), "警告: 使用COMPUTE生成报告格式的输出，但它已被弃用。"),
+    # 规则19：检查是否使用了WAITFOR DELAY或WAITFOR TIME
+    (("WAITFOR DELAY", "WAITFOR TIME",), "警告: 使用WAITFOR可以引入延迟，确保你知道你在做什么。"),
+    # 规则20：检查是否使用了OPENQUERY或OPENROWSET
+    (("OPENQUERY", "OPENROWSET",), "警告: 使用OPENQUERY或OPENROWSET可以查询其他服务器，但可能会引入安全风险。"),
+    # 规则21：检查是否使用了xp_cmdshell存储过程
+    (("xp_cmdshell",), "警告: xp_cmdshell可以执行操作系统命令，但可能会引入安全风险。"),
+    # 规则24：检查是否使用了分区函数或方案
+    (("PARTITION BY",), "提示: 使用分区可以提高查询和管理性能。"),
+    # 规则26：检查是否使用了全文搜索
+    (("CONTAINS", "FREETEXT",), "提示: 使用全文搜索可以提高文本查询的性能。"),
+    # 规则27：检查是否使用了大型对象数据类型
+    (("TEXT", "NTEXT", "IMAGE",), "警告: TEXT, NTEXT, 和 IMAGE 数据类型已被弃用，考虑使用VARCHAR(MAX), NVARCHAR(MAX) 和 VARBINARY(MAX)。"),
+    # 规则28：检查是否使用了非确定性函数
+    (("NEWID()", "RAND()",), "警告: 使用非确定性函数可能会导致不可预测的结果。"),
+    # 规则29：检查是否使用了CLR集成
+    (("ASSEMBLY",), "提示: 使用CLR集成可以执行.NET代码，但需要确保安全性。"),
+    # 规则30：检查是否使用了表值参数
+    (("READONLY",), "提示: 使用表值参数可以传递多行数据给存储过程或函数。"),
+    # 规则32：检查是否使用了不推荐的SET选项
+    (("SET ANSI_NULLS OFF", "SET QUOTED_IDENTIFIER OFF",), "警告: 使用不推荐的SET选项可能会导致不可预测的结果。"),
+    # 规则33：检查是否使用了不安全的配置选项
+    (("sp_configure",), "警告: 修改配置选项可能会引入安全风险。"),
+    # 规则34：检查是否使用了不推荐的旧式TOP语法
+    (("TOP 100 PERCENT",), "警告: 使用旧式的TOP 100 PERCENT语法可能不会按预期工作。"),
+    # 规则35：检查是否使用了不必要的CAST或CONVERT
+    (("CAST(0 AS", "CONVERT(INT, 0)",), "警告: 使用不必要的CAST或CONVERT可能会影响性能。"),
+    # 规则36：检查是否使用了不推荐的ISNULL函数
+    (("ISNULL",), "提示: 考虑使用COALESCE函数代替ISNULL，因为它更加灵活。"),
+    # 规则37：检查是否使用了不推荐的星号(*)来计数
+    (("COUNT(*)",), "提示: 考虑使用COUNT(1)代替COUNT(*)，因为它可能更加高效。"),
+    # 规则40：检查是否使用了不推荐的LEN函数来计算数据长度
+    (("LEN(",), "提示: 使用DATALENGTH函数代替LEN，因为它可以返回更准确的长度。"),
+    # 规则41：检查是否使用了不推荐的远程过程调用(RPC)
+    (("sp_serveroption",), "警告: 使用远程过程调用(RPC)可能会引入安全风险和性能问题。"),
+    # 规则42：检查是否使用了不推荐的IDENTITY_INSERT设置
+    (("SET IDENTITY_INSERT",), "警告: 使用IDENTITY_INSERT可能会导致数据完整性问题。"),
+    # 规则43：检查是否使用了不推荐的SQL_VARIANT数据类型
+    (("SQL_VARIANT",), "警告: SQL_VARIANT数据类型可能会导致性能问题和数据不一致。"),
+    # 规则44：检查是否使用了不推荐的表提示
+    (("WITH (TABLOCKX)", "WITH (PAGLOCK)",), "警告: 使用某些表提示可能会导致锁定问题。"),
+    # 规则45：检查是否使用了不推荐的SET选项
+    (("SET ARITHABORT", "SET ARITHIGNORE",), "警告: 使用某些SET选项可能会导致不可预测的结果。"),
+    # 规则46：检查是否使用了不推荐的统计函数
+    (("FN_STATS",), "警告: 使用不推荐的统计函数可能会导致性能问题。"),
+    # 规则47：检查是否使用了不推荐的系统视图
+    (("sysobjects", "syscolumns",), "警告: 使用旧的系统视图可能会导致不可预测的结果。考虑使用新的系统视图。"),
+    # 规则48：检查是否使用了不推荐的全局变量
+    (("@@PROCID",), "警告: 使用某些全局变量可能会导致不可预测的结果。"),
+    # 规则49：检查是否使用了不推荐的WAITFOR语句
+    (("WAITFOR DELAY '00:00:10'",), "警告: 使用WAITFOR DELAY可能会导致不必要的延迟。"),
+    # 规则50：检查是否使用了不推荐的DEADLOCK_PRIORITY设置
+    (("SET DEADLOCK_PRIORITY",), "警告: 修改DEADLOCK_PRIORITY可能会导致死锁问题。"),
+    # 规则51：检查是否使用了不推荐的KILL语句
+    (("KILL",), "警告: 使用KILL语句可能会导致会话中断。"),
+    # 规则52：检查是否使用了不推荐的BREAK语句
+    (("BREAK",), "警告: 使用BREAK语句可能会导致循环或分支提前结束。"),
+    # 规则53：检查是否使用了不推荐的GOTO语句
+    (("GOTO",), "警告: 使用GOTO语句可能会导致代码难以理解和维护。"),
+    # 规则54：检查是否使用了不推荐的PRINT语句
+    (("PRINT",), "提示: 使用PRINT语句可以输出消息，但可能会影响性能。"),
+    # 规则55：检查是否使用了不推荐的RAISERROR语句
+    (("RAISERROR",), "警告: 使用RAISERROR语句可能会导致事务中断。"),
+    # 规则56：检查是否使用了不推荐的RECONFIGURE语句
+    (("RECONFIGURE",), "警告: 使用RECONFIGURE可能会导致服务器配置更改。"),
+    # 规则57：检查是否使用了不推荐的DBCC命令
+    (("DBCC",), "警告: 使用DBCC命令可能会导致数据库行为更改或性能问题。"),
+    # 规则58：检查是否使用了不推荐的TRUNCATE TABLE语句
+    (("TRUNCATE TABLE",), "警告: 使用TRUNCATE TABLE会删除所有行，且不可恢复。"),
+    # 规则59：检查是否使用了不推荐的DROP语句
+    (("DROP",), "警告: 使用DROP语句会永久删除对象。"),
+    # 规则60：检查是否使用了不推荐的SHUTDOWN语句
+    (("SHUTDOWN",), "警告: 使用SHUTDOWN会关闭SQL Server实例。"),
+    # 规则61：检查是否使用了不推荐的DENY语句
+    (("DENY",), "警告: 使用DENY会限制用户访问。确保你知道你在做什么。"),
+    # 规则62：检查是否使用了不推荐的xp_fixeddrives存储过程
+    (("xp_fixeddrives",), "提示: 使用xp_fixeddrives可以查看硬盘空间，但可能存在安全风险。"),
+    # 规则63：检查是否使用了不推荐的xp_dirtree存储过程
+    (("xp_dirtree",), "警告: 使用xp_dirtree可能会导致安全风险。"),
+    # 规则64：检查是否使用了不推荐的xp_regread存储过程
+    (("xp_regread",), "警告: 使用xp_regread可能会导致安全风险。"),
+    # 规则66：检查是否使用了不推荐的xp_loginconfig存储过程
+    (("xp_loginconfig",), "警告: 使用xp_loginconfig可能会导致安全风险。"),
+    # 规则67：检查是否使用了不推荐的xp_enumerrorlogs存储过程
+    (("xp_enumerrorlogs",), "警告: 使用xp_enumerrorlogs可能会导致安全风险。"),
+    # 规则68：检查是否使用了不推荐的xp_enumgroups存储过程
+    (("xp_enumgroups",), "警告: 使用xp_enumgroups可能会导致安全风险。"),
+    # 规则69：检查是否使用了不推荐的xp_logevent存储过程
+    (("xp_logevent",), "警告: 使用xp_logevent可能会导致安全风险。"),
+    # 规则70：检查是否使用了不推荐的xp_msver存储过程
+    (("xp_msver",), "警告: 使用xp_msver可能会导致安全风险。"),
+    # 规则71：检查是否使用了不推荐的xp_getnetname存储过程
+    (("xp_getnetname",), "警告: 使用xp_getnetname可能会导致安全风险。"),
+    # 规则72：检查是否使用了不推荐的xp_availablemedia存储过程
+    (("xp_availablemedia",), "警告: 使用xp_availablemedia可能会导致安全风险。"),
+    # 规则73：检查是否使用了不推荐的xp_delete_file存储过程
+    (("xp_delete_file",), "警告: 使用xp_delete_file可能会导致安全风险。"),
+    # 规则74：检查是否使用了不推荐的xp_fileexist存储过程
+    (("xp_fileexist",), "警告: 使用xp_fileexist可能会导致安全风险。"),
+    # 规则75：检查是否使用了不推荐的xp_servicecontrol存储过程
+    (("xp_servicecontrol",), "警告: 使用xp_servicecontrol可能会导致安全风险。"),
+    # 规则76：检查是否使用了不推荐的xp_sscanf存储过程
+    (("xp_sscanf",), "警告: 使用xp_sscanf可能会导致安全风险。"),
+    # 规则77：检查是否使用了不推荐的xp_terminate_process存储过程
+    (("xp_terminate_process",), "警告: 使用xp_terminate_process可能会导致安全风险。"),
+    # 规则78：检查是否使用了不推荐的xp_grantlogin存储过程
+    (("xp_grantlogin",), "警告: 使用xp_grantlogin可能会导致安全风险。"),
+    # 规则79：检查是否使用了不推荐的xp_revokelogin存储过程
+    (("xp_revokelogin",), "警告: 使用xp_revokelogin可能会导致安全风险。"),
+    # 规则80：检查是否使用了不推荐的xp_logininfo存储过程
+    (("xp_logininfo",), "警告: 使用xp_logininfo可能会导致安全风险。"),
+    # 规则81：检查是否使用了不推荐的xp_instance_regread存储过程
+    (("xp_instance_regread",), "警告: 使用xp_instance_regread可能会导致安全风险。"),
+    # 规则82：检查是否使用了不推荐的xp_regwrite存储过程
+    (("xp_regwrite",), "警告: 使用xp_regwrite可能会导致安全风险。"),
+    # 规则83：检查是否使用了不推荐的xp_regdeletevalue存储过程
+    (("xp_regdeletevalue",), "警告: 使用xp_regdeletevalue可能会导致安全风险。"),
+    # 规则84：检查是否使用了不推荐的xp_regdeletekey存储过程
+    (("xp_regdeletekey",), "警告: 使用xp_regdeletekey可能会导致安全风险。"),
+    # 规则85：检查是否使用了不推荐的xp_regremovemultistring存储过程
+    (("xp_regremovemultistring",), "警告: 使用xp_regremovemultistring可能会导致安全风险。"),
+    # 规则86：检查是否使用了不推荐的xp_makecab存储过程
+    (("xp_makecab",), "警告: 使用xp_makecab可能会导致安全风险。"),
+    # 规则87：检查是否使用了不推荐的xp_ntsec存储过程
+    (("xp_ntsec",), "警告: 使用xp_ntsec可能会导致安全风险。"),
+    # 规则88：检查是否使用了不推荐的xp_getfiledetails存储过程
+    (("xp_getfiledetails",), "警告: 使用xp_getfiledetails可能会导致安全风险。"),
+    # 规则101：检查是否使用了LEFT JOIN而不是INNER JOIN
+    (("LEFT JOIN",), "提示: 使用LEFT JOIN可能会返回NULL值，确保这是预期的结果。"),
+    # 规则102：检查是否使用了CROSS JOIN
+    (("CROSS JOIN",), "警告: 使用CROSS JOIN可能会导致大量的结果，确保这是预期的行为。"),
+    # 规则104：检查是否使用了ORDER BY RAND()
+    (("ORDER BY RAND()",), "警告: 使用ORDER BY RAND()可能会导致性能问题。"),
+    # 规则107：检查是否使用了DISTINCT
+    (("DISTINCT",), "提示: 使用DISTINCT可能会影响性能，确保其是必要的。"),
+    # 规则108：检查是否使用了COUNT(DISTINCT column)
+    (("COUNT(DISTINCT",), "提示: 使用COUNT(DISTINCT column)可能会影响性能。"),
+    # 规则111：检查是否使用了CASE语句在WHERE子句中
+    (("WHERE CASE",), "警告: 在WHERE子句中使用CASE语句可能会导致性能问题。"),
+    # 规则124：检查是否使用了不推荐的自动更新统计信息
+    (("AUTO_UPDATE_STATISTICS",), "提示: 确保你了解自动更新统计信息的影响，它可能会影响查询性能。"),
+    # 规则125：检查是否使用了不推荐的自动创建统计信息
+    (("AUTO_CREATE_STATISTICS",), "提示: 确保你了解自动创建统计信息的影响，它可能会影响查询性能。"),
+    # 规则128：检查是否使用了不推荐的非SARGable查询
+    (("DATEPART(", "YEAR(", "MONTH(", "DAY(",), "警告: 使用这些日期函数可能会导致非SARGable查询，影响性能。"),
+    # 规则137：检查是否使用了不推荐的OPENDATASOURCE
+    (("OPENDATASOURCE",), "警告: 使用OPENDATASOURCE可能会导致性能问题和SQL注入风险。"),
+    # 规则138：检查是否使用了不推荐的动态SQL
+    (("EXECUTE(",), "警告: 使用动态SQL可能会导致SQL注入风险。"),
+    # 规则139：检查是否使用了不推荐的表值函数
+    (("CROSS APPLY", "OUTER APPLY",), "提示: 使用表值函数可能会导致性能问题。"),
+    # 规则148：检查是否使用了不推荐的索引扫描
+    (("INDEX SCAN",), "警告: 使用索引扫描可能会导致性能问题。"),
+    # 规则150：检查是否使用了不推荐的UPDATE锁
+    (("WITH (UPDLOCK)",), "警告: 使用UPDATE锁可能会导致死锁。"),
+    # 规则151：检查是否使用了不推荐的NOLOCK查询提示
+    (("WITH (NOLOCK)",), "警告: 使用NOLOCK查询提示可能会导致脏读。"),
+    # 规则152：检查是否使用了不推荐的FORCESEEK查询提示
+    (("WITH (FORCESEEK)",), "提示: 使用FORCESEEK查询提示可能会导致性能问题。"),
+    # 规则153：检查是否使用了不推荐的FORCESCAN查询提示
+    (("WITH (FORCESCAN)",), "提示: 使用FORCESCAN查询提示可能会导致性能问题。"),
+    # 规则154：检查是否使用了不推荐的PAGELOCK查询提示
+    (("WITH (PAGELOCK)",), "警告: 使用PAGELOCK查询提示可能会导致锁争用。"),
+    # 规则155：检查是否使用了不推荐的ROWLOCK查询提示
+    (("WITH (ROWLOCK)",), "警告: 使用ROWLOCK查询提示可能会导致锁争用。"),
+    # 规则156：检查是否使用了不推荐的READPAST查询提示
+    (("WITH (READPAST)",), "提示: 使用READPAST查询提示可能会导致跳过锁定的行。"),
+    # 规则157：检查是否使用了不推荐的READCOMMITTED查询提示
+    (("WITH (READCOMMITTED)",), "提示: 使用READCOMMITTED查询提示可能会导致读已提交的数据。"),
+    # 规则158：检查是否使用了不推荐的READCOMMITTEDLOCK查询提示
+    (("WITH (READCOMMITTEDLOCK)",), "提示: 使用READCOMMITTEDLOCK查询提示可能会导致读已提交的数据并使用锁。"),
+    # 规则159：检查是否使用了不推荐的READUNCOMMITTED查询提示
+    (("WITH (READUNCOMMITTED)",), "警告: 使用READUNCOMMITTED查询提示可能会导致脏读。"),
+    # 规则160：检查是否使用了不推荐的REPEATABLEREAD查询提示
+    (("WITH (REPEATABLEREAD)",), "提示: 使用REPEATABLEREAD查询提示可能会导致重复读取。"),
+    # 规则161：检查是否使用了不推荐的SERIALIZABLE查询提示
+    (("WITH (SERIALIZABLE)",), "警告: 使用SERIALIZABLE查询提示可能会导致序列化隔离级别。"),
+    # 规则162：检查是否使用了不推荐的TABLOCK查询提示
+    (("WITH (TABLOCK)",), "警告: 使用TABLOCK查询提示可能会导致表级锁。"),
+    # 规则165：检查是否使用了不推荐的XLOCK查询提示
+    (("WITH (XLOCK)",), "警告: 使用XLOCK查询提示可能会导致排他锁。"),
+    # 规则168：检查是否使用了不推荐的NOEXPAND查询提示
+    (("WITH (NOEXPAND)",), "提示: 使用NOEXPAND查询提示可能会导致不展开视图。"),
+    # 规则169：检查是否使用了不推荐的KEEPFIXED PLAN查询提示
+    (("OPTION (KEEPFIXED PLAN)",), "提示: 使用KEEPFIXED PLAN查询提示可能会导致保持固定的查询计划。"),
+    # 规则170：检查是否使用了不推荐的KEEP PLAN查询提示
+    (("OPTION (KEEP PLAN)",), "提示: 使用KEEP PLAN查询提示可能会导致保持查询计划。"),
+    # 规则171：检查是否使用了不推荐的LOOP JOIN查询提示
+    (("OPTION (LOOP JOIN)",), "提示: 使用LOOP JOIN查询提示可能会导致循环连接。"),
+    # 规则172：检查是否使用了不推荐的MERGE JOIN查询提示
+    (("OPTION (MERGE JOIN)",), "提示: 使用MERGE JOIN查询提示可能会导致合并连接。"),
+    # 规则173：检查是否使用了不推荐的HASH JOIN查询提示
+    (("OPTION (HASH JOIN)",), "提示: 使用HASH JOIN查询提示可能会导致哈希连接。"),
+    # 规则174：检查是否使用了不推荐的FAST查询提示
+    (("OPTION (FAST",), "提示: 使用FAST查询提示可能会导致优化为快速响应。"),
+    # 规则175：检查是否使用了不推荐的FORCE ORDER查询提示
+    (("OPTION (FORCE ORDER)",), "警告: 使用FORCE ORDER查询提示可能会导致强制执行连接顺序。"),
+    # 规则176：检查是否使用了不推荐的OPTIMIZE FOR查询提示
+    (("OPTION (OPTIMIZE FOR",), "提示: 使用OPTIMIZE FOR查询提示可能会导致为特定值优化。"),
+    # 规则177：检查是否使用了不推荐的ROBUST PLAN查询提示
+    (("OPTION (ROBUST PLAN)",), "提示: 使用ROBUST PLAN查询提示可能会导致生成健壮的查询计划。"),
+    # 规则178：检查是否使用了不推荐的USE PLAN查询提示
+    (("OPTION (USE PLAN)",), "警告: 使用USE PLAN查询提示可能会导致使用特定的查询计划。"),
+    # 规则179：检查是否使用了不推荐的IGNORE_NONCLUSTERED_COLUMNSTORE_INDEX查询提示
+    (("OPTION (IGNORE_NONCLUSTERED_COLUMNSTORE_INDEX)",), "警告: 使用IGNORE_NONCLUSTERED_COLUMNSTORE_INDEX查询提示可能会导致忽略非聚集列存储索引。"),
+    # 规则180：检查是否使用了不推荐的MAXDOP查询提示
+    (("OPTION (MAXDOP",), "提示: 使用MAXDOP查询提示可能会导致限制并行度。"),
+    # 规则181：检查是否使用了不推荐的MAXRECURSION查询提示
+    (("OPTION (MAXRECURSION",), "提示: 使用MAXRECURSION查询提示可能会限制递归的深度。"),
+    # 规则182：检查是否使用了不推荐的MIN_GRANT_PERCENT查询提示
+    (("OPTION (MIN_GRANT_PERCENT",), "提示: 使用MIN_GRANT_PERCENT查询提示可能会设置最小的内存授权百分比。"),
+    # 规则183：检查是否使用了不推荐的MAX_GRANT_PERCENT查询提示
+    (("OPTION (MAX_GRANT_PERCENT",), "提示: 使用MAX_GRANT_PERCENT查询提示可能会设置最大的内存授权百分比。"),
+    # 规则184：检查是否使用了不推荐的NO_PERFORMANCE_SPOOL查询提示
+    (("OPTION (NO_PERFORMANCE_SPOOL)",), "提示: 使用NO_PERFORMANCE_SPOOL查询提示可能会禁用性能池。"),
+    # 规则186：检查是否使用了不推荐的USE HINT查询提示
+    (("OPTION (USE HINT",), "提示: 使用USE HINT查询提示可能会提供特定的查询优化器行为。"),
+    # 规则187：检查是否使用了不推荐的WAIT_AT_LOW_PRIORITY查询提示
+    (("OPTION (WAIT_AT_LOW_PRIORITY)",), "提示: 使用WAIT_AT_LOW_PRIORITY查询提示可能会在低优先级下等待。"),
+    # 规则188：检查是否使用了不推荐的NO_WAIT查询提示
+    (("OPTION (NO_WAIT)",), "警告: 使用NO_WAIT查询提示可能会导致不等待并立即返回。"),
+    # 规则189：检查是否使用了不推荐的ROWLOCK查询提示
+    (("OPTION (ROWLOCK)",), "警告: 使用ROWLOCK查询提示可能会导致行级锁定。"),
+    # 规则190：检查是否使用了不推荐的PAGLOCK查询提示
+    (("OPTION (PAGLOCK)",), "警告: 使用PAGLOCK查询提示可能会导致页面级锁定。"),
+    # 规则191：检查是否使用了不推荐的TABLOCK查询提示
+    (("OPTION (TABLOCK)",), "警告: 使用TABLOCK查询提示可能会导致表级锁定。"),
+    # 规则192：检查是否使用了不推荐的TABLOCKX查询提示
+    (("OPTION (TABLOCKX)",), "警告: 使用TABLOCKX查询提示可能会导致表级排他锁。"),
+    # 规则193：检查是否使用了不推荐的READPAST查询提示
+    (("OPTION (READPAST)",), "提示: 使用READPAST查询提示可能会跳过锁定的行。"),
+    # 规则194：检查是否使用了不推荐的READCOMMITTED查询提示
+    (("OPTION (READCOMMITTED)",), "提示: 使用READCOMMITTED查询提示可能会读取已提交的数据。"),
+    # 规则195：检查是否使用了不推荐的READUNCOMMITTED查询提示
+    (("OPTION (READUNCOMMITTED)",), "警告: 使用READUNCOMMITTED查询提示可能会导致脏读。"),
+    # 规则196：检查是否使用了不推荐的REPEATABLEREAD查询提示
+    (("OPTION (REPEATABLEREAD)",), "提示: 使用REPEATABLEREAD查询提示可能会导致重复读取。"),
+    # 规则197：检查是否使用了不推荐的SERIALIZABLE查询提示
+    (("OPTION (SERIALIZABLE)",), "警告: 使用SERIALIZABLE查询提示可能会导致序列化隔离级别。"),
+    # 规则198：检查是否使用了不推荐的XLOCK查询提示
+    (("OPTION (XLOCK)",), "警告: 使用XLOCK查询提示可能会导致排他锁。"),
+    # 规则199：检查是否使用了不推荐的NOEXPAND查询提示
+    (("OPTION (NOEXPAND)",), "提示: 使用NOEXPAND查询提示可能会导致不展开索引视图。"),
+    # 规则201：检查是否使用了不推荐的REMOTE查询提示
+    (("OPTION (REMOTE)",), "警告: 使用REMOTE查询提示可能会导致远程查询。"),
+    # 规则202：检查是否使用了不推荐的KEEPIDENTITY查询提示
+    (("OPTION (KEEPIDENTITY)",), "提示: 使用KEEPIDENTITY查询提示可能会保持源数据的标识值。"),
+    # 规则203：检查是否使用了不推荐的KEEPDEFAULTS查询提示
+    (("OPTION (KEEPDEFAULTS)",), "提示: 使用KEEPDEFAULTS查询提示可能会保持目标表的默认值。"),
+    # 规则204：检查是否使用了不推荐的IGNORE_CONSTRAINTS查询提示
+    (("OPTION (IGNORE_CONSTRAINTS)",), "警告: 使用IGNORE_CONSTRAINTS查询提示可能会忽略约束。"),
+    # 规则205：检查是否使用了不推荐的IGNORE_TRIGGERS查询提示
+    (("OPTION (IGNORE_TRIGGERS)",), "警告: 使用IGNORE_TRIGGERS查询提示可能会忽略触发器。"),
+    # 规则206：检查是否使用了不推荐的ALLOW_PAGE_LOCKS查询提示
+    (("OPTION (ALLOW_PAGE_LOCKS)",), "提示: 使用ALLOW_PAGE_LOCKS查询提示可能会允许页面锁。"),
+    # 规则207：检查是否使用了不推荐的ALLOW_ROW_LOCKS查询提示
+    (("OPTION (ALLOW_ROW_LOCKS)",), "提示: 使用ALLOW_ROW_LOCKS查询提示可能会允许行锁。"),
+    # 规则208：检查是否使用了不推荐的OPTIMIZE FOR UNKNOWN查询提示
+    (("OPTION (OPTIMIZE FOR UNKNOWN)",), "提示: 使用OPTIMIZE FOR UNKNOWN查询提示可能会为未知的参数值优化。"),
+    # 规则210：检查是否使用了不推荐的INDEX查询提示
+    (("WITH (INDEX",), "提示: 使用INDEX查询提示可能会强制使用特定的索引。"),
+    # 规则221：检查是否使用了不推荐的HOLDLOCK查询提示
+    (("WITH (HOLDLOCK)",), "警告: 使用HOLDLOCK查询提示可能会导致保持锁。"),
+)
+# 组合规则的条件中用到的 SQL 片段，与关键字规则的片段一起编译进自动机
+_CONDITION_PATTERNS = (
+    "DATEPART", "CREATE TABLE", "ALTER TABLE", "AS", "PERSISTED", "ORDER BY", "WITH INDEX(", "JOIN", "CASE",
+    "WITH", "UNION ALL", "SELECT", "@", "WHERE", "IN (SELECT", "UNION", "OR", "HAVING", "(SELECT", "=",
+    "NOT NULL", "ISNULL", "CONVERT(", "CAST(", "FROM (SELECT", "UPDATE", "SET", "WITH RECURSIVE", "CTE",
+    "NONCLUSTERED", "INDEX", "INDEX SEEK", "LOOKUP",
+)
+_KEYWORD_MATCHER = KeywordMatcher(
+    [pattern for patterns, _ in _KEYWORD_RULES for pattern in patterns] + list(_CONDITION_PATTERNS))
+
+def _contained_patterns():
+    """返回 {片段: [(其他规则中包含它的较长片段, 包含次数)]}。"""
+    rule_patterns = [(rule, pattern, _pattern_tokens(pattern))
+                     for rule, (patterns, _) in enumerate(_KEYWORD_RULES) for pattern in patterns]
+    contained = {}
+    for rule, pattern, tokens in rule_patterns:
+        for other_rule, longer, longer_tokens in rule_patterns:
+            if other_rule == rule or len(longer_tokens) <= len(tokens):
+                continue
+            times = sum(longer_tokens[start:start + len(tokens)] == tokens
+                        for start in range(len(longer_tokens) - len(tokens) + 1))
+            if times:
+                contained.setdefault(pattern, []).append((longer, times))
+    return contained
+
+_CONTAINED_PATTERNS = _contained_patterns()
+
+def _owned_hits(hits, pattern):
+    """片段在查询中的出现次数，减去属于其他规则中较长片段的出现。"""
+    return hits[pattern] - sum(hits[longer] * times for longer, times in _CONTAINED_PATTERNS.get(pattern, ()))
+
+# 审核SQL查询的函数
+def audit_query(query):
+    print("开始进行SQL语句审计...")
+    issues = []  # 初始化issues为一个空列表
+    tokens = QueryTokens(query)  # 只做一次词法分析，所有规则在记号上匹配
+    hits = _KEYWORD_MATCHER.search(tokens.tokens)  # 一次扫描找出所有片段的出现次数
+    for patterns, message in _KEYWORD_RULES:
+        if any(_owned_hits(hits, pattern) > 0 for pattern in patterns):
+            issues.append(message)
+
+    # 规则2：检查是否使用了新的字符串连接方法
+    if tokens.string_concatenation():
+        issues.append("提示: 考虑使用CONCAT或STRING_AGG来连接字符串，它们提供了更好的性能和功能。")
+
+    # 规则3：检查是否使用了旧的JOIN语法
+    if tokens.old_style_join:
+        issues.append("警告: 避免使用旧的JOIN语法，使用明确的JOIN语句，如INNER JOIN、LEFT JOIN等。")
+
+    # 规则6：检查是否使用了非SARGable查询
+    if tokens.leading_wildcard() or hits["DATEPART"]:
+        issues.append("警告: 避免使用非SARGable查询，它们可能会导致性能问题。")
+
+    # 规则7：检查是否使用了表变量而不是临时表
+    if tokens.has("DECLARE @ ? TABLE"):
+        issues.append("提示: 对于大量数据，考虑使用临时表而不是表变量，因为临时表可以有索引。")
+
+    # 规则10：检查是否使用了非持久化的计算列
+    if (hits["CREATE TABLE"] or hits["ALTER TABLE"]) and hits["AS"] and not hits["PERSISTED"]:
+        issues.append("提示: 考虑使用PERSISTED关键字使计算列持久化，以提高查询性能。")
+
+    # 规则13：检查LIKE操作符的使用，特别是以%开始的模式
+    if tokens.leading_wildcard():
+        issues.append("警告: 使用LIKE操作符并且模式以%开始可能会导致性能问题，考虑优化查询。")
+
+    # 规则17：检查ORDER BY使用非索引列
+    if hits["ORDER BY"] and not hits["WITH INDEX("]:
+        issues.append("警告: 使用非索引列进行排序可能增加排序的开销。")
+
+    # 规则14：检查是否使用了大量的自连接
+    if hits["JOIN"] > 3:
+        issues.append("警告: 使用大量的自连接可能会导致性能问题。")
+
+    # 规则16：检查是否使用了大量的CASE语句
+    if hits["CASE"] > 3:
+        issues.append("警告: 使用大量的CASE语句可能会影响性能。")
+
+    # 规则17：检查是否使用了递归公共表表达式
+    if hits["WITH"] and hits["UNION ALL"]:
+        issues.append("提示: 使用递归公共表表达式可以处理层次结构数据，但可能会影响性能。")
+
+    # 规则22：检查是否使用了大量的嵌套子查询
+    if hits["SELECT"] > 5:
+        issues.append("警告: 使用大量的嵌套子查询可能会导致性能问题。")
+
+    # 规则25：检查是否使用了大量的变量或参数
+    if hits["@"] > 10:
+        issues.append("警告: 使用大量的变量或参数可能会使查询变得复杂。")
+
+    # 规则31：检查是否使用了不推荐的系统存储过程
+    if tokens.has_prefix("sp_OA"):
+        issues.append("警告: sp_OA* 系列的系统存储过程已被弃用，考虑使用其他方法。")
+
+    # 规则105：检查是否使用了子查询而不是JOIN
+    if hits["WHERE"] and hits["IN (SELECT"]:
+        issues.append("提示: 考虑使用JOIN代替子查询，可能会提高性能。")
+
+    # 规则106：检查是否使用了非参数化的查询
+    if hits["WHERE"] and tokens.literal_comparison():
+        issues.append("警告: 使用非参数化的查询可能会导致SQL注入风险。")
+
+    # 规则109：检查是否使用了UNION而不是UNION ALL
+    if hits["UNION"] and not hits["UNION ALL"]:
+        issues.append("提示: 使用UNION可能会影响性能，如果不需要去重，考虑使用UNION ALL。")
+
+    # 规则110：检查是否使用了多个OR条件
+    if hits["OR"] > 2:
+        issues.append("警告: 使用多个OR条件可能会导致性能问题。")
+
+    # 规则112：检查是否使用了HAVING子句而不是WHERE子句
+    if hits["HAVING"] and not hits["WHERE"]:
+        issues.append("警告: 使用HAVING子句而不是WHERE子句可能会导致性能问题。")
+
+    # 规则114：检查是否使用了CURSOR
+    if tokens.has("DECLARE ? CURSOR"):
+        issues.append("警告: 使用CURSOR可能会导致性能问题，考虑使用集合操作代替。")
+
+    # 规则115：检查是否使用了大量的嵌套子查询
+    if hits["(SELECT"] > 3:
+        issues.append("警告: 使用大量的嵌套子查询可能会导致性能问题。")
+
+    # 规则121：检查是否使用了不推荐的非ANSI JOIN语法
+    if tokens.old_style_join and hits["WHERE"] and hits["="]:
+        issues.append("警告: 使用非ANSI JOIN语法可能会导致不可预测的结果。考虑使用ANSI JOIN语法。")
+
+    # 规则122：检查是否使用了不推荐的非ANSI NOT NULL语法
+    if not hits["NOT NULL"] and hits["ISNULL"]:
+        issues.append("警告: 使用非ANSI NOT NULL语法可能会导致不可预测的结果。考虑使用ANSI NOT NULL语法。")
+
+    # 规则127：检查是否使用了不推荐的隐式转换
+    if hits["="] and not hits["CONVERT("] and not hits["CAST("]:
+        issues.append("提示: 确保你的查询中没有隐式转换，它可能会影响性能。")
+
+    # 规则129：检查是否使用了不推荐的视图嵌套
+    if hits["SELECT"] and hits["FROM (SELECT"]:
+        issues.append("警告: 视图嵌套可能会导致性能问题。")
+
+    # 规则130：检查是否使用了不推荐的多表UPDATE
+    if hits["UPDATE"] and hits["JOIN"]:
+        issues.append("警告: 使用多表UPDATE可能会导致复杂性和性能问题。")
+
+    # 规则131：检查是否使用了不推荐的全局临时表
+    if tokens.has_prefix("##"):
+        issues.append("警告: 使用全局临时表可能会导致数据隔离问题。")
+
+    # 规则141：检查是否使用了不推荐的SET语句
+    if hits["SET"] and hits["="]:
+        issues.append("提示: 使用SET语句可能会导致不可预测的会话设置。")
+
+    # 规则145：检查是否使用了不推荐的递归查询
+    if hits["WITH RECURSIVE"] or hits["CTE"] and hits["JOIN"]:
+        issues.append("警告: 使用递归查询可能会导致性能问题。")
+
+    # 规则146：检查是否使用了不推荐的非聚集索引
+    if hits["NONCLUSTERED"] and hits["INDEX"]:
+        issues.append("提示: 使用非聚集索引可能会导致性能问题。")
+
+    # 规则149：检查是否使用了不推荐的索引查找
+    if hits["INDEX SEEK"] and hits["LOOKUP"]:
+        issues.append("警告: 使用索引查找可能会导致性能问题。")
+
+    for issue in issues:
+        print(issue)
+    print("SQL语句审计完成。")
+    return issues
+
+# 审核SQL脚本文件中的每条语句
+def audit_sql_file(path, encoding='utf-8-sig'):
+    """通过 mmap 读取 SQL 脚本文件，按 ';' 和 GO 切分后逐条审核，不会把整个脚本读入内存。"""
+    issues = []
+    for number, statement in enumerate(iter_sql_file(path, encoding), 1):
+        print(f"语句 {number}: {' '.join(statement.split())[:100]}")
+        issues.extend(audit_query(statement) or [])
+    return issues
@@ -1,5 +1,3 @@
-import pyodbc
-
 def audit_table_structure(conn, tables_in_query):
 
     cursor = conn.cursor()
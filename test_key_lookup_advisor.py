@@ -0,0 +1,124 @@
+# Key Lookup 消除建议的回归测试：使用与 SQL Server 实际输出相同形状的执行计划
+import xml.etree.ElementTree as ET
+
+from execution_plan_audit import audit_execution_plan
+from key_lookup_advisor import find_lookups, key_lookup_issues, widening_advice
+from plan_operator_store import operator_rows
+from plan_visitor import walk_plan
+
+# 键查找在 showplan 中是 PhysicalOp="Clustered Index Seek" 加 <IndexScan Lookup="1">
+LOOKUP_PLAN = """<ShowPlanXML xmlns="http://schemas.microsoft.com/sqlserver/2004/07/showplan" Version="1.564">
+<BatchSequence><Batch><Statements>
+<StmtSimple StatementId="1" StatementText="SELECT OrderDate, Status FROM Orders WHERE CustomerID = @id"
+            StatementType="SELECT" StatementSubTreeCost="1.2">
+  <QueryPlan DegreeOfParallelism="1">
+    <RelOp NodeId="0" PhysicalOp="Nested Loops" LogicalOp="Inner Join" EstimateRows="500" EstimateCPU="0.002"
+           EstimateIO="0" EstimateRebinds="0" EstimateRewinds="0" EstimatedTotalSubtreeCost="1.2">
+      <OutputList>
+        <ColumnReference Database="[AuditDemoDB]" Schema="[dbo]" Table="[Orders]" Column="OrderDate" />
+        <ColumnReference Database="[AuditDemoDB]" Schema="[dbo]" Table="[Orders]" Column="Status" />
+      </OutputList>
+      <NestedLoops Optimized="0">
+        <RelOp NodeId="1" PhysicalOp="Index Seek" LogicalOp="Index Seek" EstimateRows="500" EstimateCPU="0.0007"
+               EstimateIO="0.003" EstimateRebinds="0" EstimateRewinds="0" EstimatedTotalSubtreeCost="0.004"
+               TableCardinality="1000000">
+          <OutputList>
+            <ColumnReference Database="[AuditDemoDB]" Schema="[dbo]" Table="[Orders]" Column="OrderID" />
+          </OutputList>
+          <IndexScan Ordered="1" ScanDirection="FORWARD" ForcedIndex="0" ForceSeek="0" NoExpandHint="0" Storage="RowStore">
+            <Object Database="[AuditDemoDB]" Schema="[dbo]" Table="[Orders]" Index="[IX_Orders_CustomerID]" IndexKind="NonClustered" />
+            <SeekPredicates>
+              <SeekPredicateNew>
+                <SeekKeys>
+                  <Prefix ScanType="EQ">
+                    <RangeColumns>
+                      <ColumnReference Database="[AuditDemoDB]" Schema="[dbo]" Table="[Orders]" Column="CustomerID" />
+                    </RangeColumns>
+                    <RangeExpressions>
+                      <ScalarOperator ScalarString="[@id]"><Identifier><ColumnReference Column="@id" /></Identifier></ScalarOperator>
+                    </RangeExpressions>
+                  </Prefix>
+                </SeekKeys>
+              </SeekPredicateNew>
+            </SeekPredicates>
+          </IndexScan>
+        </RelOp>
+        <RelOp NodeId="3" PhysicalOp="Clustered Index Seek" LogicalOp="Clustered Index Seek" EstimateRows="1"
+               EstimateCPU="0.0001581" EstimateIO="0.003125" EstimateRebinds="499" EstimateRewinds="0"
+               EstimateExecutions="500" EstimatedTotalSubtreeCost="1.19" TableCardinality="1000000">
+          <OutputList>
+            <ColumnReference Database="[AuditDemoDB]" Schema="[dbo]" Table="[Orders]" Column="OrderDate" />
+            <ColumnReference Database="[AuditDemoDB]" Schema="[dbo]" Table="[Orders]" Column="Status" />
+          </OutputList>
+          <IndexScan Lookup="1" Ordered="1" ScanDirection="FORWARD" ForcedIndex="0" ForceSeek="0" NoExpandHint="0" Storage="RowStore">
+            <Object Database="[AuditDemoDB]" Schema="[dbo]" Table="[Orders]" Index="[PK_Orders]" TableReferenceId="-1" IndexKind="Clustered" />
+            <SeekPredicates>
+              <SeekPredicateNew>
+                <SeekKeys>
+                  <Prefix ScanType="EQ">
+                    <RangeColumns>
+                      <ColumnReference Database="[AuditDemoDB]" Schema="[dbo]" Table="[Orders]" Column="OrderID" />
+                    </RangeColumns>
+                    <RangeExpressions>
+                      <ScalarOperator ScalarString="[AuditDemoDB].[dbo].[Orders].[OrderID]">
+                        <Identifier><ColumnReference Database="[AuditDemoDB]" Schema="[dbo]" Table="[Orders]" Column="OrderID" /></Identifier>
+                      </ScalarOperator>
+                    </RangeExpressions>
+                  </Prefix>
+                </SeekKeys>
+              </SeekPredicateNew>
+            </SeekPredicates>
+          </IndexScan>
+        </RelOp>
+      </NestedLoops>
+    </RelOp>
+  </QueryPlan>
+</StmtSimple>
+</Statements></Batch></BatchSequence></ShowPlanXML>"""
+
+
+def _facts():
+    return walk_plan(ET.fromstring(LOOKUP_PLAN))
+
+
+def test_find_lookups_detects_clustered_index_seek_with_lookup_attribute():
+    lookups = find_lookups(_facts())
+    assert len(lookups) == 1
+    lookup = lookups[0]
+    assert lookup['kind'] == 'Key Lookup'
+    assert lookup['node'].node_id == 3
+    assert lookup['table'] == 'Orders'
+    assert lookup['columns'] == ['OrderDate', 'Status']
+    assert lookup['access_index'] == 'IX_Orders_CustomerID'
+    assert lookup['seek_columns'] == ['CustomerID']
+    assert lookup['executions'] == 500
+
+
+def test_key_lookup_issues_suggest_covering_index():
+    issues = key_lookup_issues(_facts())
+    assert len(issues) == 1
+    assert '节点 3 Key Lookup' in issues[0]
+    assert ("CREATE NONCLUSTERED INDEX [IX_Orders_CustomerID] ON [dbo].[Orders] ([CustomerID]) "
+            "INCLUDE ([OrderDate], [Status]);") in issues[0]
+    # 执行计划审计通过规则 113 报告同一条建议
+    assert issues[0] in audit_execution_plan(LOOKUP_PLAN, verbose=False)
+
+
+def test_widening_advice_adds_missing_columns_with_drop_existing():
+    lookup = find_lookups(_facts())[0]
+    index_columns = {'Orders': {
+        'PK_Orders': {'type': 'CLUSTERED', 'key_columns': ['OrderID'], 'included_columns': [], 'is_unique': True},
+        'IX_Orders_CustomerID': {'type': 'NONCLUSTERED', 'key_columns': ['CustomerID'],
+                                 'included_columns': ['Status'], 'is_unique': False},
+    }}
+    table_columns = {'Orders': {'OrderDate': {'max_length': 8}, 'Status': {'max_length': 20}}}
+    statement, row_bytes, size_kb = widening_advice(lookup, index_columns, table_columns)
+    assert statement == ("CREATE NONCLUSTERED INDEX [IX_Orders_CustomerID] ON [dbo].[Orders] ([CustomerID]) "
+                         "INCLUDE ([Status], [OrderDate]) WITH (DROP_EXISTING = ON);")
+    assert row_bytes == 8
+    assert size_kb == 1000000 * 8 / 8096 * 8
+
+
+def test_operator_store_labels_lookup_as_key_lookup():
+    ops = [row[1] for row in operator_rows(_facts())]
+    assert ops == ['Nested Loops', 'Index Seek', 'Key Lookup']
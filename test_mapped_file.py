@@ -0,0 +1,73 @@
+# 内存映射读取的回归测试：映射的缓冲区包装、分块解析执行计划和 T-SQL 语句切分
+import io
+
+import mapped_file
+from mapped_file import MappedReader, iter_sql_file, map_file, parse_xml_buffer, parse_xml_file, split_sql_statements
+
+PLAN = '<ShowPlanXML xmlns="http://schemas.microsoft.com/sqlserver/2004/07/showplan"><StmtSimple StatementText="SELECT 1" /></ShowPlanXML>'
+
+
+def test_map_file_and_reader(tmp_path):
+    path = tmp_path / 'data.bin'
+    path.write_bytes(b'0123456789')
+    with map_file(path) as mapped:
+        reader = MappedReader(mapped)
+        target = bytearray(4)
+        assert reader.readinto(target) == 4 and target == b'0123'
+        # 包装为缓冲流后按需读取，读到末尾返回空字节串
+        with io.BufferedReader(reader) as buffered:
+            assert buffered.read(3) == b'456'
+            assert buffered.read() == b'789'
+            assert buffered.read() == b''
+        # 关闭包装后底层的 mmap 可以正常关闭
+        assert reader.closed
+    empty = tmp_path / 'empty.bin'
+    empty.write_bytes(b'')
+    with map_file(empty) as mapped:
+        assert mapped == b''
+
+
+def test_parse_xml_buffer_in_chunks(monkeypatch):
+    monkeypatch.setattr(mapped_file, 'FEED_CHUNK_BYTES', 7)
+    root = parse_xml_buffer(PLAN.encode('utf-8'))
+    assert root[0].get('StatementText') == 'SELECT 1'
+    # SSMS 保存的 UTF-16 计划
+    root = parse_xml_buffer(('<?xml version="1.0" encoding="utf-16"?>' + PLAN).encode('utf-16'))
+    assert root[0].get('StatementText') == 'SELECT 1'
+    # 另存为 UTF-8 后仍保留 encoding="utf-16" 声明的计划
+    root = parse_xml_buffer(('<?xml version="1.0" encoding="utf-16"?>' + PLAN.replace('SELECT 1', 'SELECT N\'测试\'')).encode('utf-8'))
+    assert root[0].get('StatementText') == "SELECT N'测试'"
+
+
+def test_parse_xml_file(tmp_path):
+    path = tmp_path / 'plan.sqlplan'
+    path.write_bytes(('<?xml version="1.0" encoding="utf-16"?>' + PLAN).encode('utf-16'))
+    assert parse_xml_file(path)[0].get('StatementText') == 'SELECT 1'
+
+
+def test_split_sql_statements():
+    script = ("SELECT 'a;b' AS [x;y]; -- 注释; 不切分\n"
+              "/* 块注释 /* 嵌套; */ 仍是注释; */ UPDATE t SET c = 1\n"
+              "go\n"
+              "PRINT \"x;\"\n"
+              "GO 2 -- 重复执行\n"
+              "SELECT 'it''s; fine'\n")
+    assert list(split_sql_statements(io.StringIO(script))) == [
+        "SELECT 'a;b' AS [x;y]",
+        "-- 注释; 不切分\n/* 块注释 /* 嵌套; */ 仍是注释; */ UPDATE t SET c = 1",
+        'PRINT "x;"',
+        "SELECT 'it''s; fine'",
+    ]
+
+
+def test_iter_sql_file_encodings(tmp_path):
+    script = "SELECT N'中文';\nGO\nSELECT 2\n"
+    utf8 = tmp_path / 'utf8.sql'
+    utf8.write_bytes(b'\xef\xbb\xbf' + script.encode('utf-8'))
+    utf16 = tmp_path / 'utf16.sql'
+    utf16.write_bytes(script.encode('utf-16'))
+    assert list(iter_sql_file(utf8)) == ["SELECT N'中文'", 'SELECT 2']
+    assert list(iter_sql_file(utf16, encoding='utf-16')) == ["SELECT N'中文'", 'SELECT 2']
+    empty = tmp_path / 'empty.sql'
+    empty.write_bytes(b'')
+    assert list(iter_sql_file(empty)) == []
@@ -0,0 +1,119 @@
+# 离线批量审计的回归测试：目录、tar 包、gzip 压缩、UTF-16 编码和无法解析的文件
+import gzip
+import io
+import json
+import re
+import tarfile
+
+from offline_plan_audit import audit_plan_file, audit_plan_files, iter_plan_files, main
+
+PLAN = """<ShowPlanXML xmlns="http://schemas.microsoft.com/sqlserver/2004/07/showplan" Version="1.564">
+<BatchSequence><Batch><Statements>
+<StmtSimple StatementId="1" StatementText="SELECT OrderID FROM Orders" StatementType="SELECT" StatementSubTreeCost="6.5"
+            QueryHash="0x1A2B" QueryPlanHash="0x9F8E">
+  <QueryPlan DegreeOfParallelism="1">
+    <RelOp NodeId="0" PhysicalOp="Clustered Index Scan" LogicalOp="Clustered Index Scan" EstimateRows="1000000"
+           EstimatedTotalSubtreeCost="6.5">
+      <IndexScan Ordered="0" Storage="RowStore">
+        <Object Database="[AuditDemoDB]" Schema="[dbo]" Table="[Orders]" Index="[PK_Orders]" />
+      </IndexScan>
+    </RelOp>
+  </QueryPlan>
+</StmtSimple>
+</Statements></Batch></BatchSequence></ShowPlanXML>"""
+
+
+def _plan_files():
+    """文件名 -> 内容：UTF-8、SSMS 保存的 UTF-16、gzip 压缩、无法解析的计划，以及不是计划的文件。"""
+    return {
+        'a.sqlplan': PLAN.encode('utf-8'),
+        'nested/b.sqlplan': ('<?xml version="1.0" encoding="utf-16"?>' + PLAN).encode('utf-16'),
+        'nested/c.sqlplan.gz': gzip.compress(PLAN.encode('utf-8')),
+        'nested/d.xml': b'<ShowPlanXML><BatchSequence>',
+        'readme.txt': b'not a plan',
+    }
+
+
+def _write_directory(root):
+    for name, data in _plan_files().items():
+        path = root / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(data)
+    return root
+
+
+def _write_tarball(path):
+    with tarfile.open(path, 'w:gz') as archive:
+        for name, data in _plan_files().items():
+            member = tarfile.TarInfo(name)
+            member.size = len(data)
+            archive.addfile(member, io.BytesIO(data))
+    return path
+
+
+def _records(output):
+    # 目录中的文件以路径为来源，tar 包中的文件为 '包名:成员名'
+    return {re.split(r'[/\\:]', record['source'])[-1]: record
+            for record in map(json.loads, output.getvalue().splitlines())}
+
+
+def _check_records(records):
+    assert sorted(records) == ['a.sqlplan', 'b.sqlplan', 'c.sqlplan.gz', 'd.xml']
+    audited = [records[name] for name in ('a.sqlplan', 'b.sqlplan', 'c.sqlplan.gz')]
+    for record in audited:
+        assert 'error' not in record
+        assert record['statements'] == 1
+        assert record['subtree_cost'] == 6.5
+        assert record['issues']
+    # 编码和压缩不同，计划相同时计划键和问题相同
+    assert len({record['plan_key'] for record in audited}) == 1
+    assert audited[0]['issues'] == audited[1]['issues'] == audited[2]['issues']
+    assert records['d.xml']['error'].startswith('解析执行计划时出错')
+    assert 'issues' not in records['d.xml']
+
+
+def test_directory_source(tmp_path):
+    source = _write_directory(tmp_path / 'plans')
+    output = io.StringIO()
+    stats = audit_plan_files(str(source), output, workers=1)
+    _check_records(_records(output))
+    assert (stats['plans'], stats['errors']) == (4, 1)
+    assert stats['bytes'] == sum(len(data) for name, data in _plan_files().items() if name != 'readme.txt')
+
+
+def test_tarball_source(tmp_path):
+    source = _write_tarball(tmp_path / 'plans.tar.gz')
+    names = [name.split(':', 1)[1] for name, data in iter_plan_files(str(source))]
+    assert names == ['a.sqlplan', 'nested/b.sqlplan', 'nested/c.sqlplan.gz', 'nested/d.xml']
+    output = io.StringIO()
+    stats = audit_plan_files(str(source), output, workers=1)
+    _check_records(_records(output))
+    assert stats['errors'] == 1
+
+
+def test_worker_pool_matches_serial_run(tmp_path):
+    source = str(_write_directory(tmp_path / 'plans'))
+    serial, pooled = io.StringIO(), io.StringIO()
+    audit_plan_files(source, serial, workers=1)
+    audit_plan_files(source, pooled, workers=2)
+    strip = lambda records: {name: {key: value for key, value in record.items() if key != 'elapsed_ms'}
+                             for name, record in records.items()}
+    assert strip(_records(pooled)) == strip(_records(serial))
+
+
+def test_single_file_and_missing_file(tmp_path):
+    path = tmp_path / 'plan.sqlplan'
+    path.write_bytes(PLAN.encode('utf-8'))
+    assert list(iter_plan_files(str(path))) == [(str(path), None)]
+    assert audit_plan_file(str(path))['issues']
+    missing = audit_plan_file(str(tmp_path / 'missing.sqlplan'))
+    assert missing['bytes'] == 0 and 'error' in missing
+
+
+def test_main_writes_json_lines(tmp_path, capsys):
+    source = _write_directory(tmp_path / 'plans')
+    output = tmp_path / 'results.jsonl'
+    stats = main([str(source), '-o', str(output), '-j', '1'])
+    assert stats['plans'] == 4
+    assert len(output.read_text(encoding='utf-8').splitlines()) == 4
+    assert '个计划/秒' in capsys.readouterr().out
@@ -0,0 +1,66 @@
+# 并行度分析的回归测试：计划的并行度和成本与服务器的 max degree of parallelism、cost threshold for parallelism 比较
+import xml.etree.ElementTree as ET
+
+from execution_plan_audit import audit_execution_plan
+from parallelism_audit import server_parallelism_issues
+from plan_visitor import walk_plan
+
+
+def _parallel_plan(dop=8, cost=30.0):
+    return f"""<ShowPlanXML xmlns="http://schemas.microsoft.com/sqlserver/2004/07/showplan" Version="1.564">
+<BatchSequence><Batch><Statements>
+<StmtSimple StatementId="1" StatementText="SELECT COUNT(*) FROM Orders" StatementType="SELECT" StatementSubTreeCost="{cost}">
+  <QueryPlan DegreeOfParallelism="{dop}">
+    <RelOp NodeId="0" PhysicalOp="Stream Aggregate" LogicalOp="Aggregate" EstimateRows="1" EstimatedTotalSubtreeCost="{cost}">
+      <StreamAggregate>
+        <RelOp NodeId="1" PhysicalOp="Parallelism" LogicalOp="Gather Streams" EstimateRows="{dop}" Parallel="1"
+               EstimatedTotalSubtreeCost="{cost - 0.1}">
+          <Parallelism>
+            <RelOp NodeId="2" PhysicalOp="Clustered Index Scan" LogicalOp="Clustered Index Scan" EstimateRows="1000000"
+                   Parallel="1" EstimatedTotalSubtreeCost="{cost - 0.2}">
+              <IndexScan Ordered="0" Storage="RowStore">
+                <Object Database="[AuditDemoDB]" Schema="[dbo]" Table="[Orders]" Index="[PK_Orders]" />
+              </IndexScan>
+            </RelOp>
+          </Parallelism>
+        </RelOp>
+      </StreamAggregate>
+    </RelOp>
+  </QueryPlan>
+</StmtSimple>
+</Statements></Batch></BatchSequence></ShowPlanXML>"""
+
+
+def _server_issues(plan_xml, max_dop, threshold, cpu_count=16):
+    settings = {'max degree of parallelism': max_dop, 'cost threshold for parallelism': threshold, 'cpu_count': cpu_count}
+    return server_parallelism_issues(walk_plan(ET.fromstring(plan_xml)), settings)
+
+
+def test_plan_dop_above_configured_maxdop():
+    issues = _server_issues(_parallel_plan(dop=8), max_dop=4, threshold=5)
+    assert any('并行度 8' in issue and 'max degree of parallelism 4' in issue for issue in issues)
+    assert not _server_issues(_parallel_plan(dop=4), max_dop=4, threshold=5)
+
+
+def test_unlimited_maxdop_on_large_server():
+    issues = _server_issues(_parallel_plan(dop=32), max_dop=0, threshold=5, cpu_count=32)
+    assert any('没有限制 max degree of parallelism' in issue for issue in issues)
+    assert not _server_issues(_parallel_plan(dop=8), max_dop=0, threshold=5, cpu_count=32)
+
+
+def test_parallel_cost_against_cost_threshold():
+    below = _server_issues(_parallel_plan(cost=30.0), max_dop=8, threshold=50)
+    assert any('低于并行开销阈值 50' in issue for issue in below)
+    near = _server_issues(_parallel_plan(cost=30.0), max_dop=8, threshold=20)
+    assert any('只略高于并行开销阈值 20' in issue for issue in near)
+    # 阈值低于建议值时提示调高
+    assert any('建议提高到 50' in issue for issue in near)
+    assert not _server_issues(_parallel_plan(cost=300.0), max_dop=8, threshold=50)
+
+
+def test_document_audit_has_no_generic_parallelism_warnings():
+    issues = audit_execution_plan(_parallel_plan(dop=16), verbose=False)
+    assert not any('大量的数据移动' in issue for issue in issues)
+    assert not any('高度并行' in issue for issue in issues)
+    assert not any('同时存在并行和串行' in issue for issue in issues)
+    assert sum('并行度 16' in issue for issue in issues) == 1
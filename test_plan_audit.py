@@ -0,0 +1,163 @@
+# 执行计划审计的回归测试：整个文档审计、逐条语句审计和流式审计应该得到相同的问题
+import io
+import xml.etree.ElementTree as ET
+
+from execution_plan_audit import (audit_execution_plan, audit_execution_plan_by_statement, audit_execution_plan_file,
+                                  audit_execution_plan_stream)
+from plan_cache import PlanAuditCache, plan_cache_key, plan_tree_key
+
+# 单条语句的实际执行计划：并行度 4、优化器超时、扫描谓词中有 CONVERT_IMPLICIT，
+# 哈希连接以行模式处理两百万行以上的输入
+STATEMENT = """
+<StmtSimple StatementId="1" StatementOptmLevel="FULL" StatementOptmEarlyAbortReason="TimeOut"
+            CardinalityEstimationModelVersion="160" StatementSubTreeCost="12.5" StatementType="SELECT"
+            StatementText="SELECT o.OrderID FROM Orders o JOIN Customers c ON o.CustomerID = c.CustomerID WHERE o.AccountNo = @acct"
+            QueryHash="0x1A2B3C4D5E6F7081" QueryPlanHash="0x9F8E7D6C5B4A3921">
+  <QueryPlan DegreeOfParallelism="4" CompileTime="350" CompileCPU="330" CompileMemory="560">
+    <ThreadStat Branches="1" UsedThreads="4" />
+    <OptimizerHardwareDependentProperties EstimatedAvailableDegreeOfParallelism="4" />
+    <RelOp NodeId="0" PhysicalOp="Parallelism" LogicalOp="Gather Streams" EstimateRows="120" EstimateCPU="0.5"
+           EstimateIO="0" EstimateRebinds="0" EstimateRewinds="0" EstimatedExecutionMode="Row" Parallel="true"
+           EstimatedTotalSubtreeCost="12.5">
+      <Parallelism>
+        <RelOp NodeId="1" PhysicalOp="Hash Match" LogicalOp="Inner Join" EstimateRows="120" EstimateCPU="9.0"
+               EstimateIO="0" EstimateRebinds="0" EstimateRewinds="0" EstimatedExecutionMode="Row" Parallel="true"
+               EstimatedTotalSubtreeCost="12.0">
+          <Hash>
+            <RelOp NodeId="2" PhysicalOp="Clustered Index Scan" LogicalOp="Clustered Index Scan" EstimateRows="2000000"
+                   EstimateCPU="0.8" EstimateIO="6.1" EstimateRebinds="0" EstimateRewinds="0"
+                   EstimatedExecutionMode="Row" Parallel="true" EstimatedTotalSubtreeCost="6.9">
+              <IndexScan Ordered="false" Storage="RowStore">
+                <Object Database="[AuditDemoDB]" Schema="[dbo]" Table="[Orders]" Index="[PK_Orders]" Alias="[o]" />
+                <Predicate>
+                  <ScalarOperator ScalarString="CONVERT_IMPLICIT(nvarchar(20),[o].[AccountNo],0)=[@acct]">
+                    <Compare CompareOp="EQ">
+                      <ScalarOperator>
+                        <Convert DataType="nvarchar" Length="40" Style="0" Implicit="true">
+                          <ScalarOperator>
+                            <Identifier>
+                              <ColumnReference Database="[AuditDemoDB]" Schema="[dbo]" Table="[Orders]" Alias="[o]" Column="AccountNo" />
+                            </Identifier>
+                          </ScalarOperator>
+                        </Convert>
+                      </ScalarOperator>
+                      <ScalarOperator>
+                        <Identifier>
+                          <ColumnReference Column="@acct" />
+                        </Identifier>
+                      </ScalarOperator>
+                    </Compare>
+                  </ScalarOperator>
+                </Predicate>
+              </IndexScan>
+            </RelOp>
+            <RelOp NodeId="3" PhysicalOp="Index Seek" LogicalOp="Index Seek" EstimateRows="100" EstimateCPU="0.1"
+                   EstimateIO="0.3" EstimateRebinds="0" EstimateRewinds="0" EstimatedExecutionMode="Row"
+                   Parallel="true" EstimatedTotalSubtreeCost="0.4">
+              <IndexScan Ordered="true" Storage="RowStore">
+                <Object Database="[AuditDemoDB]" Schema="[dbo]" Table="[Customers]" Index="[IX_Customers]" Alias="[c]" />
+              </IndexScan>
+            </RelOp>
+          </Hash>
+        </RelOp>
+      </Parallelism>
+    </RelOp>
+  </QueryPlan>
+</StmtSimple>
+"""
+
+
+def _plan(statements):
+    return ('<ShowPlanXML xmlns="http://schemas.microsoft.com/sqlserver/2004/07/showplan" Version="1.564">'
+            f'<BatchSequence><Batch><Statements>{statements}</Statements></Batch></BatchSequence></ShowPlanXML>')
+
+
+def _statement_issues(plan_xml):
+    return [issue for result in audit_execution_plan_by_statement(plan_xml, verbose=False) for issue in result['issues']]
+
+
+def _audit_all_modes(plan_xml):
+    """返回 (整个文档审计, 逐条语句审计, 流式审计) 得到的问题列表。"""
+    document = audit_execution_plan(plan_xml, verbose=False)
+    by_statement = _statement_issues(plan_xml)
+    stream = audit_execution_plan_stream(io.BytesIO(plan_xml.encode('utf-8')))
+    return document, by_statement, stream
+
+
+def test_statement_audits_match_document_audit():
+    document, by_statement, stream = _audit_all_modes(_plan(STATEMENT))
+    assert document
+    assert sorted(by_statement) == sorted(document)
+    assert sorted(stream) == sorted(document)
+
+
+def test_statement_audit_reports_early_abort_and_compile_cost():
+    issues = _statement_issues(_plan(STATEMENT))
+    assert any('优化器超时' in issue for issue in issues)
+    assert any('编译耗时 350 毫秒' in issue for issue in issues)
+
+
+def test_parallel_plan_reports_dop_once():
+    issues = _statement_issues(_plan(STATEMENT))
+    assert not any('并行度过低' in issue for issue in issues)
+    assert sum('并行度 4' in issue for issue in issues) == 1
+
+
+def test_statement_audit_reports_implicit_conversion():
+    issues = _statement_issues(_plan(STATEMENT))
+    assert any('AccountNo 被隐式转换为 nvarchar' in issue for issue in issues)
+
+
+def test_statement_audit_reports_batch_mode_candidate_under_stmt_cond():
+    # 条件语句中的 StmtSimple 作为审计的根节点
+    plan_xml = _plan(f'<StmtCond StatementId="1"><Condition /><Then><Statements>{STATEMENT}</Statements></Then></StmtCond>')
+    issues = _statement_issues(plan_xml)
+    assert any('Hash Match' in issue and '以行模式处理' in issue for issue in issues)
+    assert sorted(issues) == sorted(audit_execution_plan(plan_xml, verbose=False))
+
+
+def test_stream_audit_accepts_utf8_file_declared_as_utf16(tmp_path):
+    # 从 DMV 取出后另存为 UTF-8 的计划仍保留 encoding="utf-16" 的声明
+    path = tmp_path / 'plan.sqlplan'
+    path.write_bytes(('<?xml version="1.0" encoding="utf-16"?>' + _plan(STATEMENT)).encode('utf-8'))
+    issues = audit_execution_plan_file(path, verbose=False)
+    assert issues
+    assert sorted(audit_execution_plan_stream(path)) == sorted(issues)
+
+
+def test_statement_cache_keys_on_statement_text():
+    cache = PlanAuditCache()
+    # QueryPlanHash 相同、语句文本不同的两条语句
+    other = _plan(STATEMENT.replace('@acct', '@region'))
+    audit_execution_plan_by_statement(_plan(STATEMENT), verbose=False, cache=cache)
+    issues = audit_execution_plan_by_statement(other, verbose=False, cache=cache)[0]['issues']
+    assert len(cache) == 2
+    assert any('@region' in issue for issue in issues)
+    assert not any('@acct' in issue for issue in issues)
+    # 再次审计命中缓存
+    assert audit_execution_plan_by_statement(other, verbose=False, cache=cache)[0]['issues'] == issues
+    assert len(cache) == 2
+
+
+def test_operator_store_sum_by_keeps_zero_total_groups(monkeypatch):
+    import plan_operator_store
+    store = plan_operator_store.PlanOperatorStore()
+    store.add_rows([(0, 'Index Seek', '[Orders]', '[IX_Orders]', 1.0, 0.0, 0.0, 0.0, 0.0, False),
+                    (1, 'Clustered Index Seek', '[Orders]', '[PK_Orders]', 1.0, 0.1, 0.1, 0.2, 0.2, False),
+                    (2, 'Index Seek', '[Customers]', '[IX_Customers]', 1.0, 0.0, 0.0, 0.0, 0.0, False)])
+    by_table = store.sum_by('self_cost', 'table')
+    seeks = store.sum_by('self_cost', 'index', physical_op='Index Seek')
+    assert sorted(by_table) == [('[Customers]', 0.0), ('[Orders]', 0.2)]
+    assert sorted(seeks) == [('[IX_Customers]', 0.0), ('[IX_Orders]', 0.0)]
+    # 没有 NumPy 时的逐行循环得到相同的分组
+    monkeypatch.setattr(plan_operator_store, 'numpy', None)
+    assert sorted(store.sum_by('self_cost', 'table')) == sorted(by_table)
+    assert sorted(store.sum_by('self_cost', 'index', physical_op='Index Seek')) == sorted(seeks)
+
+
+def test_plan_cache_key_reads_attributes_after_newlines_and_tabs():
+    # STATEMENT 中 StatementText 和 QueryHash 前面是换行
+    for plan_xml in (_plan(STATEMENT), _plan(STATEMENT.replace('\n            QueryHash', '\tQueryHash'))):
+        key = plan_cache_key(plan_xml)
+        assert not key.startswith('digest:')
+        assert key == plan_tree_key(ET.fromstring(plan_xml))
@@ -0,0 +1,82 @@
+# 成本归因的回归测试：自身成本、占语句总成本的比例、关键成本路径和火焰图折叠栈
+import xml.etree.ElementTree as ET
+
+from plan_cost_attribution import (attribute_costs, collapsed_stacks, hot_path, operator_label, report_cost_attribution,
+                                   top_operators)
+from plan_visitor import walk_plan
+
+
+def _scan(node_id, op, cost, table, index):
+    return f"""<RelOp NodeId="{node_id}" PhysicalOp="{op}" LogicalOp="{op}" EstimatedTotalSubtreeCost="{cost}">
+      <IndexScan><Object Database="[AuditDemoDB]" Schema="[dbo]" Table="{table}" Index="{index}" /></IndexScan>
+    </RelOp>"""
+
+
+# 语句 1：哈希连接（自身成本 3）连接扫描（6）和查找（1）；
+# 语句 2：嵌套循环内侧的子树成本按执行次数累计，大于父操作符，自身成本按 0 计算
+PLAN = f"""<ShowPlanXML xmlns="http://schemas.microsoft.com/sqlserver/2004/07/showplan" Version="1.564">
+<BatchSequence><Batch><Statements>
+<StmtSimple StatementId="1" StatementSubTreeCost="10">
+  <QueryPlan>
+    <RelOp NodeId="0" PhysicalOp="Hash Match" LogicalOp="Inner Join" EstimatedTotalSubtreeCost="10">
+      <Hash>
+        {_scan(1, 'Clustered Index Scan', 6, '[Orders]', '[PK_Orders]')}
+        {_scan(2, 'Index Seek', 1, '[Customers]', '[IX_Customers]')}
+      </Hash>
+    </RelOp>
+  </QueryPlan>
+</StmtSimple>
+<StmtSimple StatementId="2" StatementSubTreeCost="2">
+  <QueryPlan>
+    <RelOp NodeId="0" PhysicalOp="Nested Loops" LogicalOp="Inner Join" EstimatedTotalSubtreeCost="2">
+      <NestedLoops>
+        {_scan(1, 'Index Seek', 0.5, '[Orders]', '[IX_Orders_Date]')}
+        {_scan(2, 'Clustered Index Seek', 2.5, '[Customers]', '[PK_Customers]')}
+      </NestedLoops>
+    </RelOp>
+  </QueryPlan>
+</StmtSimple>
+</Statements></Batch></BatchSequence></ShowPlanXML>"""
+
+
+def _costs():
+    facts = walk_plan(ET.fromstring(PLAN))
+    return facts, attribute_costs(facts)
+
+
+def test_self_cost_and_share_per_statement():
+    _, costs = _costs()
+    result = [(cost['root'].node_id, cost['node'].node_id, cost['self_cost'], round(cost['share'], 3)) for cost in costs]
+    assert result == [
+        (0, 0, 3.0, 0.3), (0, 1, 6.0, 0.6), (0, 2, 1.0, 0.1),
+        (0, 0, 0.0, 0.0), (0, 1, 0.5, 0.25), (0, 2, 2.5, 1.25),
+    ]
+    # 每个操作符的根是所在语句的根操作符
+    assert costs[0]['root'] is costs[0]['node'] and costs[3]['root'] is costs[3]['node']
+    assert costs[1]['root'] is costs[0]['node'] and costs[4]['root'] is costs[3]['node']
+
+
+def test_top_operators_and_hot_path():
+    facts, costs = _costs()
+    assert [operator_label(cost['node']) for cost in top_operators(costs, 3)] == [
+        '1 Clustered Index Scan [Orders].[PK_Orders]', '0 Hash Match', '2 Clustered Index Seek [Customers].[PK_Customers]']
+    first, second = facts.model.roots()
+    assert [node.node_id for node in hot_path(facts.model, first)] == [0, 1]
+    assert [node.physical_op for node in hot_path(facts.model, second)] == ['Nested Loops', 'Clustered Index Seek']
+
+
+def test_collapsed_stacks_for_flame_graphs(tmp_path):
+    facts, costs = _costs()
+    assert collapsed_stacks(facts, costs, scale=1000) == [
+        "语句 1;0 Hash Match 3000",
+        "语句 1;0 Hash Match;1 Clustered Index Scan [Orders].[PK_Orders] 6000",
+        "语句 1;0 Hash Match;2 Index Seek [Customers].[IX_Customers] 1000",
+        # 自身成本为 0 的操作符不输出
+        "语句 2;0 Nested Loops;1 Index Seek [Orders].[IX_Orders_Date] 500",
+        "语句 2;0 Nested Loops;2 Clustered Index Seek [Customers].[PK_Customers] 2500",
+    ]
+    path = tmp_path / 'plan.folded'
+    report_cost_attribution(PLAN, top_n=2, collapsed_path=str(path))
+    lines = path.read_text(encoding='utf-8').splitlines()
+    assert lines[1] == "语句 1;0 Hash Match;1 Clustered Index Scan [Orders].[PK_Orders] 6000000"
+    assert len(lines) == 5
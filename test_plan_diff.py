@@ -0,0 +1,105 @@
+# 执行计划对比的回归测试：调优前的排序+聚集索引扫描，建立索引后变为索引查找+键查找
+from plan_diff import diff_plan_files, diff_plans
+
+def _statement(cost, relops):
+    return f"""<ShowPlanXML xmlns="http://schemas.microsoft.com/sqlserver/2004/07/showplan" Version="1.564">
+<BatchSequence><Batch><Statements>
+<StmtSimple StatementId="1" StatementText="SELECT OrderDate, Status FROM Orders WHERE CustomerID = @id ORDER BY OrderDate"
+            StatementType="SELECT" StatementSubTreeCost="{cost}" QueryHash="0x01" QueryPlanHash="0x02">
+  <QueryPlan DegreeOfParallelism="1">
+{relops}
+  </QueryPlan>
+</StmtSimple>
+</Statements></Batch></BatchSequence></ShowPlanXML>"""
+
+ORDERS = '<Object Database="[AuditDemoDB]" Schema="[dbo]" Table="[Orders]" Index="{index}" />'
+
+BEFORE = _statement(12.0, f"""
+    <RelOp NodeId="0" PhysicalOp="Compute Scalar" LogicalOp="Compute Scalar" EstimateRows="500" EstimatedTotalSubtreeCost="12.0">
+      <ComputeScalar>
+        <RelOp NodeId="1" PhysicalOp="Sort" LogicalOp="Sort" EstimateRows="500" EstimatedTotalSubtreeCost="11.9">
+          <Warnings><SpillToTempDb SpillLevel="1" /></Warnings>
+          <Sort Distinct="0">
+            <RelOp NodeId="2" PhysicalOp="Filter" LogicalOp="Filter" EstimateRows="500" EstimatedTotalSubtreeCost="9.0">
+              <Filter StartupExpression="0">
+                <RelOp NodeId="3" PhysicalOp="Clustered Index Scan" LogicalOp="Clustered Index Scan" EstimateRows="1000000"
+                       EstimatedTotalSubtreeCost="8.5" TableCardinality="1000000">
+                  <IndexScan Ordered="0" Storage="RowStore">{ORDERS.format(index='[PK_Orders]')}</IndexScan>
+                </RelOp>
+              </Filter>
+            </RelOp>
+          </Sort>
+        </RelOp>
+      </ComputeScalar>
+    </RelOp>""")
+
+AFTER = _statement(0.05, f"""
+    <RelOp NodeId="0" PhysicalOp="Compute Scalar" LogicalOp="Compute Scalar" EstimateRows="480" EstimatedTotalSubtreeCost="0.05">
+      <ComputeScalar>
+        <RelOp NodeId="1" PhysicalOp="Nested Loops" LogicalOp="Inner Join" EstimateRows="480" EstimatedTotalSubtreeCost="0.049">
+          <NestedLoops Optimized="0">
+            <RelOp NodeId="2" PhysicalOp="Index Seek" LogicalOp="Index Seek" EstimateRows="480" EstimatedTotalSubtreeCost="0.004">
+              <IndexScan Ordered="1" Storage="RowStore">{ORDERS.format(index='[IX_Orders_CustomerID]')}</IndexScan>
+            </RelOp>
+            <RelOp NodeId="4" PhysicalOp="Clustered Index Seek" LogicalOp="Clustered Index Seek" EstimateRows="1"
+                   EstimateRebinds="479" EstimatedTotalSubtreeCost="0.044">
+              <IndexScan Lookup="1" Ordered="1" Storage="RowStore">{ORDERS.format(index='[PK_Orders]')}</IndexScan>
+            </RelOp>
+          </NestedLoops>
+        </RelOp>
+      </ComputeScalar>
+    </RelOp>""")
+
+
+def _statement_diff(diff):
+    assert len(diff['statements']) == 1
+    return diff['statements'][0]
+
+
+def test_diff_reports_operator_index_cost_and_row_changes():
+    statement = _statement_diff(diff_plans(BEFORE, AFTER))
+    changes = {(before.node_id, after.node_id): changes for before, after, changes in statement['changed']}
+    assert changes[(1, 1)] == ['Sort -> Nested Loops', '子树成本 11.9 -> 0.049']
+    # 按访问的表匹配：扫描变成了新索引上的查找
+    assert changes[(3, 2)] == ['Clustered Index Scan -> Index Seek', '索引 [PK_Orders] -> [IX_Orders_CustomerID]',
+                               '子树成本 8.5 -> 0.004', '预估行数 1e+06 -> 480']
+    # 行数变化不到 10% 时不报告
+    assert changes[(0, 0)] == ['子树成本 12 -> 0.05']
+
+
+def test_diff_reports_removed_and_added_operators():
+    statement = _statement_diff(diff_plans(BEFORE, AFTER))
+    assert [(node.node_id, node.physical_op) for node in statement['removed']] == [(2, 'Filter')]
+    assert [(node.node_id, node.physical_op) for node in statement['added']] == [(4, 'Clustered Index Seek')]
+
+
+def test_diff_reports_cost_delta_warnings_and_findings():
+    diff = diff_plans(BEFORE, AFTER)
+    assert (diff['cost_before'], diff['cost_after']) == (12.0, 0.05)
+    assert round(diff['cost_delta'], 6) == -11.95
+    statement = _statement_diff(diff)
+    assert statement['warnings_resolved'] == ['SpillToTempDb（Sort）']
+    assert statement['warnings_introduced'] == []
+    assert any('溢出到 tempdb' in issue for issue in diff['resolved'])
+    assert any('Key Lookup' in issue for issue in diff['introduced'])
+    assert not set(diff['resolved']) & set(diff['introduced'])
+
+
+def test_diff_of_identical_plans_is_empty():
+    diff = diff_plans(BEFORE, BEFORE)
+    statement = _statement_diff(diff)
+    assert statement['changed'] == statement['removed'] == statement['added'] == []
+    assert diff['cost_delta'] == 0
+    assert diff['resolved'] == diff['introduced'] == []
+
+
+def test_diff_plan_files(tmp_path):
+    before_path = tmp_path / 'before.sqlplan'
+    after_path = tmp_path / 'after.sqlplan'
+    # SSMS 保存的 .sqlplan 为 UTF-16
+    before_path.write_bytes(('<?xml version="1.0" encoding="utf-16"?>' + BEFORE).encode('utf-16'))
+    after_path.write_bytes(AFTER.encode('utf-8'))
+    diff = diff_plan_files(before_path, after_path)
+    assert round(diff['cost_delta'], 6) == -11.95
+    assert len(_statement_diff(diff)['changed']) == 3
+    assert diff_plans('<ShowPlanXML', AFTER) is None
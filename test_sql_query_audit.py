@@ -0,0 +1,81 @@
+# SQL 语句审核的回归测试：规则在记号上匹配，注释和字符串常量中的内容不会触发规则
+from sql_query_audit import KeywordMatcher, QueryTokens, audit_query
+
+NOLOCK = "警告: 使用NOLOCK可能会读取到未提交的数据。确保你知道你在做什么。"
+NOLOCK_HINT = "警告: 使用NOLOCK查询提示可能会导致脏读。"
+CURSOR = "警告: 尽量避免使用CURSOR，因为它们通常比集合操作慢。"
+OLD_JOIN = "警告: 避免使用旧的JOIN语法，使用明确的JOIN语句，如INNER JOIN、LEFT JOIN等。"
+LEADING_WILDCARD = "警告: 使用LIKE操作符并且模式以%开始可能会导致性能问题，考虑优化查询。"
+
+
+def test_keywords_in_comments_and_strings_do_not_match():
+    issues = audit_query("SELECT OrderID FROM Orders -- WITH (NOLOCK)\n"
+                         "WHERE Note = 'CURSOR xp_cmdshell' /* SELECT * FROM t WITH (NOLOCK) */")
+    assert NOLOCK not in issues and NOLOCK_HINT not in issues
+    assert CURSOR not in issues
+    assert not any('xp_cmdshell' in issue for issue in issues)
+    assert "警告: 使用具体的列名而不是星号(*)来选择列，以提高性能和可读性。" not in issues
+
+
+def test_keywords_match_regardless_of_case_and_whitespace():
+    issues = audit_query("select *\n  from Orders with (nolock)\norder\n  by OrderDate")
+    assert NOLOCK_HINT in issues
+    assert "警告: 使用具体的列名而不是星号(*)来选择列，以提高性能和可读性。" in issues
+    assert "警告: 使用非索引列进行排序可能增加排序的开销。" in issues
+
+
+def test_old_style_join():
+    assert OLD_JOIN in audit_query("SELECT o.OrderID FROM Orders o, Customers c WHERE o.CustomerID = c.CustomerID")
+    # 选择列表和 IN 列表中的逗号不是旧式连接
+    issues = audit_query("SELECT o.OrderID, o.OrderDate FROM Orders o JOIN Customers c ON o.CustomerID = c.CustomerID "
+                         "WHERE o.Status IN (1, 2)")
+    assert OLD_JOIN not in issues
+    # 子查询中的旧式连接
+    assert QueryTokens("SELECT 1 FROM Orders WHERE EXISTS (SELECT 1 FROM a, b WHERE a.id = b.id)").old_style_join
+
+
+def test_leading_wildcard():
+    assert LEADING_WILDCARD in audit_query("SELECT Name FROM Customers WHERE Name LIKE '%son'")
+    assert LEADING_WILDCARD in audit_query("SELECT Name FROM Customers WHERE Name LIKE N'%son'")
+    assert LEADING_WILDCARD not in audit_query("SELECT Name FROM Customers WHERE Name LIKE 'son%'")
+
+
+def test_table_rules():
+    assert "警告: 使用@@IDENTITY可能返回错误的值。考虑使用SCOPE_IDENTITY()或IDENT_CURRENT('table_name')。" in \
+        audit_query("INSERT INTO Orders (CustomerID) VALUES (1); SELECT @@IDENTITY")
+    assert "警告: 使用动态SQL时要小心，确保正确地参数化查询以避免SQL注入。" in \
+        audit_query("EXEC sp_executesql @sql, N'@id int', @id = 1")
+    assert "警告: 不要使用RECOMPILE查询提示，除非有充分的理由。" in \
+        audit_query("SELECT OrderID FROM Orders WHERE CustomerID = @id OPTION (RECOMPILE)")
+    assert audit_query("SELECT OrderID FROM Orders WHERE CustomerID = @id OPTION (RECOMPILE)").count(
+        "警告: 不要使用RECOMPILE查询提示，除非有充分的理由。") == 1
+
+
+def test_keyword_matcher_counts_overlapping_patterns():
+    matcher = KeywordMatcher(["ORDER BY", "BY", "SELECT *", "*"])
+    counts = matcher.search(QueryTokens("SELECT * FROM t ORDER BY a, b").tokens)
+    assert counts == {"ORDER BY": 1, "BY": 1, "SELECT *": 1, "*": 1}
+
+
+def test_each_keyword_has_one_owning_rule():
+    # xp_cmdshell 只由规则21报告，修改配置选项的规则要求调用 sp_configure
+    issues = audit_query("EXEC xp_cmdshell 'dir'")
+    assert "警告: xp_cmdshell可以执行操作系统命令，但可能会引入安全风险。" in issues
+    assert "警告: 修改配置选项可能会引入安全风险。" not in issues
+    assert "警告: 修改配置选项可能会引入安全风险。" in audit_query("EXEC sp_configure 'max degree of parallelism', 4")
+    # 同一个关键字只产生一条消息
+    assert sum('FLOAT' in issue for issue in audit_query("DECLARE @ratio FLOAT")) == 1
+    assert sum('TEXT' in issue or 'IMAGE' in issue for issue in audit_query("CREATE TABLE t (Body TEXT, Photo IMAGE)")) == 1
+
+
+def test_longer_pattern_owns_contained_keyword():
+    distinct = [issue for issue in audit_query("SELECT DISTINCT CustomerID FROM Orders") if 'DISTINCT' in issue]
+    assert distinct == ["警告: 过度使用DISTINCT可能导致额外的去重开销。"]
+    distinct = [issue for issue in audit_query("SELECT COUNT(DISTINCT CustomerID) FROM Orders") if 'DISTINCT' in issue]
+    assert distinct == ["提示: 使用COUNT(DISTINCT column)可能会影响性能。"]
+    # 两种写法都出现时两条规则各自报告
+    distinct = [issue for issue in audit_query("SELECT DISTINCT Region, COUNT(DISTINCT CustomerID) FROM Orders GROUP BY Region")
+                if 'DISTINCT' in issue]
+    assert len(distinct) == 2
+    nolock = [issue for issue in audit_query("SELECT OrderID FROM Orders WITH (NOLOCK)") if 'NOLOCK' in issue]
+    assert nolock == [NOLOCK_HINT]
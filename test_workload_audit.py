@@ -0,0 +1,80 @@
+# 计划缓存批量审计的回归测试：问题按执行次数加权汇总，形状相同的计划只审计一次
+from plan_cache import PlanAuditCache
+from plan_operator_store import PlanOperatorStore
+from workload_audit import audit_cached_plans, summarize_weighted_issues
+
+
+def _plan(plan_hash, cost):
+    return f"""<ShowPlanXML xmlns="http://schemas.microsoft.com/sqlserver/2004/07/showplan" Version="1.564">
+<BatchSequence><Batch><Statements>
+<StmtSimple StatementId="1" StatementText="SELECT OrderID FROM Orders" StatementType="SELECT"
+            StatementSubTreeCost="{cost}" QueryHash="0x1A2B" QueryPlanHash="{plan_hash}">
+  <QueryPlan DegreeOfParallelism="1">
+    <RelOp NodeId="0" PhysicalOp="Clustered Index Scan" LogicalOp="Clustered Index Scan" EstimateRows="1000000"
+           EstimatedTotalSubtreeCost="{cost}">
+      <IndexScan Ordered="0" Storage="RowStore">
+        <Object Database="[AuditDemoDB]" Schema="[dbo]" Table="[Orders]" Index="[PK_Orders]" />
+      </IndexScan>
+    </RelOp>
+  </QueryPlan>
+</StmtSimple>
+</Statements></Batch></BatchSequence></ShowPlanXML>"""
+
+
+def _cached_plans(top_n):
+    """代替 fetch_top_cached_plans 查询计划缓存；前两个计划的 QueryPlanHash 和语句相同。"""
+    rows = [
+        ('0x01', 100, 5000000, 900000, 6000000, _plan('0x9F8E', 6.5)),
+        ('0x02', 40, 2000000, 360000, 2500000, _plan('0x9F8E', 6.5)),
+        ('0x03', 5, 100000, 20000, 150000, _plan('0x7777', 0.5)),
+    ]
+    return [{'plan_handle': handle, 'execution_count': count, 'total_worker_time': cpu, 'total_logical_reads': reads,
+             'total_elapsed_time': elapsed, 'query_text': 'SELECT OrderID FROM Orders', 'query_plan': plan}
+            for handle, count, cpu, reads, elapsed, plan in rows[:top_n]]
+
+
+def _audit(monkeypatch, **options):
+    import workload_audit
+    monkeypatch.setattr(workload_audit, 'fetch_top_cached_plans', lambda conn, top_n: _cached_plans(top_n))
+    return audit_cached_plans(None, top_n=3, **options)
+
+
+def test_summarize_weighted_issues():
+    plans = [
+        {'issues': ['A', 'B', 'A'], 'execution_count': 100, 'total_worker_time': 5000},
+        {'issues': ['B'], 'execution_count': 40, 'total_worker_time': 9000},
+        {'issues': ['C'], 'execution_count': 140, 'total_worker_time': 1000},
+    ]
+    summary = summarize_weighted_issues(plans)
+    assert [(entry['issue'], entry['weight'], entry['plans'], entry['total_worker_time']) for entry in summary] == [
+        ('B', 140, 2, 14000),
+        ('C', 140, 1, 1000),
+        # 同一计划中重复的问题只计一次
+        ('A', 100, 1, 5000),
+    ]
+
+
+def test_audit_cached_plans_weights_issues_by_execution_count(monkeypatch):
+    plans, summary = _audit(monkeypatch, workers=2)
+    assert [plan['plan_handle'] for plan in plans] == ['0x01', '0x02', '0x03']
+    assert plans[0]['plan_key'] == plans[1]['plan_key'] != plans[2]['plan_key']
+    assert plans[0]['issues'] == plans[1]['issues'] and plans[0]['issues']
+    # 三个计划都有的问题权重为全部执行次数之和
+    top = summary[0]
+    assert (top['weight'], top['plans'], top['total_worker_time']) == (145, 3, 7100000)
+    assert all(entry['weight'] >= later['weight'] for entry, later in zip(summary, summary[1:]))
+
+
+def test_audit_cached_plans_uses_cache_and_operator_store(monkeypatch):
+    cache = PlanAuditCache()
+    plans, _ = _audit(monkeypatch, workers=1, cache=cache)
+    assert len(cache) == 2
+    cache.put(plans[2]['plan_key'], ['提示: 来自缓存'])
+    cached, summary = _audit(monkeypatch, workers=1, cache=cache)
+    assert cached[2]['issues'] == ['提示: 来自缓存']
+    assert ('提示: 来自缓存', 5) in [(entry['issue'], entry['weight']) for entry in summary]
+
+    store = PlanOperatorStore()
+    _audit(monkeypatch, workers=1, operator_store=store)
+    # 形状相同的计划只加入一次
+    assert len(store.plan_keys) == 2 and len(store) == 2
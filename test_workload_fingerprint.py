@@ -0,0 +1,56 @@
+# 语句指纹的回归测试：常量不同的语句得到相同的指纹，每个指纹只审核一次
+from workload_fingerprint import audit_workload, audit_workload_file, group_workload, normalize_query, query_fingerprint
+
+
+def test_normalize_query_strips_literals_comments_case_and_whitespace():
+    assert normalize_query("select * from Orders where id = 5 and name = N'x' -- 注释") == \
+        "SELECT * FROM ORDERS WHERE ID = ? AND NAME = ?"
+    assert normalize_query("SELECT *\n  FROM orders /* 注释 */ WHERE ID=7 AND Name='y'") == \
+        "SELECT * FROM ORDERS WHERE ID = ? AND NAME = ?"
+    assert normalize_query("EXEC dbo.usp_GetOrder @id = 0x1F") == "EXEC DBO.USP_GETORDER @ID = ?"
+
+
+def test_normalize_query_collapses_constant_in_lists():
+    assert normalize_query("SELECT a FROM t WHERE id IN (1, 2, -3)") == "SELECT A FROM T WHERE ID IN (?)"
+    assert normalize_query("SELECT a FROM t WHERE id IN (4)") == "SELECT A FROM T WHERE ID IN (?)"
+    # 子查询不是常量列表
+    assert normalize_query("SELECT a FROM t WHERE id IN (SELECT id FROM u)") == \
+        "SELECT A FROM T WHERE ID IN (SELECT ID FROM U)"
+
+
+def test_fingerprint_groups_literal_variants():
+    statements = ["SELECT Name FROM Customers WHERE CustomerID = 1",
+                  "select name from customers where customerid = 2",
+                  "SELECT Name FROM Customers WHERE CustomerID = 1",
+                  "SELECT OrderID FROM Orders WHERE CustomerID IN (1, 2, 3)",
+                  "SELECT Name  FROM Customers WHERE CustomerID  =  1"]
+    groups = group_workload(statements)
+    assert [group['count'] for group in groups] == [4, 1]
+    # 只有空白不同的语句不算新的常量变体
+    assert [group['variants'] for group in groups] == [2, 1]
+    assert groups[0]['sample'] == statements[0]
+    assert groups[0]['fingerprint'] == query_fingerprint(statements[1])[0]
+    assert groups[0]['fingerprint'] != groups[1]['fingerprint']
+
+
+def test_audit_workload_audits_each_fingerprint_once(monkeypatch, tmp_path):
+    import workload_fingerprint
+    audited = []
+    monkeypatch.setattr(workload_fingerprint, 'audit_query', lambda query: audited.append(query) or ['警告: 示例'])
+    script = tmp_path / 'workload.sql'
+    script.write_text("SELECT * FROM Orders WHERE OrderID = 1;\nSELECT * FROM Orders WHERE OrderID = 2;\nGO\n"
+                      "SELECT * FROM Orders WHERE OrderID = 3;\nUPDATE Orders SET Status = 'x' WHERE OrderID = 3;\n",
+                      encoding='utf-8')
+    groups = audit_workload_file(script)
+    assert audited == ["SELECT * FROM Orders WHERE OrderID = 1", "UPDATE Orders SET Status = 'x' WHERE OrderID = 3"]
+    assert [(group['count'], group['issues']) for group in groups] == [(3, ['警告: 示例']), (1, ['警告: 示例'])]
+    # 审核结果按出现次数适用于同一指纹的所有语句
+    assert sum(group['count'] * len(group['issues']) for group in groups) == 4
+    assert audit_workload([]) == []
+
+
+def test_audit_workload_runs_sql_text_audit():
+    groups = audit_workload(["SELECT * FROM Orders WITH (NOLOCK) WHERE OrderID = 1",
+                             "SELECT * FROM Orders WITH (NOLOCK) WHERE OrderID = 2"])
+    assert len(groups) == 1 and groups[0]['count'] == 2
+    assert "警告: 使用NOLOCK查询提示可能会导致脏读。" in groups[0]['issues']
@@ -0,0 +1,185 @@
+# 计划缓存批量审计
+# 从 sys.dm_exec_query_stats 中取出按 CPU、逻辑读取和耗时排名靠前的缓存计划，
+# 用 sys.dm_exec_query_plan 取得执行计划后在进程池中并行审计，
+# 同一问题在各计划中出现时按执行次数加权汇总，优先展示对整个负载影响最大的问题。
+import os
+import xml.etree.ElementTree as ET
+from concurrent.futures import ProcessPoolExecutor
+
+from execution_plan_audit import _audit_plan_root, audit_execution_plan
+from parameter_sniffing_audit import cross_plan_sniffing_issues
+from plan_cache import plan_cache_key
+from plan_operator_store import operator_rows
+from plan_visitor import walk_plan
+
+# 按 plan_handle 汇总各语句的资源消耗，CPU、逻辑读取、耗时任一项排进前 N 名的计划都会被审计
+TOP_CACHED_PLANS_QUERY = """
+WITH stats AS (
+    SELECT
+        qs.plan_handle,
+        SUM(qs.execution_count) AS execution_count,
+        SUM(qs.total_worker_time) AS total_worker_time,
+        SUM(qs.total_logical_reads) AS total_logical_reads,
+        SUM(qs.total_elapsed_time) AS total_elapsed_time
+    FROM sys.dm_exec_query_stats qs
+    GROUP BY qs.plan_handle
+),
+ranked AS (
+    SELECT
+        stats.*,
+        ROW_NUMBER() OVER (ORDER BY total_worker_time DESC) AS cpu_rank,
+        ROW_NUMBER() OVER (ORDER BY total_logical_reads DESC) AS reads_rank,
+        ROW_NUMBER() OVER (ORDER BY total_elapsed_time DESC) AS duration_rank
+    FROM stats
+)
+SELECT TOP (?)
+    ranked.plan_handle,
+    ranked.execution_count,
+    ranked.total_worker_time,
+    ranked.total_logical_reads,
+    ranked.total_elapsed_time,
+    st.text AS query_text,
+    CAST(qp.query_plan AS NVARCHAR(MAX)) AS query_plan
+FROM ranked
+CROSS APPLY sys.dm_exec_query_plan(ranked.plan_handle) qp
+OUTER APPLY sys.dm_exec_sql_text(ranked.plan_handle) st
+WHERE qp.query_plan IS NOT NULL
+    AND (ranked.cpu_rank <= ? OR ranked.reads_rank <= ? OR ranked.duration_rank <= ?)
+ORDER BY
+    CASE
+        WHEN ranked.cpu_rank <= ranked.reads_rank AND ranked.cpu_rank <= ranked.duration_rank THEN ranked.cpu_rank
+        WHEN ranked.reads_rank <= ranked.duration_rank THEN ranked.reads_rank
+        ELSE ranked.duration_rank
+    END;
+"""
+
+
+def fetch_top_cached_plans(conn, top_n=500):
+    """
+    从计划缓存中取出资源消耗最高的 top_n 个执行计划。
+
+    返回字典列表，包含 plan_handle、执行次数、累计 CPU/逻辑读取/耗时（微秒）、批处理文本和执行计划 XML。
+    """
+    import pyodbc
+
+    cursor = conn.cursor()
+    try:
+        cursor.execute(TOP_CACHED_PLANS_QUERY, top_n, top_n, top_n, top_n)
+        rows = cursor.fetchall()
+    except pyodbc.Error as e:
+        print(f"错误: {e}")
+        print("提示：读取计划缓存需要 VIEW SERVER STATE 权限。")
+        return []
+    finally:
+        cursor.close()
+
+    return [{
+        'plan_handle': '0x' + bytes(row[0]).hex().upper(),
+        'execution_count': row[1],
+        'total_worker_time': row[2],
+        'total_logical_reads': row[3],
+        'total_elapsed_time': row[4],
+        'query_text': row[5] or '',
+        'query_plan': row[6],
+    } for row in rows]
+
+
+def _audit_plan_quietly(plan_xml):
+    # 在子进程中执行，只收集问题不打印，解析失败时返回空列表
+    return audit_execution_plan(plan_xml, verbose=False) or []
+
+
+def _audit_plan_with_operators(plan_xml):
+    # 在子进程中执行：一次解析同时得到问题列表和操作符行，供父进程加入列式存储
+    try:
+        root = ET.fromstring(plan_xml)
+    except ET.ParseError as e:
+        print(f"解析执行计划时出错: {e}")
+        return [], []
+    facts = walk_plan(root)
+    return _audit_plan_root(root, verbose=False, facts=facts), operator_rows(facts)
+
+
+def audit_cached_plans(conn, top_n=500, workers=None, operator_store=None, cache=None):
+    """
+    批量审计计划缓存中资源消耗最高的 top_n 个执行计划。
+
+    执行计划的解析和审计在 workers 个进程中并行执行（默认为 CPU 核数），形状相同的计划只审计一次。
+    operator_store 为 plan_operator_store.PlanOperatorStore 时，各计划的操作符同时加入该存储。
+    cache 为 plan_cache.PlanAuditCache 时先查找缓存，只审计未命中的计划；需要收集操作符时仍然审计全部计划。
+    返回 (每个计划的审计结果, 按执行次数加权汇总的问题列表)。
+    """
+    plans = fetch_top_cached_plans(conn, top_n)
+    print(f"开始审计计划缓存中的 {len(plans)} 个执行计划...")
+    if not plans:
+        return [], []
+
+    # QueryPlanHash 相同的计划审计结果相同，只提交一次
+    unique_plans = {}
+    for plan in plans:
+        plan['plan_key'] = plan_cache_key(plan['query_plan'])
+        unique_plans.setdefault(plan['plan_key'], plan['query_plan'])
+
+    issues_by_key = {}
+    if cache is not None and operator_store is None:
+        for key in unique_plans:
+            issues = cache.get(key)
+            if issues is not None:
+                issues_by_key[key] = issues
+
+    keys = [key for key in unique_plans if key not in issues_by_key]
+    workers = workers or os.cpu_count() or 1
+    audit = _audit_plan_quietly if operator_store is None else _audit_plan_with_operators
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        results = executor.map(audit, [unique_plans[key] for key in keys],
+                               chunksize=max(1, len(keys) // (workers * 4)))
+        for key, result in zip(keys, results):
+            if operator_store is not None:
+                result, rows = result
+                operator_store.add_rows(rows, key)
+            issues_by_key[key] = result
+            if cache is not None:
+                cache.put(key, result)
+
+    for plan in plans:
+        plan['issues'] = issues_by_key[plan['plan_key']]
+
+    summary = summarize_weighted_issues(plans)
+    print_workload_report(plans, summary)
+
+    # 同一查询因嗅探到不同参数值而缓存了多个执行计划
+    for issue in cross_plan_sniffing_issues([plan['query_plan'] for plan in plans]):
+        print(issue)
+    return plans, summary
+
+
+def summarize_weighted_issues(plans):
+    """
+    把各计划的问题按执行次数加权汇总。
+
+    返回按权重降序排列的字典列表：问题文本、加权次数（涉及计划的执行次数之和）、涉及的计划数、累计 CPU。
+    """
+    summary = {}
+    for plan in plans:
+        # 同一计划中重复出现的问题只计一次
+        for issue in set(plan['issues']):
+            entry = summary.setdefault(issue, {'issue': issue, 'weight': 0, 'plans': 0, 'total_worker_time': 0})
+            entry['weight'] += plan['execution_count']
+            entry['plans'] += 1
+            entry['total_worker_time'] += plan['total_worker_time']
+    return sorted(summary.values(), key=lambda entry: (entry['weight'], entry['total_worker_time']), reverse=True)
+
+
+def print_workload_report(plans, summary, limit=50):
+    print("按执行次数加权的问题汇总：")
+    for entry in summary[:limit]:
+        print(f"[执行 {entry['weight']} 次, {entry['plans']} 个计划, CPU {entry['total_worker_time'] / 1000:.0f} 毫秒] "
+              f"{entry['issue']}")
+
+    print("资源消耗最高的执行计划：")
+    for plan in plans[:limit]:
+        query_text = ' '.join(plan['query_text'].split())
+        print(f"{plan['plan_handle']}: 执行 {plan['execution_count']} 次, "
+              f"CPU {plan['total_worker_time'] / 1000:.0f} 毫秒, 逻辑读取 {plan['total_logical_reads']}, "
+              f"耗时 {plan['total_elapsed_time'] / 1000:.0f} 毫秒, 问题 {len(set(plan['issues']))} 个 - "
+              f"{query_text[:100]}")
@@ -0,0 +1,126 @@
+# SQL 语句指纹与负载去重
+# 捕获的负载中大部分语句只是常量不同。把字符串、数字和二进制常量替换为 ?，去掉注释，统一空白和大小写，
+# 并把 IN 列表折叠为 IN (?)，对结果做哈希得到语句指纹；每个指纹只审核一次，并报告出现次数和常量变体数。
+# 变体很多的指纹就是以即席方式执行的语句，每个变体在计划缓存中各占一个只用一次的计划。
+import hashlib
+
+from sqlparse import lexer
+from sqlparse.tokens import Comment, Keyword, Number, String, Whitespace
+
+from mapped_file import iter_sql_file
+from sql_query_audit import audit_query
+
+# 常量变体数达到该值的指纹视为即席执行的语句
+AD_HOC_MIN_VARIANTS = 10
+
+# 前后不加空格的记号，使规范化后的文本接近原来的写法
+_NO_SPACE_BEFORE = frozenset({',', ')', '.', ';'})
+_NO_SPACE_AFTER = frozenset({'(', '.', '@', '@@'})
+
+
+def _fingerprint_tokens(query):
+    """词法分析查询，常量替换为 ?，跳过空白和注释，关键字和名称转为大写。"""
+    tokens = []
+    for ttype, value in lexer.tokenize(query):
+        if ttype in Whitespace or ttype in Comment:
+            continue
+        if ttype in String.Single or ttype in Number:
+            # N'...' 在词法上是名称 N 加字符串常量
+            if ttype in String.Single and tokens and tokens[-1] == 'N':
+                tokens.pop()
+            tokens.append('?')
+        elif ttype in Keyword:
+            tokens.extend(value.upper().split())
+        else:
+            tokens.append(value.upper())
+    return tokens
+
+
+def _collapse_in_lists(tokens):
+    """把只包含常量的 IN 列表折叠为 IN (?)，不同长度的列表得到相同的指纹。"""
+    collapsed = []
+    position = 0
+    while position < len(tokens):
+        token = tokens[position]
+        collapsed.append(token)
+        position += 1
+        if token == 'IN' and tokens[position:position + 1] == ['(']:
+            end = position + 1
+            while end < len(tokens) and tokens[end] in ('?', ',', '-', '+'):
+                end += 1
+            if end < len(tokens) and tokens[end] == ')' and end > position + 1:
+                collapsed.extend(('(', '?', ')'))
+                position = end + 1
+    return collapsed
+
+
+def normalize_query(query):
+    """返回查询规范化后的文本：常量替换为 ?，IN 列表折叠，去掉注释，空白和大小写统一。"""
+    parts = []
+    previous = None
+    for token in _collapse_in_lists(_fingerprint_tokens(query)):
+        if parts and token not in _NO_SPACE_BEFORE and previous not in _NO_SPACE_AFTER:
+            parts.append(' ')
+        parts.append(token)
+        previous = token
+    return ''.join(parts)
+
+
+def query_fingerprint(query):
+    """返回 (指纹, 规范化文本)，指纹为规范化文本的 SHA-256。"""
+    text = normalize_query(query)
+    return hashlib.sha256(text.encode('utf-8')).hexdigest(), text
+
+
+def group_workload(statements):
+    """
+    按指纹对语句分组，statements 为可迭代的语句文本，逐条读取而不会全部保留在内存中。
+
+    返回字典列表，按指纹第一次出现的顺序排列：fingerprint、text（规范化文本）、sample（第一次出现的原始语句）、
+    count（出现次数）、variants（空白规范化后不同的原始文本数，即常量变体数）。
+    """
+    groups = {}
+    variants = {}
+    for statement in statements:
+        fingerprint, text = query_fingerprint(statement)
+        group = groups.get(fingerprint)
+        if group is None:
+            group = groups[fingerprint] = {'fingerprint': fingerprint, 'text': text, 'sample': statement, 'count': 0}
+            variants[fingerprint] = set()
+        group['count'] += 1
+        variants[fingerprint].add(hashlib.sha256(' '.join(statement.split()).encode('utf-8')).digest())
+    for fingerprint, group in groups.items():
+        group['variants'] = len(variants[fingerprint])
+    return list(groups.values())
+
+
+def print_workload_fingerprints(groups, limit=20):
+    """按出现次数从多到少打印前 limit 个指纹，并指出以即席方式执行的语句。"""
+    total = sum(group['count'] for group in groups) or 1
+    print(f"共 {total} 条语句，{len(groups)} 个不同的语句指纹。出现次数最多的语句：")
+    for group in sorted(groups, key=lambda group: group['count'], reverse=True)[:limit]:
+        print(f"{group['fingerprint'][:16]}: {group['count']} 次（{group['count'] / total:.1%}），"
+              f"{group['variants']} 个常量变体 - {group['text'][:100]}")
+        if group['variants'] >= AD_HOC_MIN_VARIANTS:
+            print(f"提示: 该语句以 {group['variants']} 组不同的常量执行，每组常量都会单独编译并在计划缓存中占用一个计划；"
+                  f"考虑改为参数化查询（sp_executesql）、启用 optimize for ad hoc workloads "
+                  f"或对数据库使用 PARAMETERIZATION FORCED。")
+
+
+def audit_workload(statements, limit=20):
+    """
+    按指纹去重后审核负载中的语句：每个指纹只审核第一次出现的语句，审核结果适用于同一指纹的所有语句。
+
+    返回 group_workload 的结果，每个字典增加 issues（审核发现的问题列表）。
+    """
+    groups = group_workload(statements)
+    for group in groups:
+        print(f"语句指纹 {group['fingerprint'][:16]}（出现 {group['count']} 次）: {group['text'][:100]}")
+        group['issues'] = audit_query(group['sample']) or []
+    print_workload_fingerprints(groups, limit)
+    return groups
+
+
+def audit_workload_file(path, encoding='utf-8-sig', limit=20):
+    """通过 mmap 读取捕获的负载脚本（按 ';' 和 GO 切分语句），按指纹去重后审核。"""
+    return audit_workload(iter_sql_file(path, encoding), limit)